@@ -1,20 +1,214 @@
 import os
+import re
+import shutil
 import subprocess
+import tempfile
 import threading
+import time
 import shlex
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from jobmanager import JobManager
+from metricsmanager import MetricsManager
+
+class OutputPump:
+    """
+    Copies child process output to sinks on daemon threads, one bounded chunk at a
+    time, as soon as it is produced. Every pipe gets drained, so no stage can block
+    on a full pipe buffer, and nothing is accumulated in memory.
+    """
+    CHUNK_SIZE = 64 * 1024
 
-class ExecutionManager:
     def __init__(self):
+        self.threads = []
+        self.lock = threading.Lock()    # keeps chunks from different stages whole
+
+    def add(self, pipe, sink):
+        t = threading.Thread(target=self._copy, args=(pipe, sink), daemon=True)
+        t.start()
+        self.threads.append(t)
+
+    def _copy(self, pipe, sink):
+        try:
+            while True:
+                # read1 returns whatever is available instead of waiting for a full chunk
+                chunk = pipe.read1(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                with self.lock:
+                    sink.write(chunk)
+                    sink.flush()
+        except (OSError, ValueError):
+            pass  # sink went away (closed terminal, broken pipe)
+        finally:
+            pipe.close()
+
+    def join(self):
+        for t in self.threads:
+            t.join()
+
+
+class BuiltinProcess:
+    """
+    A builtin standing in for a Popen in a pipeline. It runs in-process: right away
+    when its output goes to a file or sink, or on a thread writing into a pipe when
+    the next stage reads it (so a full pipe can't block the stages still to start).
+    Only a stage of a longer pipeline keeps exit to itself; a command on its own
+    lets it through, so it ends the task list.
+    """
+    def __init__(self, run, args, stdout, stderr, in_pipeline=False):
+        self.args = args
+        self.in_pipeline = in_pipeline
+        self.returncode = None
+        self.stdout = None
+        self.stderr = None      # builtins write their errors to the stderr sink themselves
+        self._thread = None
+        if stdout is subprocess.PIPE:
+            read_fd, write_fd = os.pipe()
+            self.stdout = os.fdopen(read_fd, "rb")
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            args=(run, args, os.fdopen(write_fd, "wb"), stderr, True))
+            self._thread.start()
+        else:
+            self._run(run, args, stdout, stderr, False)
+
+    def _run(self, run, args, stdout, stderr, close):
+        try:
+            self.returncode = run(args, stdout, stderr)
+        except SystemExit as e:
+            if not self.in_pipeline:
+                raise
+            self.returncode = e.code if isinstance(e.code, int) else 0
+        except (OSError, ValueError):
+            self.returncode = 1     # the reader went away (e.g. the next stage doesn't read stdin)
+        finally:
+            if close:
+                try:
+                    stdout.close()
+                except OSError:
+                    pass
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+        return self.returncode
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        pass    # nothing to stop; builtins return on their own
+
+    kill = terminate
+
+
+# name -> full path, per PATH value, like sh's hash table; shared by every manager
+_HASHED = {}
+
+TEST_UNARY = {
+    "-e": os.path.exists,
+    "-f": os.path.isfile,
+    "-d": os.path.isdir,
+    "-L": os.path.islink,
+    "-h": os.path.islink,
+    "-r": lambda path: os.access(path, os.R_OK),
+    "-w": lambda path: os.access(path, os.W_OK),
+    "-x": lambda path: os.access(path, os.X_OK),
+    "-s": lambda path: os.path.isfile(path) and os.path.getsize(path) > 0,
+}
+TEST_NUMERIC = {
+    "-eq": lambda a, b: a == b,
+    "-ne": lambda a, b: a != b,
+    "-lt": lambda a, b: a < b,
+    "-le": lambda a, b: a <= b,
+    "-gt": lambda a, b: a > b,
+    "-ge": lambda a, b: a >= b,
+}
+ECHO_ESCAPES = {"\\": "\\", "n": "\n", "t": "\t", "r": "\r", "a": "\a", "b": "\b",
+                "f": "\f", "v": "\v", "e": "\x1b"}
+VARIABLE = re.compile(r"\$(?:\{([A-Za-z_][A-Za-z0-9_]*)\}|([A-Za-z_][A-Za-z0-9_]*))")
+
+
+def _process_umask():
+    """
+    The process's umask, or None if it can't be told. os.umask would have to set it
+    to read it, changing the mode of files other threads create meanwhile, so it's
+    read from /proc (Linux), or from a shell, which inherits it.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    sh = shutil.which("sh")
+    if sh is None:
+        return None
+    try:
+        return int(subprocess.run([sh, "-c", "umask"], capture_output=True, text=True, timeout=5).stdout, 8)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def _text(text):
+    # Environment values can hold undecodable bytes (surrogate escapes); give them back as they were
+    return text.encode("utf-8", "surrogateescape")
+
+
+def _binary(stream):
+    # Text streams (sys.stdout) write through their byte buffer
+    stream.flush()
+    return getattr(stream, "buffer", stream)
+
+
+class ExecutionManager:
+    """
+    Runs volt-shell task lists. Every manager (and every subshell, job and parallel
+    branch, which get a child manager) has its own working directory, environment
+    and umask, applied only to the processes it starts; nothing here changes the
+    Python process's cwd, so managers in different threads can't trip each other up.
+    """
+    def __init__(self, stdout=None, stderr=None):
         self.cwd = os.getcwd()
+        # Binary sinks for command output. Without a stdout sink the last stage writes
+        # straight to the terminal, so programs still see a tty.
+        self.stdout = stdout
+        self.stderr = stderr
+        self.stdin = None           # None = inherit the terminal
+        self.on_spawn = None        # called with every Popen, for job control
+        self.detached = False       # own session, so Ctrl-C at the prompt doesn't reach it
+        self.parallel_limit = os.cpu_count() or 4   # default concurrency for parallel groups
+        self.env = dict(os.environ)     # what commands run with; export and unset change it
+        self.umask = None               # None = the process's; set by the umask builtin
+        self.subshell = False           # exit ends this manager's task list, not the session
+
+    def _child(self, stdout=None, stderr=None):
+        # A sub-manager (subshell, job, parallel branch) starting from our state
+        child = ExecutionManager(stdout=stdout, stderr=stderr)
+        child.cwd = self.cwd
+        child.stdin = self.stdin
+        child.on_spawn = self.on_spawn
+        child.detached = self.detached
+        child.parallel_limit = self.parallel_limit
+        child.env = dict(self.env)  # like a forked shell: changes stay in the child
+        child.umask = self.umask
+        child.subshell = True
+        return child
 
     # ----------------------
     # Entry point: run structured task list
     # ----------------------
     def exec_tasks(self, tasks):
         last_exit_code = 0
-        for task in tasks:
-            last_exit_code = self._run_task(task, last_exit_code)
+        try:
+            for task in tasks:
+                last_exit_code = self._run_task(task, last_exit_code)
+        except SystemExit as e:
+            if not self.subshell:
+                raise
+            return e.code if isinstance(e.code, int) else 0
         return last_exit_code
 
     # ----------------------
@@ -28,31 +222,129 @@ class ExecutionManager:
         if run_if == "last_success" and last_exit_code != 0:
             return last_exit_code
 
-        # Builtin commands
-        BUILTINS = {"cd", "exit"}
-        if task["cmd"] and task["cmd"][0] in BUILTINS:
-            return self._handle_builtin(task["cmd"], task.get("stdout"), task.get("append"))
-
-        # Subshell
-        if task.get("type") == "subshell":
-            subshell = ExecutionManager()
-            subshell.cwd = self.cwd
-            inner_tasks = task.get("tasks", [])
-            return subshell.exec_tasks(inner_tasks)
-
         # Background
         if task.get("background"):
-            threading.Thread(target=self._run_pipeline,
-                             args=(task["cmd"], task.get("stdout"), task.get("append", False)),
-                             daemon=True).start()
-            display = " | ".join(" ".join(p) for p in task["cmd"])
-            print(f"[bg] started: {display}")
+            display = self._display(task)
+            job = JobManager.submit(display, lambda job, output: self._run_background(task, job, output))
+            print(f"[{job.id}] started: {display}")
 
             return 0
 
+        # Subshell / parallel group
+        if task.get("type") in ("subshell", "parallel"):
+            target = None
+            if task.get("stdout"):
+                target = self._open_output(task["stdout"], task.get("append"))
+            try:
+                if task["type"] == "parallel":
+                    return self._run_parallel(task, target or self.stdout)
+                subshell = self._child(stdout=target or self.stdout, stderr=self.stderr)
+                inner_tasks = task.get("tasks", [])
+                return subshell.exec_tasks(inner_tasks)
+            finally:
+                if target:
+                    target.close()
+
         # Normal command / pipeline
         return self._run_pipeline(task["cmd"], task.get("stdout"), task.get("append", False))
 
+    def _run_background(self, task, job, output):
+        # Runs on a JobManager worker; all output goes to the job's spool file
+        child = self._child(stdout=output, stderr=output)
+        child.stdin = subprocess.DEVNULL
+        child.on_spawn = job.add_proc
+        child.detached = True
+        return child.exec_tasks([{k: v for k, v in task.items() if k not in ("background", "run_if")}])
+
+    # ----------------------
+    # Parallel groups
+    # ----------------------
+    def _run_parallel(self, task, stdout=None):
+        """
+        Run each entry of task["tasks"] concurrently, at most max_workers at a time.
+        Every branch's output is collected separately and printed as one block when
+        the branch finishes. combine decides the exit code:
+            all            0 only if every branch succeeded (default)
+            any            0 if at least one branch succeeded
+            first_failure  stop the other branches at the first failure
+        """
+        branches = task.get("tasks", [])
+        if not branches:
+            return 0
+        combine = task.get("combine", "all").replace("-", "_")
+        if combine not in ("all", "any", "first_failure"):
+            print(f"parallel: unknown combine policy: {combine}")
+            return 2
+        limit = max(1, int(task.get("max_workers") or self.parallel_limit))
+        out = stdout or _binary(sys.stdout)
+
+        results = [None] * len(branches)
+        first_failure = []
+        procs = []
+        lock = threading.Lock()
+        cancelled = threading.Event()
+
+        def spawned(proc):
+            with lock:
+                procs.append(proc)
+            if self.on_spawn:
+                self.on_spawn(proc)
+            if cancelled.is_set():
+                proc.terminate()
+
+        def run_branch(index, branch):
+            if cancelled.is_set():
+                return
+            started = time.monotonic()
+            # In memory until 1 MB, then on disk
+            with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as buf:
+                child = self._child(stdout=buf, stderr=buf)
+                child.stdin = subprocess.DEVNULL   # branches can't share the terminal
+                child.on_spawn = spawned
+                code = child.exec_tasks([{k: v for k, v in branch.items() if k != "run_if"}])
+
+                with lock:
+                    results[index] = code
+                    header = (f"--- [{index + 1}/{len(branches)}] {self._display(branch)} "
+                              f"(exit {code}, {time.monotonic() - started:.1f}s) ---\n")
+                    out.write(header.encode())
+                    buf.seek(0)
+                    shutil.copyfileobj(buf, out)
+                    out.flush()
+
+                    if code != 0 and combine == "first_failure" and not cancelled.is_set():
+                        first_failure.append(code)
+                        cancelled.set()
+                        for proc in procs:
+                            if proc.poll() is None:
+                                proc.terminate()
+
+        if stdout is None:
+            sys.stdout.flush()
+        with ThreadPoolExecutor(max_workers=min(limit, len(branches)), thread_name_prefix="volt-parallel") as pool:
+            for index, branch in enumerate(branches):
+                pool.submit(run_branch, index, branch)
+
+        failures = [code for code in results if code not in (None, 0)]
+        if combine == "any":
+            return 0 if 0 in results else (failures[0] if failures else 1)
+        if first_failure:
+            skipped = results.count(None)
+            if skipped:
+                print(f"parallel: {skipped} branch(es) not started after a failure")
+            return first_failure[0]
+        return failures[0] if failures else 0
+
+    def _display(self, task):
+        if task.get("type") == "subshell":
+            return "( " + "; ".join(self._display(t) for t in task.get("tasks", [])) + " )"
+        if task.get("type") == "parallel":
+            return "parallel ( " + "; ".join(self._display(t) for t in task.get("tasks", [])) + " )"
+        cmd = task.get("cmd") or []
+        if cmd and isinstance(cmd[0], list):
+            return " | ".join(" ".join(p) for p in cmd)
+        return " ".join(cmd)
+
     # ----------------------
     # Handle pipes and redirection
     # ----------------------
@@ -63,72 +355,357 @@ class ExecutionManager:
         else:
             pipeline_parts = [cmd]
 
+        stdout_sink = self.stdout
+        stderr_sink = self.stderr or _binary(sys.stderr)
+        if stdout_sink is None:
+            sys.stdout.flush()  # our own prints must land before the command's output
+
+        # In a pipeline every stage is a subshell: a builtin's cd or export doesn't outlast it
+        builtins = self if len(pipeline_parts) == 1 else None
+
         prev_proc = None
         procs = []
+        stages = []     # spawn/wall time and exit code of every stage, for MetricsManager
+        pump = OutputPump()
         num_cmds = len(pipeline_parts)
 
         for i, args in enumerate(pipeline_parts):
-            stdin = prev_proc.stdout if prev_proc else None
-            stdout = subprocess.PIPE if i < num_cmds - 1 else None
+            stdin = prev_proc.stdout if prev_proc else self.stdin
+            last = i == num_cmds - 1
+            stdout = subprocess.PIPE if not last or stdout_sink is not None else None
 
-            if i == num_cmds - 1 and stdout_target:
-                mode = "ab" if append else "wb"
-                stdout = open(stdout_target, mode)
+            target = None
+            if last and stdout_target:
+                target = stdout = self._open_output(stdout_target, append)
 
+            stage = {"cmd": args[0], "spawn": None, "wall": None, "exit": None,
+                     "started": time.perf_counter()}
+            stages.append(stage)
             try:
-                proc = subprocess.Popen(
-                    args,
-                    stdin=stdin,
-                    stdout=stdout,
-                    stderr=subprocess.PIPE,
-                    cwd=self.cwd,
-                )
-                procs.append(proc)
+                if self._is_builtin(args):
+                    if builtins is None:
+                        builtins = self._child(stdout=self.stdout, stderr=self.stderr)
+                    if stdout is None:
+                        stdout = _binary(sys.stdout)
+                    elif stdout is subprocess.PIPE and last:
+                        stdout = stdout_sink
+                    proc = BuiltinProcess(builtins._run_builtin, args, stdout, stderr_sink,
+                                          in_pipeline=builtins is not self)
+                    stage["spawn"] = 0.0
+                    procs.append(proc)
+                else:
+                    proc = self._spawn(
+                        args,
+                        stdin=stdin,
+                        stdout=stdout,
+                        stderr=subprocess.PIPE,
+                        cwd=self.cwd,
+                        start_new_session=self.detached and os.name == "posix",
+                    )
+                    stage["spawn"] = time.perf_counter() - stage["started"]
+                    procs.append(proc)
+                    if self.on_spawn:
+                        self.on_spawn(proc)
             except FileNotFoundError:
                 print(f"Command not found: {args[0]}")
+                self._stage_done(stage, 127)
+                if prev_proc and prev_proc.stdout:
+                    # Nobody will read it now; a builtin writing into it gets EPIPE instead of blocking
+                    prev_proc.stdout.close()
+                for p, done in zip(procs, stages):
+                    p.kill()
+                    p.wait()
+                    self._stage_done(done, p.returncode)
+                pump.join()
+                MetricsManager.record_exec(self._display({"cmd": cmd}), stages)
                 return 127
             finally:
                 if prev_proc and prev_proc.stdout:
                     prev_proc.stdout.close()
+                if target:
+                    target.close()  # the child has its own copy
+            if proc.stderr is not None:
+                pump.add(proc.stderr, stderr_sink)
             prev_proc = proc
 
         if not procs:
             return 0
 
-        out, err = procs[-1].communicate()
+        if procs[-1].stdout is not None:
+            pump.add(procs[-1].stdout, stdout_sink)
+
+        # In pipeline order; a stage that ended early is only noticed once the ones before it have
+        for p, stage in zip(procs, stages):
+            p.wait()
+            self._stage_done(stage, p.returncode)
+        pump.join()
+        MetricsManager.record_exec(self._display({"cmd": cmd}), stages)
+        return procs[-1].returncode
 
-        if out and not stdout_target:
-            print(out.decode(errors="ignore"), end="")
-        if err:
-            print(err.decode(errors="ignore"), end="")
+    def _open_output(self, path, append):
+        # A > or >> target: relative to our cwd, and created with our umask
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if append else os.O_TRUNC) | getattr(os, "O_BINARY", 0)
+        mode = 0o666 if self.umask is None else 0o666 & ~self.umask   # the kernel applies the process umask too
+        return os.fdopen(os.open(os.path.join(self.cwd, path), flags, mode), "ab" if append else "wb")
 
-        return procs[-1].wait()
+    def set_cwd(self, path):
+        # Where our commands run from now on; PWD follows, as it does in a shell
+        self.env["OLDPWD"] = self.cwd
+        self.cwd = self.env["PWD"] = path
+
+    def _stage_done(self, stage, exit_code):
+        stage["wall"] = time.perf_counter() - stage.pop("started")
+        stage["exit"] = exit_code
 
     # ----------------------
-    # Builtins
+    # Starting programs
     # ----------------------
-    def _handle_builtin(self, cmd, stdout=None, append=None):
-        if not cmd:
-            return 0
-        if cmd[0] == "cd":
-            path = cmd[1] if len(cmd) > 1 else os.path.expanduser("~")
+    def _which(self, name, fresh=False):
+        """
+        Full path of the program name runs, or None. Lookups through PATH are kept in
+        a table per PATH value, so a repeated command skips the directory walk (and
+        the child skips execvp's); export PATH=... simply starts a new table.
+        """
+        if os.sep in name or (os.altsep and os.altsep in name):
+            path = os.path.join(self.cwd, name)
+            return path if os.path.isfile(path) and os.access(path, os.X_OK) else None
+        search = self.env.get("PATH", os.defpath)
+        key = (search, name)
+        found = None if fresh else _HASHED.get(key)
+        if found is None:
+            found = shutil.which(name, path=search)
+            if found is not None and os.path.isabs(found):
+                _HASHED[key] = found   # a hit in a relative PATH entry depends on cwd
+        return found
+
+    def _spawn(self, args, **kwargs):
+        # Popen with our environment, through the lookup table; a stale entry (the program moved) is retried once
+        if self.umask is not None:
+            kwargs["umask"] = self.umask
+        for fresh in (False, True):
+            executable = self._which(args[0], fresh)
+            if executable is None:
+                raise FileNotFoundError(args[0])
             try:
-                os.chdir(path)
-                self.cwd = os.getcwd()
-            except Exception as e:
-                print(f"cd: {e}")
+                return subprocess.Popen(args, executable=executable, env=self.env, **kwargs)
+            except FileNotFoundError:
+                if fresh:
+                    raise
+
+    # ----------------------
+    # Builtins
+    # ----------------------
+    BUILTINS = {
+        "cd": "_builtin_cd",
+        "pwd": "_builtin_pwd",
+        "echo": "_builtin_echo",
+        "export": "_builtin_export",
+        "unset": "_builtin_unset",
+        "env": "_builtin_env",
+        "true": "_builtin_true",
+        ":": "_builtin_true",
+        "false": "_builtin_false",
+        "test": "_builtin_test",
+        "[": "_builtin_test",
+        "which": "_builtin_which",
+        "umask": "_builtin_umask",
+        "exit": "_builtin_exit",
+    }
+
+    def _is_builtin(self, args):
+        # env with a command to run is the real env
+        return args[0] in self.BUILTINS and not (args[0] == "env" and len(args) > 1)
+
+    def _run_builtin(self, args, stdout, stderr):
+        # Exit status of the builtin args[0]; output goes to the binary streams stdout and stderr
+        code = getattr(self, self.BUILTINS[args[0]])(args, stdout, stderr)
+        stdout.flush()
+        return code
+
+    def _builtin_cd(self, args, out, err):
+        target = os.path.expanduser(args[1] if len(args) > 1 else "~")
+        path = os.path.join(self.cwd, target)
+        if not os.path.isdir(path):
+            err.write(_text(f"cd: {target}: No such directory\n"))
+            return 1
+        self.set_cwd(os.path.normpath(path))
+        return 0
+
+    def _builtin_pwd(self, args, out, err):
+        out.write(_text(self.cwd + "\n"))
+        return 0
+
+    def _builtin_echo(self, args, out, err):
+        # GNU echo: leading -n, -e and -E flags; -e turns on backslash escapes
+        words = args[1:]
+        newline, escapes = True, False
+        while words and len(words[0]) > 1 and words[0][0] == "-" and set(words[0][1:]) <= set("neE"):
+            newline = newline and "n" not in words[0]
+            escapes = (escapes or "e" in words[0]) and "E" not in words[0]
+            words = words[1:]
+        text = " ".join(words)
+        if escapes:
+            text, stopped = self._unescape(text)
+            newline = newline and not stopped
+        out.write(_text(text + ("\n" if newline else "")))
+        return 0
+
+    def _unescape(self, text):
+        # (text with echo -e escapes applied, whether \c cut it short)
+        result = []
+        i = 0
+        while i < len(text):
+            ch = text[i]
+            if ch != "\\" or i + 1 == len(text):
+                result.append(ch)
+                i += 1
+                continue
+            code = text[i + 1]
+            if code == "c":
+                return "".join(result), True
+            if code in ECHO_ESCAPES:
+                result.append(ECHO_ESCAPES[code])
+                i += 2
+            elif code in "0x":
+                digits, base, size = ("01234567", 8, 3) if code == "0" else ("0123456789abcdefABCDEF", 16, 2)
+                j = i + 2
+                while j < len(text) and j < i + 2 + size and text[j] in digits:
+                    j += 1
+                if j == i + 2 and code == "x":
+                    result.append("\\x")
+                else:
+                    result.append(chr(int(text[i + 2:j] or "0", base)))
+                i = j
+            else:
+                result.append("\\" + code)
+                i += 2
+        return "".join(result), False
+
+    def _builtin_export(self, args, out, err):
+        # export NAME=value ...; $NAME and ${NAME} in the value come from the environment,
+        # so export PATH=$PATH:/opt/bin works even though volt-shell doesn't expand words
+        if len(args) == 1 or args[1:] == ["-p"]:
+            for name, value in sorted(self.env.items()):
+                out.write(_text(f"export {name}={shlex.quote(value)}\n"))
             return 0
-        elif cmd[0] == "pwd":
-            out_stream = sys.stdout
-            out_append = 'a' if append else 'w'
-            if stdout is not None:
-                out_stream = open(stdout, out_append)
-            print(self.cwd, file=out_stream)
+        code = 0
+        for word in args[1:]:
+            name, assign, value = word.partition("=")
+            if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name):
+                err.write(_text(f"export: {word}: bad variable name\n"))
+                code = 1
+            elif assign:
+                self.env[name] = VARIABLE.sub(lambda m: self.env.get(m.group(1) or m.group(2), ""), value)
+            # export NAME alone: everything we hold is exported already
+        return code
+
+    def _builtin_unset(self, args, out, err):
+        for name in args[1:]:
+            if name != "-v":
+                self.env.pop(name, None)
+        return 0
+
+    def _builtin_env(self, args, out, err):
+        out.write(_text("".join(f"{name}={value}\n" for name, value in self.env.items())))
+        return 0
+
+    def _builtin_true(self, args, out, err):
+        return 0
+
+    def _builtin_false(self, args, out, err):
+        return 1
+
+    def _builtin_which(self, args, out, err):
+        names = [name for name in args[1:] if not name.startswith("-")]
+        code = 0 if names else 1
+        for name in names:
+            path = self._which(name)
+            if path is None:
+                code = 1
+            else:
+                out.write(_text(path + "\n"))
+        return code
+
+    def _builtin_umask(self, args, out, err):
+        # umask [mode], octal only; applies to the commands we start and our > targets
+        if len(args) == 1:
+            mask = _process_umask() if self.umask is None else self.umask
+            if mask is None:
+                err.write(_text("umask: can't read the process umask here\n"))
+                return 1
+            out.write(_text(f"{mask:04o}\n"))
             return 0
-        elif cmd[0] == "exit":
-            raise SystemExit(0)
+        try:
+            mask = int(args[1], 8)
+        except ValueError:
+            mask = -1
+        if not 0 <= mask <= 0o777:
+            err.write(_text(f"umask: {args[1]}: octal mode expected\n"))
+            return 1
+        if sys.version_info < (3, 9):
+            err.write(_text("umask: needs Python 3.9 or later\n"))
+            return 1
+        self.umask = mask
         return 0
 
+    def _builtin_exit(self, args, out, err):
+        try:
+            code = int(args[1]) & 0xFF if len(args) > 1 else 0
+        except ValueError:
+            err.write(_text(f"exit: {args[1]}: numeric argument required\n"))
+            code = 2
+        raise SystemExit(code)
+
+    def _builtin_test(self, args, out, err):
+        words = args[1:]
+        if args[0] == "[":
+            if not words or words[-1] != "]":
+                err.write(_text("[: missing ]\n"))
+                return 2
+            words = words[:-1]
+        try:
+            return 0 if self._test(words) else 1
+        except ValueError as e:
+            err.write(_text(f"{args[0]}: {e}\n"))
+            return 2
+
+    def _test(self, words):
+        # POSIX test: -o binds looser than -a, which binds looser than !
+        if "-o" in words[1:-1]:
+            i = words.index("-o", 1)
+            return self._test(words[:i]) or self._test(words[i + 1:])
+        if "-a" in words[1:-1]:
+            i = words.index("-a", 1)
+            return self._test(words[:i]) and self._test(words[i + 1:])
+        if words and words[0] == "!" and len(words) > 1:
+            return not self._test(words[1:])
+        if len(words) == 0:
+            return False
+        if len(words) == 1:
+            return words[0] != ""
+        if len(words) == 2:
+            op, operand = words
+            if op == "-z":
+                return operand == ""
+            if op == "-n":
+                return operand != ""
+            if op in TEST_UNARY:
+                return operand != "" and TEST_UNARY[op](os.path.join(self.cwd, operand))
+            raise ValueError(f"{op}: unary operator expected")
+        if len(words) == 3:
+            left, op, right = words
+            if op == "=":
+                return left == right
+            if op == "!=":
+                return left != right
+            if op in TEST_NUMERIC:
+                try:
+                    return TEST_NUMERIC[op](int(left), int(right))
+                except ValueError:
+                    raise ValueError("integer expression expected") from None
+            raise ValueError(f"{op}: binary operator expected")
+        raise ValueError("too many arguments")
+
 
 if __name__ == "__main__":
 
@@ -146,7 +723,11 @@ if __name__ == "__main__":
             try:
                 tasks = json.loads(command)
             except json.JSONDecodeError:
-                tasks = parse_raw_command(command)
+                try:
+                    tasks = parse_raw_command(command)
+                except ValueError as e:
+                    print(f"volt-shell: {e}")
+                    continue
 
             execmgr.exec_tasks(tasks)
 
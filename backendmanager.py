@@ -0,0 +1,363 @@
+# backendmanager.py
+# 10/18/2026 - Voltur
+#
+# Routes chat requests across several LLM servers (`backends`). Each request goes to the
+# healthy backend with the best latency for its weight and current load; a backend that
+# fails is skipped until a health probe sees it answer again. Optionally a request that
+# hasn't produced anything within `hedge_after` seconds is duplicated to a second backend
+# and whichever answers first wins.
+#
+
+import json
+import queue
+import threading
+import time
+
+from voltlogger import Logger
+from chatcolors import Colors
+from chatcolors import ChatColors
+from warmupmanager import WarmupManager
+
+EWMA_ALPHA = 0.3            # weight of the newest latency sample
+UNKNOWN_LATENCY = 0.5       # seconds assumed for a backend that hasn't answered yet
+
+
+class Backend:
+    def __init__(self, url, weight=1.0):
+        self.url = url.rstrip("/")
+        self.weight = max(float(weight), 0.01)
+        self.api_type = None        # found by the first probe
+        self.endpoints = {}
+        self.healthy = None         # None until probed
+        self.latency = None         # EWMA of seconds to the first response data
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.hedges_won = 0
+        self.last_error = None
+        self.checked = None         # time.monotonic() of the last probe
+
+    def adopt(self, client):
+        # The server the client connected to is already known to work
+        self.api_type = client.api_type
+        self.endpoints = dict(client.endpoints)
+        self.healthy = True
+
+    def score(self):
+        # Lower is better: expected wait, stretched by queued work, shrunk by weight
+        latency = self.latency if self.latency is not None else UNKNOWN_LATENCY
+        return latency * (self.in_flight + 1) / self.weight
+
+    def observe(self, seconds):
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += EWMA_ALPHA * (seconds - self.latency)
+
+
+class BackendManager:
+    def __init__(self):
+        self.backends = []
+        self.hedge_after = 0        # seconds; 0 = never hedge
+        self.health_interval = 15   # seconds between probes
+        self.hedges = 0
+        self._adhoc = {}            # servers /model moved the client to, outside the pool
+        self._lock = threading.Lock()
+        self._prober = None
+        self._wake = threading.Event()
+
+    def configure(self, client, backends=None, hedge_after=None, health_interval=None):
+        """
+        backends is a list of URLs or {url, weight} dicts. The server the client
+        connected to is always part of the pool.
+        """
+        if hedge_after is not None:
+            self.hedge_after = float(hedge_after)
+        if health_interval is not None:
+            self.health_interval = float(health_interval)
+
+        pool = []
+        for entry in backends or []:
+            if isinstance(entry, str):
+                entry = {"url": entry}
+            pool.append(Backend(entry["url"], entry.get("weight", 1)))
+        primary = client.base_url.rstrip("/")
+        for backend in pool:
+            if backend.url == primary:
+                backend.adopt(client)
+                break
+        else:
+            main = Backend(primary)
+            main.adopt(client)
+            pool.insert(0, main)
+        self.backends = pool
+
+        if len(pool) > 1 and self._prober is None:
+            self._prober = threading.Thread(target=self._probe_loop, args=(client,), daemon=True)
+            self._prober.start()
+
+    # ----------------------
+    # Health probes
+    # ----------------------
+    def _probe_loop(self, client):
+        while True:
+            for backend in self.backends:
+                self._probe(client, backend)
+            self._wake.wait(self.health_interval)
+            self._wake.clear()
+
+    def _probe(self, client, backend):
+        import requests
+        headers = self._headers(client)
+        error = None
+        # Same detection order as the client library: Open WebUI, then Ollama
+        for api_type, models, chat in (("openwebui", "/api/models", "/api/chat/completions"),
+                                       ("ollama", "/api/tags", "/api/chat")):
+            try:
+                started = time.perf_counter()
+                resp = WarmupManager.session.get(backend.url + models, headers=headers, timeout=5)
+                if resp.status_code == 200 and isinstance(resp.json(), dict) and (
+                        api_type == "ollama" or "data" in resp.json()):
+                    with self._lock:
+                        if backend.latency is None:
+                            # A first guess, so an unused backend gets a turn; replies correct it
+                            backend.observe(time.perf_counter() - started)
+                        backend.api_type = api_type
+                        backend.endpoints = {"models": backend.url + models, "chat": backend.url + chat}
+                        backend.healthy = True
+                        backend.checked = time.monotonic()
+                    return
+                error = f"HTTP {resp.status_code}"
+            except requests.Timeout:
+                error = "no answer in 5s"
+            except requests.ConnectionError:
+                error = "connection failed"
+            except (requests.RequestException, ValueError) as e:
+                error = str(e) or type(e).__name__
+        with self._lock:
+            backend.healthy = False
+            backend.last_error = error
+            backend.checked = time.monotonic()
+
+    # ----------------------
+    # Picking a backend
+    # ----------------------
+    def _pool(self, client):
+        # After /model moved the client to a server outside the pool, requests follow it
+        url = client.base_url.rstrip("/")
+        if any(backend.url == url for backend in self.backends):
+            return self.backends
+        if url not in self._adhoc:
+            self._adhoc[url] = Backend(url)
+        backend = self._adhoc[url]
+        backend.adopt(client)
+        return [backend]
+
+    def pick(self, client, exclude=()):
+        # The healthy backend with the lowest score; if none is healthy, the best of the rest
+        with self._lock:
+            usable = [b for b in self._pool(client) if b.api_type and b not in exclude]
+            healthy = [b for b in usable if b.healthy]
+            candidates = healthy or usable
+            return min(candidates, key=Backend.score) if candidates else None
+
+    def _headers(self, client):
+        return {
+            'Authorization': f'Bearer {client.bearer_token}',
+            'Content-Type': 'application/json'
+        }
+
+    def _payload(self, client, backend, messages, stream, extras):
+        # client._build_payload, for the API type of the backend we're sending to
+        payload = client._build_payload(messages)
+        payload["stream"] = stream
+        if backend.api_type == "ollama":
+            payload.pop("temperature", None)
+            payload["options"] = {"temperature": client.temperature}
+            payload.update(extras)      # Ollama-only settings such as keep_alive
+        else:
+            payload.pop("options", None)
+            payload["temperature"] = client.temperature
+        return payload
+
+    # ----------------------
+    # Sending
+    # ----------------------
+    def stream(self, client, messages, stream=True, extras=None, cancel=None, info=None):
+        """
+        Send messages and yield the raw response lines (the whole body once when not
+        streaming). A backend that fails before sending anything is marked down and
+        the next one is tried; with hedge_after set, a second backend is asked too if
+        the first is slow to start. Raises the last error if every backend fails.
+
+        info, when given, is filled in with the backend that answered, the size of
+        the request body it got and the perf_counter() time its first data arrived.
+        """
+        import requests
+        results = queue.Queue()
+        attempts = []
+        tried = []
+        winner = None
+        last_error = None
+        hedge_at = None
+
+        def launch(backend):
+            attempt = {"backend": backend, "response": None, "stop": False,
+                       "started": time.perf_counter(), "answered": None}   # perf_counter() of the first data
+            attempts.append(attempt)
+            tried.append(backend)
+            # Serialized here rather than by requests, so the size is known
+            payload = json.dumps(self._payload(client, backend, messages, stream, extras or {})).encode("utf-8")
+            attempt["size"] = len(payload)
+            threading.Thread(target=self._run, args=(client, attempt, payload, stream, results),
+                             daemon=True).start()
+
+        first = self.pick(client)
+        if first is None:
+            raise requests.ConnectionError("No backend available")
+        launch(first)
+        if self.hedge_after > 0:
+            hedge_at = time.monotonic() + self.hedge_after
+
+        try:
+            while True:
+                wait = 0.1      # how often cancel is checked
+                if winner is None and hedge_at is not None:
+                    wait = min(wait, max(hedge_at - time.monotonic(), 0.001))
+                try:
+                    attempt, item = results.get(timeout=wait)
+                except queue.Empty:
+                    if cancel is not None and cancel.is_set():
+                        return
+                    if winner is None and hedge_at is not None and time.monotonic() >= hedge_at:
+                        hedge_at = None
+                        second = self.pick(client, exclude=tried)
+                        if second is not None:
+                            with self._lock:
+                                self.hedges += 1
+                            launch(second)
+                    continue
+
+                if winner is not None and attempt is not winner:
+                    continue        # the hedge that lost, still winding down
+                if attempt.get("failed"):
+                    continue        # end marker of a request that already failed
+                if isinstance(item, Exception):
+                    if winner is not None:
+                        raise item  # failed part way through the reply: too late to switch
+                    attempt["failed"] = True
+                    last_error = item
+                    if any(not a.get("failed") for a in attempts):
+                        continue    # a hedge is still going
+                    following = self.pick(client, exclude=tried)
+                    if following is None:
+                        raise last_error
+                    reason = attempt["backend"].last_error or type(last_error).__name__
+                    Logger.warn(f"{attempt['backend'].url} failed ({reason}); trying {following.url}")
+                    launch(following)
+                    continue
+                if item is None:
+                    return          # end of the reply (or an empty one)
+
+                if winner is None:
+                    winner = attempt
+                    for other in attempts:
+                        if other is not attempt:
+                            if other["answered"] is None:
+                                # Lost the race without a word: at least this slow
+                                with self._lock:
+                                    other["backend"].observe(time.perf_counter() - other["started"])
+                            self._abandon(other)
+                    if len(attempts) > 1:
+                        with self._lock:
+                            attempt["backend"].hedges_won += 1
+                    if info is not None:
+                        info.update(backend=attempt["backend"].url, payload_bytes=attempt["size"],
+                                    first_byte=attempt["answered"])
+                yield item
+        finally:
+            for attempt in attempts:
+                self._abandon(attempt)
+
+    def _run(self, client, attempt, payload, stream, results):
+        # One request to one backend, on its own thread; everything it reads goes to results
+        import requests
+        backend = attempt["backend"]
+        with self._lock:
+            backend.in_flight += 1
+            backend.requests += 1
+        try:
+            with WarmupManager.session.post(backend.endpoints["chat"], headers=self._headers(client),
+                                            data=payload, timeout=client.timeout,
+                                            stream=True) as response:
+                attempt["response"] = response
+                if response.status_code >= 500:
+                    self._mark_down(backend, f"HTTP {response.status_code}")
+                response.raise_for_status()
+                # chunk_size=None hands lines over as soon as they arrive instead of buffering
+                chunks = response.iter_lines(chunk_size=None) if stream else [response.content]
+                for line in chunks:
+                    if attempt["stop"]:
+                        break
+                    if attempt["answered"] is None:
+                        attempt["answered"] = time.perf_counter()
+                        with self._lock:
+                            backend.observe(attempt["answered"] - attempt["started"])
+                    results.put((attempt, line))
+        except (requests.Timeout, requests.ConnectionError) as e:
+            if not attempt["stop"]:
+                self._mark_down(backend, "no answer" if isinstance(e, requests.Timeout) else "connection failed")
+                results.put((attempt, e))
+        except (requests.RequestException, OSError, AttributeError) as e:
+            # AttributeError: the response was closed under us by a winning hedge
+            if not attempt["stop"]:
+                with self._lock:
+                    backend.failures += 1
+                results.put((attempt, e))
+        finally:
+            with self._lock:
+                backend.in_flight -= 1
+            results.put((attempt, None))
+
+    def _mark_down(self, backend, error):
+        with self._lock:
+            backend.healthy = False
+            backend.failures += 1
+            backend.last_error = error
+        self._wake.set()    # probe again soon rather than in health_interval
+
+    def _abandon(self, attempt):
+        # Closing a response blocks until its reader's next read returns; don't wait for that
+        if attempt["stop"]:
+            return
+        attempt["stop"] = True
+        threading.Thread(target=self._close, args=(attempt,), daemon=True).start()
+
+    def _close(self, attempt):
+        import requests
+        response = attempt["response"]
+        if response is not None:
+            try:
+                response.close()
+            except (requests.RequestException, OSError, AttributeError):
+                pass
+
+    # ----------------------
+    # /backends
+    # ----------------------
+    def show(self, llm):
+        current = self._pool(llm.client)
+        hedging = f"hedge after {self.hedge_after:g}s, {self.hedges} hedged" if self.hedge_after > 0 else "no hedging"
+        lines = f"\n{ChatColors.highlight}Backends ({hedging}):{Colors.reset}{ChatColors.system}"
+        lines += f"\n\t{'URL':<32} {'API':<9} {'state':<8} {'weight':>6} {'latency':>8} {'busy':>4} {'reqs':>5} {'fails':>5} {'hedges':>6}"
+        with self._lock:
+            for b in current:
+                state = {True: "up", False: "down", None: "probing"}[b.healthy]
+                latency = f"{b.latency:.2f}s" if b.latency is not None else "-"
+                lines += (f"\n\t{b.url:<32} {b.api_type or '?':<9} {state:<8} {b.weight:>6g} {latency:>8}"
+                          f" {b.in_flight:>4} {b.requests:>5} {b.failures:>5} {b.hedges_won:>6}")
+                if not b.healthy and b.last_error:
+                    lines += f"\n\t    last error: {b.last_error}"
+        Logger.log(f"{lines}{Colors.reset}\n")
+
+BackendManager = BackendManager()
@@ -0,0 +1,238 @@
+# batchmanager.py
+# 10/18/2026 - Voltur
+#
+# --batch: run prompts from a file (or stdin) without the REPL. Every prompt is its own
+# one-turn conversation; several are in flight at once and results are written as JSONL.
+#
+# Input is plain text (one prompt per line) or JSONL objects:
+#   {"id": "q1", "prompt": "...", "system_prompt": "...", "persona": "Gemma3"}
+# Only "prompt" is required. Items without an id are numbered by position.
+#
+
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from voltlogger import Logger
+from chatcolors import Colors
+from backendmanager import BackendManager
+from warmupmanager import WarmupManager
+
+
+def read_items(stream):
+    """
+    Yield {"id", "prompt", "system_prompt", "persona"} for every non-blank input
+    line. A line that is a JSON object with a "prompt" is an item; anything else is
+    a plain-text prompt.
+    """
+    position = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        position += 1
+        item = None
+        if line.startswith("{"):
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = None
+        if not isinstance(item, dict) or not isinstance(item.get("prompt"), str):
+            item = {"prompt": line}
+        yield {
+            "id": str(item["id"]) if item.get("id") is not None else str(position),
+            "prompt": item["prompt"],
+            "system_prompt": item.get("system_prompt"),
+            "persona": item.get("persona"),
+        }
+
+
+def completed_ids(path):
+    # ids that already have a successful result in path, for resuming a crashed run
+    done = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue    # a line torn by the crash
+                if isinstance(result, dict) and result.get("error") is None and "id" in result:
+                    done.add(str(result["id"]))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+class BatchManager:
+    def __init__(self):
+        self.concurrency = 4
+        self.order = "input"        # input | completion
+        self._cancel = threading.Event()
+        self._clients = {}          # persona -> LLMClient copy
+        self._lock = threading.Lock()
+
+    def configure(self, concurrency=None, order=None):
+        if concurrency is not None:
+            self.concurrency = max(int(concurrency), 1)
+        if order is not None:
+            if order not in ("input", "completion"):
+                raise ValueError(f"batch order must be 'input' or 'completion', not {order!r}")
+            self.order = order
+
+    def _client(self, client, persona):
+        # Per-persona copies of the connected client; they share its server and settings
+        if not persona or persona == client.model:
+            return client
+        with self._lock:
+            if persona not in self._clients:
+                other = copy.copy(client)
+                other.model = persona
+                self._clients[persona] = other
+            return self._clients[persona]
+
+    # ----------------------
+    # One item
+    # ----------------------
+    def _send(self, llm, default_system, item):
+        started = time.perf_counter()
+        client = self._client(llm.client, item["persona"])
+        messages = []
+        system = item["system_prompt"] if item["system_prompt"] is not None else default_system
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": item["prompt"]})
+
+        result = {"id": item["id"], "persona": client.model, "prompt": item["prompt"],
+                  "response": None, "error": None, "tokens": None, "elapsed": None}
+        try:
+            body = b"".join(BackendManager.stream(client, messages, stream=False,
+                                                  extras=WarmupManager.payload_extras(),
+                                                  cancel=self._cancel))
+            if self._cancel.is_set():
+                result["error"] = "cancelled"
+            else:
+                reply = json.loads(body)
+                result["response"] = client.extract_content(reply)
+                result["tokens"] = reply.get("eval_count") or (reply.get("usage") or {}).get("completion_tokens")
+                if result["response"] is None:
+                    result["error"] = "empty reply"
+        except Exception as e:      # one bad item mustn't stop the batch
+            result["error"] = str(e) or type(e).__name__
+        result["elapsed"] = round(time.perf_counter() - started, 3)
+        return result
+
+    # ----------------------
+    # The whole batch
+    # ----------------------
+    def run(self, llm, source, out_path=None, default_system=None):
+        """
+        Run every item from source (a path, or "-" for stdin) and write one JSON
+        result per line to out_path (stdout when None or "-"). Items that already
+        have a result without an error in out_path are skipped. Returns the exit
+        status: 0 if every item succeeded, 1 if any failed, 130 if interrupted,
+        2 if source or out_path can't be opened.
+        """
+        to_stdout = out_path in (None, "-")
+        if to_stdout:
+            # stdout carries the results; keep stray log lines out of them
+            Logger.screen_output_enabled = False
+
+        infile = out = None
+        try:
+            skip = set() if to_stdout else completed_ids(out_path)
+            infile = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+            out = sys.stdout if to_stdout else open(out_path, "a", encoding="utf-8")
+            if not to_stdout and out.tell() > 0:
+                with open(out_path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        out.write("\n")     # finish the line a crash left torn
+        except OSError as e:
+            # stderr, like the progress line: stdout may be carrying results
+            sys.stderr.write(f"{Colors.fg.red}Batch: can't open {e.filename or source}: "
+                             f"{e.strerror or e}{Colors.reset}\n")
+            for f in (infile, out):
+                if f is not None and f not in (sys.stdin, sys.stdout):
+                    f.close()
+            return 2
+
+        counts = {"done": 0, "failed": 0, "skipped": 0}
+        started = time.perf_counter()
+        pending = {}        # future -> sequence number
+        finished = {}       # sequence number -> result, waiting for its turn (order: input)
+        next_seq = 0
+
+        def write(result):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            counts["done"] += 1
+            if result["error"] is not None:
+                counts["failed"] += 1
+
+        def collect(done_futures):
+            nonlocal next_seq
+            for future in done_futures:
+                seq = pending.pop(future)
+                if self.order == "completion":
+                    write(future.result())
+                else:
+                    finished[seq] = future.result()
+            while next_seq in finished:
+                result = finished.pop(next_seq)
+                if result is not None:
+                    write(result)
+                next_seq += 1
+            self._progress(counts, started)
+
+        status = 0
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="volt-batch")
+        try:
+            for seq, item in enumerate(read_items(infile)):
+                if item["id"] in skip:
+                    counts["skipped"] += 1
+                    finished[seq] = None    # keeps input order moving past it
+                    continue
+                # Keep a bounded window in flight, so huge inputs don't all sit in memory
+                while len(pending) >= self.concurrency * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending[pool.submit(self._send, llm, default_system, item)] = seq
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            collect([])
+        except KeyboardInterrupt:
+            # What's written stays written; run again with the same --batch-out to resume
+            self._cancel.set()
+            status = 130
+        finally:
+            pool.shutdown(wait=status != 130, cancel_futures=True)
+            if infile is not sys.stdin:
+                infile.close()
+            if out is not sys.stdout:
+                out.close()
+
+        elapsed = time.perf_counter() - started
+        rate = counts["done"] / elapsed if elapsed > 0 else 0.0
+        sys.stderr.write(f"\nBatch {'interrupted' if status else 'done'}: {counts['done']} run "
+                         f"({counts['failed']} failed), {counts['skipped']} already done, "
+                         f"{elapsed:.1f}s, {rate:.1f} prompts/s\n")
+        if status == 0 and counts["failed"]:
+            status = 1
+        return status
+
+    def _progress(self, counts, started):
+        if not sys.stderr.isatty():
+            return
+        elapsed = time.perf_counter() - started
+        rate = counts["done"] / elapsed if elapsed > 0 else 0.0
+        sys.stderr.write(f"\r{counts['done']} done, {counts['failed']} failed, "
+                         f"{counts['skipped']} skipped ({rate:.1f}/s)   ")
+        sys.stderr.flush()
+
+BatchManager = BatchManager()
@@ -0,0 +1,175 @@
+# fakeserver.py
+# 10/18/2026 - Voltur
+#
+# A stand-in LLM server for benchmarks: speaks enough of the Ollama or Open WebUI API for
+# volt-chat (model list, chat with and without streaming, model preload) and replies with
+# a fixed latency before the first token and a fixed token rate after it.
+#
+#   python benchmarks/fakeserver.py --port 18080 --api ollama --latency 0.05 --tokens-per-sec 200
+#
+
+import argparse
+import json
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+REPLY_WORDS = ("The quick brown fox jumps over the lazy dog while the server pretends "
+               "to think very hard about your question.").split()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "volt-fake/1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; don't let Nagle hold the second one back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _json(self, obj, code=200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        config = self.server.config
+        if config["api"] == "ollama" and self.path == "/api/tags":
+            self._json({"models": [{"name": config["model"], "model": config["model"], "size": 4 << 30,
+                                    "details": {"parameter_size": "4B", "quantization_level": "Q4_K_M"}}]})
+        elif config["api"] == "ollama" and self.path == "/api/ps":
+            self._json({"models": [{"name": config["model"]}]})
+        elif config["api"] == "openwebui" and self.path == "/api/models":
+            self._json({"data": [{"id": config["model"], "name": config["model"]}]})
+        else:
+            self._json({"detail": "Not Found"}, 404)
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._json({"error": "bad json"}, 400)
+        with self.server.lock:
+            self.server.requests += 1
+
+        ollama_chat = config["api"] == "ollama" and self.path == "/api/chat"
+        webui_chat = config["api"] == "openwebui" and self.path == "/api/chat/completions"
+        if config["api"] == "ollama" and self.path == "/api/generate":
+            return self._json({"model": body.get("model"), "response": "", "done": True})
+        if not (ollama_chat or webui_chat):
+            return self._json({"detail": "Not Found"}, 404)
+
+        words = REPLY_WORDS[:config["tokens"]]
+        pieces = [w if i == 0 else " " + w for i, w in enumerate(words)]
+        time.sleep(config["latency"])
+        per_token = 1.0 / config["tokens_per_sec"] if config["tokens_per_sec"] > 0 else 0.0
+
+        if not body.get("stream"):
+            time.sleep(per_token * len(pieces))
+            text = "".join(pieces)
+            if ollama_chat:
+                return self._json({"model": body.get("model"), "message": {"role": "assistant", "content": text},
+                                   "done": True, "eval_count": len(pieces),
+                                   "eval_duration": int(per_token * len(pieces) * 1e9)})
+            return self._json({"choices": [{"message": {"role": "assistant", "content": text}}],
+                               "usage": {"completion_tokens": len(pieces)}})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson" if ollama_chat else "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(per_token)
+                if ollama_chat:
+                    event = {"message": {"role": "assistant", "content": piece}, "done": False}
+                    self._chunk(json.dumps(event).encode("utf-8") + b"\n")
+                else:
+                    event = {"choices": [{"delta": {"content": piece}}]}
+                    self._chunk(b"data: " + json.dumps(event).encode("utf-8") + b"\n\n")
+            if ollama_chat:
+                final = {"message": {"role": "assistant", "content": ""}, "done": True,
+                         "eval_count": len(pieces), "eval_duration": int(per_token * len(pieces) * 1e9)}
+                self._chunk(json.dumps(final).encode("utf-8") + b"\n")
+            else:
+                self._chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass    # the client stopped generation
+
+
+class FakeServer:
+    """
+    A fake LLM server on a background thread:
+
+        with FakeServer(latency=0.05, tokens_per_sec=200) as server:
+            ... server.url ...
+    """
+    def __init__(self, api="ollama", latency=0.0, tokens_per_sec=0, tokens=20, model="Gemma3",
+                 host="127.0.0.1", port=0):
+        if api not in ("ollama", "openwebui"):
+            raise ValueError(f"api must be 'ollama' or 'openwebui', not {api!r}")
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.config = {"api": api, "latency": latency, "tokens_per_sec": tokens_per_sec,
+                               "tokens": max(1, min(tokens, len(REPLY_WORDS))), "model": model}
+        self._server.lock = threading.Lock()
+        self._server.requests = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Ollama / Open WebUI server for benchmarks")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--api", choices=("ollama", "openwebui"), default="ollama")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=200, help="0 = as fast as possible")
+    parser.add_argument("--tokens", type=int, default=20, help="tokens per reply")
+    parser.add_argument("--model", default="Gemma3")
+    args = parser.parse_args()
+    server = FakeServer(api=args.api, latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+                        tokens=args.tokens, model=args.model, port=args.port)
+    print(f"Fake {args.api} server on {server.url} (Ctrl-C to stop)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,317 @@
+# run.py
+# 10/18/2026 - Voltur
+#
+# End-to-end benchmarks against a local fake LLM server (benchmarks/fakeserver.py).
+#
+#   python benchmarks/run.py                         # everything, results to benchmark-results.json
+#   python benchmarks/run.py --only parser,pipeline --quick
+#   python benchmarks/run.py --out new.json --compare old.json
+#
+# Suites:
+#   repl         chat turns through send_turn (what the REPL's worker runs), slash commands
+#                through CommandRouter.handle, and whole piped sessions through run_chat
+#   parser       raw_parser.parse_raw_command on small and huge command lines
+#   pipeline     ExecutionManager._run_pipeline on multi-stage pipes with large output
+#   transcripts  TranscriptManager save/load against session length (json and voltz)
+#
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fakeserver import FakeServer     # noqa: E402  (benchmarks/ is on sys.path as the script dir)
+
+SUITES = ("repl", "parser", "pipeline", "transcripts")
+
+
+def timed(fn, runs, warmup=1):
+    """
+    Call fn() warmup + runs times; timing stats (ms) over the measured runs.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "runs": runs,
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "min_ms": round(samples[0], 3),
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    # The code under test prints; keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def load_volt_chat():
+    # volt-chat.py isn't importable by name (the dash)
+    spec = importlib.util.spec_from_file_location("volt_chat", os.path.join(ROOT, "volt-chat.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_opts(server, workdir, *extra):
+    # Options resolved exactly as volt-chat does, with an empty config so the
+    # user's own volt-config can't skew the numbers
+    from options import resolve_options
+    config = os.path.join(workdir, "bench-config.json")
+    with open(config, "w", encoding="utf-8") as f:
+        f.write("{}")
+    argv = sys.argv
+    sys.argv = ["volt-chat.py", f"--base-url={server.url}", f"--config={config}",
+                f"--base-dir={workdir}", "--no-warmup", *extra]
+    try:
+        return resolve_options()
+    finally:
+        sys.argv = argv
+
+
+# ----------------------
+# Suites
+# ----------------------
+def suite_repl(args, workdir):
+    from voltllmclient import LLMConversation
+    from backendmanager import BackendManager
+    results = {}
+    with FakeServer(api=args.api, latency=args.latency, tokens_per_sec=args.tokens_per_sec, tokens=args.tokens) as server:
+        volt_chat = load_volt_chat()
+        turns = 10 if args.quick else 40
+        for mode, extra in (("stream", ()), ("blocking", ("--no-stream",))):
+            opts = bench_opts(server, workdir, *extra)
+            llm = LLMConversation(model=opts.persona, system_prompt=opts.system_prompt, base_url=opts.base_url)
+            BackendManager.configure(llm.client)
+
+            def turn():
+                volt_chat.send_turn(llm, opts, "How fast is this?")
+                del llm.messages[1:]    # every turn the same size
+
+            with quiet():
+                results[f"chat_turn_{mode}"] = timed(turn, turns)
+
+        with quiet():
+            router = volt_chat.CommandRouter(llm=llm, opts=opts)
+            for command in ("/help", "/context", "/cache", "/backends"):
+                results[f"command {command}"] = timed(lambda: router.handle(command), turns * 5)
+
+        # Whole sessions: piped stdin through run_chat in a fresh process
+        script = os.path.join(ROOT, "volt-chat.py")
+        config = os.path.join(workdir, "bench-config.json")
+        lines = 5 if args.quick else 20
+
+        def session(n):
+            stdin = "".join(f"message {i}\n" for i in range(n)) + "/exit\n"
+            subprocess.run([sys.executable, script, f"--base-url={server.url}", f"--config={config}",
+                            f"--base-dir={workdir}", "--no-warmup"], input=stdin.encode(),
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=workdir, check=True)
+
+        startup = timed(lambda: session(0), 3 if args.quick else 5)
+        full = timed(lambda: session(lines), 3 if args.quick else 5)
+        results["session_startup_to_exit"] = startup
+        results["session_per_turn_ms"] = round((full["p50_ms"] - startup["p50_ms"]) / lines, 3)
+        results["server"] = {"api": args.api, "latency_s": args.latency, "tokens_per_sec": args.tokens_per_sec,
+                             "tokens": args.tokens, "requests": server.requests}
+    return results
+
+
+def suite_parser(args, workdir):
+    from raw_parser import parse_raw_command, parse_ast, _compile
+    results = {}
+    cases = {
+        "small": "ls -la | grep py > out.txt && echo done || echo failed",
+        "medium": " ; ".join(f"echo {i} | tr a-z A-Z >> log{i}.txt" for i in range(50)),
+        "huge_args": "echo " + " ".join(f"'arg {i}' \"quoted $i\" plain{i}" for i in range(5000)),
+        "huge_pipeline": " | ".join(f"grep -v pattern{i}" for i in range(2000)),
+        "parallel": "parallel -j 8 --combine=all (" + "; ".join(f"pytest tests/t{i}.py" for i in range(200)) + ")",
+    }
+    runs = 20 if args.quick else 100
+    for name, line in cases.items():
+        def cold():
+            parse_ast.cache_clear()
+            _compile.cache_clear()
+            parse_raw_command(line)
+        stats = timed(cold, runs if len(line) < 10000 else max(runs // 10, 3))
+        stats["chars"] = len(line)
+        stats["mb_per_s"] = round(len(line) / (stats["p50_ms"] / 1000) / 1e6, 3) if stats["p50_ms"] else None
+        results[f"{name} (uncached)"] = stats
+        results[f"{name} (cached)"] = timed(lambda: parse_raw_command(line), runs)
+    return results
+
+
+def suite_pipeline(args, workdir):
+    from ExecutionManager import ExecutionManager
+    results = {}
+    size_mb = 16 if args.quick else 128
+    produce = [sys.executable, "-c",
+               "import sys\nchunk = b'x' * 65535 + b'\\n'\n"
+               f"for _ in range({size_mb * 16}): sys.stdout.buffer.write(chunk)"]
+    # cat where there is one, so stages cost what a real shell tool does
+    passthrough = ["cat"] if shutil.which("cat") else [
+        sys.executable, "-c", "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, sys.stdout.buffer)"]
+
+    with open(os.devnull, "wb") as sink:
+        manager = ExecutionManager(stdout=sink)
+        manager.cwd = workdir
+        for stages in (1, 2, 4, 8):
+            pipeline = [produce] + [passthrough] * (stages - 1)
+            stats = timed(lambda: manager._run_pipeline(pipeline), 2 if args.quick else 5)
+            stats["mb"] = size_mb
+            stats["mb_per_s"] = round(size_mb / (stats["p50_ms"] / 1000), 1)
+            results[f"{stages} stage(s)"] = stats
+
+        # Many short pipelines: process spawn overhead dominates
+        short = [[sys.executable, "-c", "print('hi')"], passthrough]
+        results["short 2-stage pipeline"] = timed(lambda: manager._run_pipeline(short), 5 if args.quick else 20)
+        # The same with a volt-shell builtin as the first stage: one spawn instead of two
+        builtin = [["echo", "hi"], passthrough]
+        results["builtin 2-stage pipeline"] = timed(lambda: manager._run_pipeline(builtin), 5 if args.quick else 20)
+    return results
+
+
+def suite_transcripts(args, workdir):
+    import compacttranscript
+    from transcriptmanager import TranscriptManager
+    results = {}
+    lengths = (100, 1000) if args.quick else (100, 1000, 10000)
+    base_dir = os.path.join(workdir, "transcripts")
+    os.makedirs(base_dir, exist_ok=True)
+    TranscriptManager.base_dir = base_dir
+
+    class Conversation:
+        # What TranscriptManager.save needs from an LLMConversation
+        def __init__(self, messages):
+            self.messages = messages
+
+        def save_transcript(self, path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.messages, f, indent=2)
+
+    for length in lengths:
+        messages = [{"role": "system", "content": "You are an AI assistant."}]
+        for i in range(length - 1):
+            role = "user" if i % 2 == 0 else "assistant"
+            messages.append({"role": role, "content": f"Message {i}: " + "lorem ipsum dolor sit amet " * 20})
+        llm = Conversation(messages)
+        runs = 3 if length >= 10000 else 10
+
+        for fmt, ext in (("json", ".json"), ("voltz", compacttranscript.EXTENSION)):
+            TranscriptManager.configure(format=fmt, load_tail="all")
+            persona = f"bench{length}{fmt}"
+            with quiet():
+                save = timed(lambda: TranscriptManager.save(llm, persona), runs)
+            path = next(os.path.join(base_dir, name) for name in os.listdir(base_dir)
+                        if name.endswith(f"_{persona}{ext}"))
+            save["bytes"] = os.path.getsize(path)
+            results[f"save {fmt} {length} msgs"] = save
+            results[f"load {fmt} {length} msgs"] = timed(lambda: TranscriptManager.read_transcript(path), runs)
+            TranscriptManager.configure(load_tail="50")
+            results[f"load tail 50 {fmt} {length} msgs"] = timed(lambda: TranscriptManager.read_tail(path), runs)
+    return results
+
+
+# ----------------------
+# Reporting
+# ----------------------
+def describe_run():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def headline(stats):
+    # The one number worth comparing for a result
+    if isinstance(stats, dict):
+        for key in ("p50_ms", "mb_per_s"):
+            if key in stats:
+                return key, stats[key]
+        return None, None
+    return "value", stats
+
+
+def print_report(report, previous=None):
+    for suite, results in report["results"].items():
+        print(f"\n{suite}")
+        for name, stats in results.items():
+            key, value = headline(stats)
+            if key is None:
+                continue
+            line = f"  {name:<36} {value:>10} {key}"
+            if isinstance(stats, dict) and "mb_per_s" in stats and key != "mb_per_s":
+                line += f"  ({stats['mb_per_s']} MB/s)"
+            old = ((previous or {}).get("results", {}).get(suite, {}) or {}).get(name)
+            _, old_value = headline(old) if old is not None else (None, None)
+            if isinstance(old_value, (int, float)) and isinstance(value, (int, float)) and old_value:
+                line += f"  {(value - old_value) / old_value:+.1%} vs {old_value}"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="volt-chat benchmarks")
+    parser.add_argument("--only", help=f"comma separated suites: {','.join(SUITES)}")
+    parser.add_argument("--out", default="benchmark-results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", metavar="JSON", help="an earlier results file to compare against")
+    parser.add_argument("--quick", action="store_true", help="fewer runs and smaller inputs")
+    parser.add_argument("--api", choices=("ollama", "openwebui"), default="ollama", help="fake server API")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake server: seconds to the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=500, help="fake server: token rate (0 = max)")
+    parser.add_argument("--tokens", type=int, default=20, help="fake server: tokens per reply")
+    args = parser.parse_args()
+
+    suites = SUITES if not args.only else [s.strip() for s in args.only.split(",")]
+    unknown = [s for s in suites if s not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+
+    report = {"run": describe_run(), "settings": vars(args), "results": {}}
+    with tempfile.TemporaryDirectory(prefix="volt-bench-") as workdir:
+        for suite in suites:
+            started = time.perf_counter()
+            print(f"running {suite}...", file=sys.stderr)
+            report["results"][suite] = globals()[f"suite_{suite}"](args, workdir)
+            print(f"  {suite} took {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_report(report, previous)
+    print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
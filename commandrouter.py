@@ -4,46 +4,192 @@
 # Routes varous slash commands to the proper manager. 
 # 
 
-import subprocess
+import importlib
 import sys
 import os
 import json
+import threading
+import time
 
 from voltlogger import Logger
 from chatcolors import Colors, ChatColors
-from transcriptmanager import TranscriptManager
-from modelmanager import ModelManager
-from historymanager import HistoryManager
-from multilinemanager import MultiLineManager
-from ExecutionManager import ExecutionManager
-from raw_parser import parse_raw_command
+from promptmanager import PromptManager
+from contextmanager import ContextManager
+from responsecache import ResponseCache
+from backendmanager import BackendManager
+from metricsmanager import MetricsManager
+from profilemanager import ProfileManager
+from execfeedmanager import ExecFeedManager
+
+
+class LazySingleton:
+    """
+    Stands in for a manager singleton until it is first used, so startup only pays
+    for the managers a session actually touches. Functions registered with
+    on_load(fn) run once with the real singleton, right after its module is imported.
+    """
+    def __init__(self, module, name):
+        self._module = module
+        self._name = name
+        self._target = None
+        self._setup = []
+        self._lock = threading.RLock()  # background loading races the first command
+
+    def on_load(self, fn):
+        with self._lock:
+            if self._target is not None:
+                fn(self._target)
+            else:
+                self._setup.append(fn)
+
+    def is_loaded(self):
+        # Imported by anyone (ExecutionManager imports jobmanager itself)
+        return self._module in sys.modules
+
+    def _load(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    target = getattr(importlib.import_module(self._module), self._name)
+                    for fn in self._setup:
+                        fn(target)
+                    self._setup = []
+                    self._target = target
+        return self._target
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        if attr.startswith("_"):
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self._load(), attr, value)
+
+
+TranscriptManager = LazySingleton("transcriptmanager", "TranscriptManager")
+ModelManager = LazySingleton("modelmanager", "ModelManager")
+HistoryManager = LazySingleton("historymanager", "HistoryManager")
+MultiLineManager = LazySingleton("multilinemanager", "MultiLineManager")
+JobManager = LazySingleton("jobmanager", "JobManager")
+
 
 class CommandRouter:
     def __init__(self, llm, opts):
         self.llm = llm
+        self.opts = opts
         self.persona = opts.persona
-        if opts.base_dir:
-            TranscriptManager.base_dir = opts.base_dir
         self.shell_exec_privs = getattr(opts, "shell_exec_privs", 0)
         self.shell_mode = getattr(opts, "shell_mode", 0)
+        ContextManager.configure(budget=getattr(opts, "context_tokens", None),
+                                 summarize=getattr(opts, "context_summarize", None))
+        ResponseCache.configure(enabled=getattr(opts, "cache", None),
+                                path=os.path.join(opts.base_dir or os.path.expanduser('~'), ".volt-cache.sqlite"),
+                                ttl=getattr(opts, "cache_ttl", None),
+                                max_mb=getattr(opts, "cache_max_mb", None))
+        export = getattr(opts, "metrics_export", None) or "none"
+        MetricsManager.configure(export=export,
+                                 path=getattr(opts, "metrics_path", None) or os.path.join(
+                                     opts.base_dir or os.path.expanduser('~'), "volt-metrics",
+                                     "volt-metrics.jsonl" if export == "jsonl" else "volt-metrics.prom"))
+        ProfileManager.configure(enabled=getattr(opts, "profile", None),
+                                 base_dir=opts.base_dir or os.path.expanduser('~'))
+        ExecFeedManager.configure(enabled=getattr(opts, "exec_feed", None),
+                                  max_bytes=getattr(opts, "exec_feed_max_bytes", None),
+                                  max_tokens=getattr(opts, "exec_feed_max_tokens", None))
         self.last_command_error = 0
-        self.execution_manager = ExecutionManager()
+        self.stop = threading.Event()   # set by Ctrl-C while a command is running
+        self._execution_manager = None
+        self._shell = None
+        self.cwd = os.getcwd()  # where /exec runs; kept here, never by chdir'ing the process
+
+        # The rest is set up when (and if) each manager is first used
+        TranscriptManager.on_load(self._setup_transcripts)
+        HistoryManager.on_load(lambda history: history.load_past_in_background(TranscriptManager.base_dir))
+        ModelManager.on_load(self._setup_models)
+        JobManager.on_load(lambda jobs: jobs.configure(max_workers=getattr(opts, "max_jobs", None)))
         self.set_working_directory(opts.base_dir)
 
+    def _setup_transcripts(self, transcripts):
+        opts = self.opts
+        if opts.base_dir:
+            transcripts.base_dir = opts.base_dir
+        transcripts.configure_autosave(enabled=getattr(opts, "autosave", None),
+                                       fsync=getattr(opts, "autosave_fsync", None),
+                                       max_mb=getattr(opts, "autosave_max_mb", None))
+        transcripts.configure(format=getattr(opts, "transcript_format", None),
+                              load_tail=getattr(opts, "load_tail", None))
+        transcripts.reconcile_index()
+
+    def _setup_models(self, models):
+        opts = self.opts
+        models.configure(endpoints=getattr(opts, "model_endpoints", None),
+                         ttl=getattr(opts, "models_ttl", None),
+                         timeout=getattr(opts, "models_timeout", None))
+        models.refresh_in_background(self.llm)
+        models.install_completion()
+
+    def load_in_background(self):
+        """
+        Load the managers that keep background state (transcript index, past prompts
+        for Ctrl-R, the model catalog) once the prompt is up, instead of before it.
+        """
+        def load():
+            for manager in (TranscriptManager, HistoryManager, ModelManager):
+                manager._load()
+        threading.Thread(target=load, daemon=True).start()
+
+    @property
+    def execution_manager(self):
+        # volt-shell (and job control) only gets imported once someone uses /exec
+        if self._execution_manager is None:
+            from ExecutionManager import ExecutionManager
+            JobManager._load()
+            self._execution_manager = ExecutionManager()
+            self._execution_manager.set_cwd(self.cwd)
+            if getattr(self.opts, "parallel_jobs", 0):
+                self._execution_manager.parallel_limit = int(self.opts.parallel_jobs)
+        return self._execution_manager
+
+    @property
+    def shell(self):
+        # The persistent shell for shell_mode 0, or None to start a shell per command
+        if self._shell is None and getattr(self.opts, "shell_persist", True) and os.name == "posix":
+            # shellcoprocess needs fcntl and select on pipes; elsewhere every /exec starts a shell
+            from shellcoprocess import ShellCoprocess
+            if ShellCoprocess.supported:
+                self._shell = ShellCoprocess(program=getattr(self.opts, "shell_path", None) or "/bin/sh")
+        return self._shell
+
+    def close(self):
+        if self._shell is not None:
+            self._shell.close()
+
     def update_base_dir(self, base_dir):
         TranscriptManager.base_dir = base_dir
+        TranscriptManager.reconcile_index()
+        HistoryManager.load_past_in_background(base_dir)
     
     def set_working_directory(self, path):
         try:
-            os.chdir(path)
-            self.execution_manager.cwd = os.getcwd()
-            Logger.log(f"{ChatColors.system}Changed working directory to: {os.getcwd()}{Colors.reset}")
+            path = os.path.normpath(os.path.join(self.cwd, os.path.expanduser(path)))
+            if not os.path.isdir(path):
+                raise NotADirectoryError(f"No such directory: '{path}'")
+            self.cwd = path
+            if self._execution_manager is not None:
+                self._execution_manager.set_cwd(path)
+            PromptManager.set_cwd(path)
+            Logger.log(f"{ChatColors.system}Changed working directory to: {path}{Colors.reset}")
         except Exception as e:
             Logger.log(f"{Colors.fg.red}Error changing directory: {e}{Colors.reset}")
 
+    def interrupt(self):
+        self.stop.set()
+
     def handle(self, message):
 
         cmd = message.strip().lower()
+        self.stop.clear()
 
         if cmd in {"/quit", "/bye", "/exit"}:
             Logger.log(f"{Colors.reset}{ChatColors.system}\nExiting...{Colors.reset}\n")
@@ -57,16 +203,65 @@ class CommandRouter:
             TranscriptManager.save(llm=self.llm, persona=self.persona)
             return True
 
-        elif cmd == "/load":
-            TranscriptManager.load(llm=self.llm)
+        elif cmd == "/load" or cmd.startswith("/load "):
+            # Filters and search terms keep their case; only the command is lowercased
+            TranscriptManager.load(llm=self.llm, query=message.strip()[len("/load"):].strip() or None)
+            return True
+
+        elif cmd == "/search" or cmd.startswith("/search "):
+            TranscriptManager.search(llm=self.llm, terms=message.strip()[len("/search"):].strip())
             return True
 
         elif cmd == "/models":
             ModelManager.show(llm=self.llm)
             return True
 
-        elif cmd == "/history":
-            result = HistoryManager.get(self.llm)
+        elif cmd.startswith("/model "):
+            # Model names are case sensitive on some servers
+            name = message.strip()[len("/model "):].strip()
+            if ModelManager.switch(llm=self.llm, name=name):
+                self.persona = name
+                self.opts.persona = name
+                if getattr(self.opts, "warmup", False):
+                    # Load the new model before the next message needs it
+                    from warmupmanager import WarmupManager
+                    WarmupManager.start(self.llm)
+            return True
+
+        elif cmd == "/backends":
+            BackendManager.show(llm=self.llm)
+            return True
+
+        elif cmd == "/stats":
+            MetricsManager.show()
+            return True
+
+        elif cmd == "/profile" or cmd.startswith("/profile "):
+            ProfileManager.command(message.strip()[len("/profile"):].strip())
+            return True
+
+        elif cmd == "/feed":
+            ExecFeedManager.show()
+            return True
+
+        elif cmd == "/feed clear":
+            ExecFeedManager.clear()
+            return True
+
+        elif cmd == "/context":
+            ContextManager.show(llm=self.llm)
+            return True
+
+        elif cmd == "/cache":
+            ResponseCache.show()
+            return True
+
+        elif cmd == "/cache clear":
+            ResponseCache.clear()
+            return True
+
+        elif cmd == "/history" or cmd.startswith("/history "):
+            result = HistoryManager.get(self.llm, query=message.strip()[len("/history"):].strip() or None)
             if result:
                 # Return the selected history to the main loop to send to LLM
                 return result
@@ -81,12 +276,20 @@ class CommandRouter:
                 self.set_working_directory(path)
                 return True
 
+        elif cmd == "/jobs" or cmd.split()[0] in {"/wait", "/kill", "/fg"}:
+            if self.shell_exec_privs == 0:
+                self.unknown_command()
+            else:
+                self.job_command(cmd)
+            return True
+
         elif cmd.startswith("/exec "):
             if self.shell_exec_privs == 0:
                 self.unknown_command()
                 return True
             else:
-                self.execute_system_command(cmd[len("/exec "):].strip())
+                # Commands are case sensitive; only "/exec" itself is lowercased
+                self.execute_system_command(message.strip()[len("/exec "):].strip())
                 return True
 
         elif cmd == MultiLineManager.toggle_string:
@@ -103,24 +306,86 @@ class CommandRouter:
         Logger.log(f"\n{ChatColors.system}I don't know that command.{Colors.reset}")
         self._show_help()
 
+    def job_command(self, cmd):
+        parts = cmd.split()
+        name, job_id = parts[0], (parts[1].lstrip("%") if len(parts) > 1 else None)
+        if name == "/jobs":
+            JobManager.show()
+        elif name == "/wait":
+            self.last_command_error = JobManager.wait(job_id, stop=self.stop)
+        elif job_id is None:
+            Logger.log(f"{Colors.fg.red}Usage: {name} <job id>{Colors.reset}")
+        elif name == "/kill":
+            self.last_command_error = JobManager.kill(job_id)
+        else:
+            self.last_command_error = JobManager.fg(job_id, stop=self.stop)
+
     def execute_system_command(self, command: str):
         if self.shell_exec_privs == 0:
             return
         if command:
             Logger.log(f"{ChatColors.system}Executing system command: {command}{Colors.reset}")
 
-            if self.shell_mode == 0:
+            # With exec_feed on, output goes through us (to the terminal and a capture buffer)
+            capture = ExecFeedManager.capture()
+            if self.shell_mode == 0 and self.shell is not None:
+                # One long-lived system shell: variables, functions and cd carry over
+                started = time.perf_counter()
+                self.last_command_error = self.shell.run(
+                    command, cwd=self.cwd, stop=self.stop,
+                    stdout=capture.tee(sys.stdout) if capture else None,
+                    stderr=capture.tee(sys.stderr) if capture else None)
+                MetricsManager.record_exec(command, [{"cmd": command, "spawn": self.shell.last_start,
+                                                      "wall": time.perf_counter() - started,
+                                                      "exit": self.last_command_error}])
+                if self.shell.cwd and self.shell.cwd != self.cwd:
+                    self.set_working_directory(self.shell.cwd)
+            elif self.shell_mode == 0:
                 # Use built-in system shell execution (cmd.exe, bash, etc)
-                self.last_command_error = subprocess.run(command, shell=True).returncode
+                import subprocess
+                pipe = subprocess.PIPE if capture else None
+                started = time.perf_counter()
+                with subprocess.Popen(command, shell=True, cwd=self.cwd, stdout=pipe, stderr=pipe) as proc:
+                    spawned = time.perf_counter()
+                    if capture:
+                        from ExecutionManager import OutputPump
+                        pump = OutputPump()
+                        pump.add(proc.stdout, capture.tee(sys.stdout))
+                        pump.add(proc.stderr, capture.tee(sys.stderr))
+                    self.last_command_error = proc.wait()
+                    if capture:
+                        pump.join()
+                MetricsManager.record_exec(command, [{"cmd": command, "spawn": spawned - started,
+                                                      "wall": time.perf_counter() - started,
+                                                      "exit": self.last_command_error}])
             else:
                 # Use ExecutionManager for advanced, POSIX-like handling
                 # Try JSON first
                 try:
                     tasks = json.loads(command)
                 except json.JSONDecodeError:
-                    tasks = parse_raw_command(command)
+                    try:
+                        from raw_parser import parse_raw_command
+                        tasks = parse_raw_command(command)
+                    except ValueError as e:
+                        Logger.log(f"{Colors.fg.red}volt-shell: {e}{Colors.reset}")
+                        self.last_command_error = 2
+                        return
 
-                self.last_command_error = self.execution_manager.exec_tasks(tasks)
+                execution_manager = self.execution_manager
+                if capture:
+                    execution_manager.stdout = capture.tee(sys.stdout)
+                    execution_manager.stderr = capture.tee(sys.stderr)
+                try:
+                    self.last_command_error = execution_manager.exec_tasks(tasks)
+                except SystemExit as e:
+                    # exit ends this /exec, not the chat
+                    self.last_command_error = e.code if isinstance(e.code, int) else 0
+                finally:
+                    execution_manager.stdout = execution_manager.stderr = None
+                self.cwd = execution_manager.cwd
+                PromptManager.set_cwd(self.cwd)
+            ExecFeedManager.add(command, capture, self.last_command_error)
         else:
             Logger.log(f"{Colors.fg.red}No command provided to execute.{Colors.reset}")
 
@@ -131,15 +396,41 @@ Available Commands:
     /help         Show this help message.
     /quit         Exit the chat.
     /save         Save the current conversation transcript.
-                   Saved as: YYYY-MM-DD_<model>.json
-    /load         Load a transcript from a list of saved files.
-                    You'll be prompted to choose by number.
-    /history      View and optionally resend a recent user message.
-    /models       List available models (if supported by API).
+                   Saved as: YYYY-MM-DD_<model>.json (or .voltz, see transcript_format)
+    /load [text]  Load a transcript from a list of saved files, newest first.
+                    You'll be prompted to choose by number; n/p pages through.
+                    Optional text filters by file name, model or first message.
+    /search <terms>
+                  Full-text search across all saved transcripts, best match first.
+    /history [text]
+                  View and optionally resend a recent user message. With text,
+                    the best matches from this chat and saved transcripts.
+                    Ctrl-R at the prompt searches the same prompts.
+    /models       List available models on every configured server, with size,
+                    quantization and whether they are loaded (cached, see models_ttl).
+    /model <name> Switch to another model. Tab completes the name.
+    /backends     Show the chat backends: health, latency, load, requests and failures.
+    /stats        Show percentiles for recent turns (latency, first byte/token, tokens/sec,
+                    prompt size) and /exec stages (spawn and wall time, exit codes).
+    /feed         Show the captured /exec output (exec_feed) that goes with your next
+                    message. '/feed clear' drops it.
+    /profile [N]  With --profile: the top hot spots and allocation sites of the last N turns
+                    (default 1). '/profile dump [N]' writes .pstats files to <base_dir>/volt-profiles.
+    /context      Show how much of the context token budget is in use.
+    /cache        Show response cache hits and misses. '/cache clear' empties it.
     /cd <path>    Change the current working directory. Helpful for internal shell use.
                     Example: /cd /home/user/projects
     /exec <cmd>   Execute a system command directly.
                     Example: /exec ls -la
+                    volt-shell (shell_mode 1) can fan out with a parallel group:
+                    /exec parallel -j 4 --combine=all (ruff check a; ruff check b)
+                    Its builtins (cd, pwd, echo, export, unset, env, true, false, test,
+                    which, umask) run without starting a process; export sets the environment.
+    /jobs         List volt-shell background jobs (started with a trailing '&').
+    /wait [id]    Wait for a background job, or for all of them.
+    /kill <id>    Stop a background job.
+    /fg <id>      Show a background job's output and follow it until it ends.
+                    Ctrl-C detaches and leaves the job running.
     ///           Enter multiline input mode.
                     Type multiple lines, end with '///' on a new line.
 
@@ -0,0 +1,229 @@
+# compacttranscript.py
+# 10/18/2026 - Voltur
+#
+# Compact .voltz transcripts: messages in zlib-compressed frames plus a footer index,
+# so the newest messages can be read without decompressing the whole file.
+#
+#   "VOLTZ1\n"  frame  frame ...  footer (JSON)  footer length (8 bytes LE)  "VOLTZEND"
+#
+# Each frame is one zlib stream of JSON lines. The footer lists every frame as
+# [offset, length, messages, estimated tokens]. A leading system prompt gets a frame
+# of its own, so tail loads can always include it cheaply.
+#
+
+import json
+import os
+import struct
+import sys
+import zlib
+
+from contextmanager import estimate_tokens
+
+MAGIC = b"VOLTZ1\n"
+TRAILER = struct.Struct("<Q8s")
+TRAILER_MAGIC = b"VOLTZEND"
+EXTENSION = ".voltz"
+
+FRAME_MESSAGES = 64
+FRAME_BYTES = 256 * 1024    # uncompressed
+
+
+class VoltzWriter:
+    """
+    Streams messages into a .voltz file one at a time; only the current frame's
+    compressor state is held in memory. The file appears under its final name on
+    close(), so a crash never leaves a half-written transcript behind.
+    """
+    def __init__(self, path, level=6):
+        self.path = path
+        self.level = level
+        self._tmp = path + ".tmp"
+        self._f = open(self._tmp, "wb")
+        self._f.write(MAGIC)
+        self._frames = []
+        self._total = 0
+        self._system = False
+        self._comp = None
+
+    def add(self, message):
+        if self._comp is None:
+            self._comp = zlib.compressobj(self.level)
+            self._frame = [self._f.tell(), 0, 0, 0]
+            self._raw = 0
+        line = json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+        self._f.write(self._comp.compress(line))
+        self._raw += len(line)
+        self._frame[2] += 1
+        self._frame[3] += estimate_tokens(message)
+
+        first_system = self._total == 0 and message.get("role") == "system"
+        self._total += 1
+        if first_system:
+            self._system = True
+        if first_system or self._frame[2] >= FRAME_MESSAGES or self._raw >= FRAME_BYTES:
+            self._end_frame()
+
+    def _end_frame(self):
+        if self._comp is None:
+            return
+        self._f.write(self._comp.flush())
+        self._frame[1] = self._f.tell() - self._frame[0]
+        self._frames.append(self._frame)
+        self._comp = None
+
+    def close(self):
+        self._end_frame()
+        footer = json.dumps({
+            "version": 1,
+            "messages": self._total,
+            "system": self._system,
+            "frames": self._frames,
+        }).encode("utf-8")
+        self._f.write(footer)
+        self._f.write(TRAILER.pack(len(footer), TRAILER_MAGIC))
+        self._f.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._f.close()
+        os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write(path, messages, level=6):
+    with VoltzWriter(path, level) as writer:
+        for message in messages:
+            writer.add(message)
+
+
+def _footer(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a .voltz transcript")
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    if size < len(MAGIC) + TRAILER.size:
+        raise ValueError("Truncated .voltz transcript")
+    f.seek(size - TRAILER.size)
+    length, magic = TRAILER.unpack(f.read(TRAILER.size))
+    if magic != TRAILER_MAGIC or length > size:
+        raise ValueError("Truncated .voltz transcript")
+    f.seek(size - TRAILER.size - length)
+    return json.loads(f.read(length))
+
+
+def _read_frame(f, frame):
+    offset, length = frame[0], frame[1]
+    f.seek(offset)
+    try:
+        data = zlib.decompress(f.read(length))
+    except zlib.error as e:
+        raise ValueError(f"Damaged .voltz frame at {offset}: {e}")
+    return [json.loads(line) for line in data.splitlines() if line]
+
+
+def info(path):
+    # (message count, frame count) from the footer alone
+    with open(path, "rb") as f:
+        footer = _footer(f)
+    return footer["messages"], len(footer["frames"])
+
+
+def read(path, last=None, budget=None):
+    """
+    Read a .voltz transcript. With last and/or budget (estimated tokens) only the
+    frames needed for the newest messages are decompressed; the system prompt is
+    always kept. Without either, every message is returned.
+    """
+    with open(path, "rb") as f:
+        footer = _footer(f)
+        frames = footer["frames"]
+        head = frames[:1] if footer["system"] else []
+        body = frames[len(head):]
+
+        # Walk back over the footer to find the first frame we need
+        start = len(body)
+        if last is None and budget is None:
+            start = 0
+        else:
+            count = tokens = 0
+            while start > 0:
+                if last is not None and count >= last:
+                    break
+                if budget is not None and tokens >= budget:
+                    break
+                start -= 1
+                count += body[start][2]
+                tokens += body[start][3]
+
+        pinned = _read_frame(f, head[0]) if head else []
+        messages = []
+        for frame in body[start:]:
+            messages.extend(_read_frame(f, frame))
+
+    # Trim to the exact message count / budget inside the first frame read
+    return trim_tail(pinned, messages, last, budget)
+
+
+def trim_tail(pinned, messages, last=None, budget=None):
+    """
+    pinned + the newest messages, at most last of them and (with pinned) at most
+    budget estimated tokens.
+    """
+    if last is not None:
+        messages = messages[-last:] if last > 0 else []
+    if budget is not None:
+        used = sum(estimate_tokens(m) for m in pinned)
+        keep = len(messages)
+        while keep > 0 and used + estimate_tokens(messages[keep - 1]) <= budget:
+            used += estimate_tokens(messages[keep - 1])
+            keep -= 1
+        messages = messages[keep:]
+    return pinned + messages
+
+
+def convert(path, remove=False):
+    """
+    Convert a .json (or .jsonl) transcript to .voltz next to it. Returns the new path.
+    """
+    root, ext = os.path.splitext(path)
+    if ext == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            messages = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            messages = json.load(f)
+    if not isinstance(messages, list):
+        raise ValueError(f"{path} is not a transcript")
+    target = root + EXTENSION
+    write(target, messages)
+    if remove:
+        os.remove(path)
+    return target
+
+
+if __name__ == "__main__":
+    # python compacttranscript.py [--remove] FILE.json [FILE.json ...]
+    args = sys.argv[1:]
+    remove = "--remove" in args
+    paths = [a for a in args if a != "--remove"]
+    if not paths:
+        print("Usage: python compacttranscript.py [--remove] TRANSCRIPT.json [...]")
+        sys.exit(2)
+    status = 0
+    for p in paths:
+        try:
+            before = os.path.getsize(p)
+            target = convert(p, remove=remove)
+            print(f"{p} -> {target} ({os.path.getsize(target) / max(before, 1):.0%} of the original size)")
+        except (OSError, ValueError) as e:
+            print(f"{p}: {e}")
+            status = 1
+    sys.exit(status)
@@ -0,0 +1,71 @@
+# consolereader.py
+# 10/18/2026 - Voltur
+#
+# Reads lines from the terminal on a daemon thread and hands them to an asyncio loop,
+# so the prompt can be answered while a reply is still being generated.
+#
+
+import asyncio
+import threading
+
+try:
+    import readline   # lets us redraw what the user was typing after output lands on top of it
+except ImportError:   # Windows
+    readline = None
+
+
+class ConsoleReader:
+    # Called on the reader thread before every prompt, while no input() is running.
+    # GNU readline isn't thread-safe: its history is only changed from here.
+    _before_prompt = []
+
+    @classmethod
+    def before_prompt(cls, callback):
+        cls._before_prompt.append(callback)
+
+    def __init__(self, loop, prompt):
+        self.loop = loop
+        self.prompt = prompt        # callable returning the prompt string
+        self.lines = asyncio.Queue()
+        self.waiting = False        # True while input() is showing the prompt
+        self._current_prompt = ""
+        self._ready = threading.Event()
+        self._ready.set()
+
+    def start(self):
+        # Daemon, so a pending input() never keeps the process alive on exit
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._ready.wait()
+            self._ready.clear()
+            for callback in list(self._before_prompt):
+                callback()
+            self._current_prompt = self.prompt()
+            self.waiting = True
+            try:
+                line = input(self._current_prompt)
+            except EOFError:
+                line = None
+            finally:
+                self.waiting = False
+            try:
+                self.loop.call_soon_threadsafe(self.lines.put_nowait, line)
+            except RuntimeError:
+                return  # loop already closed
+            if line is None:
+                return
+
+    async def get(self):
+        return await self.lines.get()
+
+    def release(self):
+        # Show the next prompt. Held back while a command may itself read from stdin.
+        self._ready.set()
+
+    def redraw(self):
+        # Output landed on top of the prompt; show it again with whatever was typed so far
+        if self.waiting:
+            typed = readline.get_line_buffer() if readline else ""
+            print(f"{self._current_prompt}{typed}", end="", flush=True)
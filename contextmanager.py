@@ -0,0 +1,186 @@
+# contextmanager.py
+# 10/18/2026 - Voltur
+#
+# Keeps the context sent to the LLM inside a token budget. The system prompt is
+# pinned, the newest turns are kept, and older turns get folded into a running
+# summary by a background thread while the user is typing.
+#
+
+import threading
+
+from voltlogger import Logger
+from chatcolors import Colors
+from chatcolors import ChatColors
+
+SUMMARY_PROMPT = (
+    "You condense chat history. Summarize the conversation below in a few short "
+    "paragraphs. Keep names, decisions, facts, code identifiers and open questions. "
+    "Do not add commentary."
+)
+
+
+def estimate_tokens(message):
+    # Roughly four characters per token, plus a little for the role framing
+    content = message.get("content") or ""
+    if not isinstance(content, str):
+        content = str(content)
+    return len(content) // 4 + 4
+
+
+class ContextManager:
+    def __init__(self, budget=8192, summarize=False):
+        self.budget = budget
+        self.summarize = summarize
+        self.last_prompt_tokens = 0
+        self.last_prompt_messages = 0
+        self._lock = threading.Lock()
+        self._summary = None        # (messages list, summarized up to index, text)
+        self._worker = None
+
+    def configure(self, budget=None, summarize=None):
+        if budget is not None:
+            self.budget = int(budget)
+        if summarize is not None:
+            self.summarize = bool(summarize)
+
+    # ----------------------
+    # Building the prompt
+    # ----------------------
+    def build_prompt(self, llm, user_content):
+        """
+        Return the message list to send for this turn: the pinned system prompt, the
+        summary of evicted turns (if any), as many recent turns as fit, and the new
+        user message.
+        """
+        messages = llm.messages
+        user_message = {"role": "user", "content": user_content}
+        if not self.budget or self.budget <= 0:
+            prompt = messages + [user_message]
+            self._record(prompt)
+            return prompt
+
+        pinned = [messages[0]] if messages else []
+        summary_upto, summary_msg = self._current_summary(messages)
+        if summary_msg:
+            pinned.append(summary_msg)
+
+        reserve = sum(estimate_tokens(m) for m in pinned) + estimate_tokens(user_message)
+        start = max(self._window_start(messages, self.budget - reserve), summary_upto)
+
+        prompt = pinned + messages[start:] + [user_message]
+        self._record(prompt)
+        return prompt
+
+    def _window_start(self, messages, budget):
+        # Walk back from the newest message until the budget is spent
+        start = len(messages)
+        used = 0
+        for i in range(len(messages) - 1, 0, -1):
+            cost = estimate_tokens(messages[i])
+            if used + cost > budget:
+                break
+            used += cost
+            start = i
+        else:
+            return 1
+
+        # Don't open the window halfway through a turn (e.g. on a tool result)
+        while start < len(messages) and messages[start].get("role") != "user":
+            start += 1
+        return start
+
+    def _current_summary(self, messages):
+        summary = self._summary
+        if not summary or summary[0] is not messages or summary[1] > len(messages):
+            # A /load replaced the conversation; the old summary no longer applies
+            return 1, None
+        _, upto, text = summary
+        return upto, {"role": "system", "content": f"Summary of the earlier conversation:\n{text}"}
+
+    def _record(self, prompt):
+        self.last_prompt_tokens = sum(estimate_tokens(m) for m in prompt)
+        self.last_prompt_messages = len(prompt)
+
+    # ----------------------
+    # Background summarization
+    # ----------------------
+    def summarize_in_background(self, llm):
+        """
+        Fold turns that will soon fall out of the window into the summary. Runs in a
+        daemon thread so it overlaps with the user typing the next message.
+        """
+        if not self.summarize or not self.budget or self.budget <= 0:
+            return
+        if self._worker and self._worker.is_alive():
+            return
+
+        messages = llm.messages
+        upto, _ = self._current_summary(messages)
+        # Leave a quarter of the budget free for the next message and the summary itself
+        target = self._window_start(messages, self.budget * 3 // 4)
+        if target - upto < 2:
+            return
+
+        previous = self._summary[2] if self._summary and self._summary[0] is messages else None
+        self._worker = threading.Thread(target=self._summarize,
+                                        args=(llm.client, messages, upto, target, previous),
+                                        daemon=True)
+        self._worker.start()
+
+    def _summarize(self, client, messages, upto, target, previous):
+        lines = []
+        if previous:
+            lines.append(f"Earlier summary:\n{previous}\n")
+        for m in messages[upto:target]:
+            if m.get("content"):
+                lines.append(f"{m.get('role', '?')}: {m['content']}")
+
+        try:
+            text = client.send_conversation([
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": "\n".join(lines)},
+            ])
+        except Exception as e:
+            Logger.debug(f"Context summary failed: {e}")
+            return
+        if not text:
+            return
+
+        # Keep the summary from eating the budget it is meant to save
+        limit = self.budget // 8 * 4
+        if len(text) > limit:
+            text = text[:limit]
+        with self._lock:
+            self._summary = (messages, target, text)
+
+    # ----------------------
+    # /context
+    # ----------------------
+    def show(self, llm):
+        if not self.budget or self.budget <= 0:
+            budget_line = "unlimited (context_tokens: 0)"
+        else:
+            pct = 100 * self.last_prompt_tokens / self.budget
+            budget_line = f"~{self.last_prompt_tokens} / {self.budget} tokens ({pct:.0f}%)"
+
+        total = sum(estimate_tokens(m) for m in llm.messages)
+        upto, summary_msg = self._current_summary(llm.messages)
+        if summary_msg:
+            summary_line = f"{upto - 1} older messages summarized (~{estimate_tokens(summary_msg)} tokens)"
+        elif not self.summarize:
+            summary_line = "off (context_summarize: false)"
+        else:
+            summary_line = "none"
+        if self._worker and self._worker.is_alive():
+            summary_line += " (summarizing...)"
+
+        Logger.log(
+            f"\n{ChatColors.highlight}Context window:{Colors.reset}\n"
+            f"{ChatColors.system}"
+            f"\tLast request:  {budget_line}, {self.last_prompt_messages} messages\n"
+            f"\tConversation:  ~{total} tokens in {len(llm.messages)} messages\n"
+            f"\tSummary:       {summary_line}"
+            f"{Colors.reset}\n"
+        )
+
+ContextManager = ContextManager()
@@ -0,0 +1,221 @@
+# execfeedmanager.py
+# 10/18/2026 - Voltur
+#
+# exec_feed: /exec output still goes to the terminal, but is also captured in a bounded
+# head + tail buffer. A compact summary of it (colour codes stripped, repeated lines
+# folded, capped in tokens) is attached to the next chat message, so the model can be
+# asked about a failure without pasting the log.
+#
+
+import re
+import threading
+from collections import deque
+
+from voltlogger import Logger
+from chatcolors import Colors
+from chatcolors import ChatColors
+
+ANSI = re.compile(r"\x1b\[[0-9;?]*[ -/]*[@-~]|\x1b[@-_]")
+
+
+class OutputCapture:
+    """
+    A binary sink keeping the first quarter of max_bytes and roughly the last three
+    quarters of everything written to it. Chunks are kept as the objects the
+    writer handed over, or memoryview slices of them, so nothing is copied until
+    the summary is made; memory stays within max_bytes plus one chunk.
+    """
+    def __init__(self, max_bytes):
+        self.head_bytes = max_bytes // 4
+        self.tail_bytes = max_bytes - self.head_bytes
+        self.head = []
+        self.head_size = 0
+        self.tail = deque()
+        self.tail_size = 0
+        self.total = 0
+        self.newlines = 0
+        self.ends_with_newline = True
+        self._lock = threading.Lock()   # stdout and stderr are pumped from different threads
+
+    def write(self, chunk):
+        if not chunk:
+            return
+        with self._lock:
+            self.total += len(chunk)
+            self.newlines += chunk.count(b"\n")
+            self.ends_with_newline = chunk[-1:] == b"\n"
+            room = self.head_bytes - self.head_size
+            if room > 0:
+                view = memoryview(chunk)
+                self.head.append(view[:room])
+                self.head_size += min(len(chunk), room)
+                if len(chunk) <= room:
+                    return
+                chunk = view[room:]
+            self.tail.append(chunk)
+            self.tail_size += len(chunk)
+            while self.tail_size - len(self.tail[0]) >= self.tail_bytes:
+                self.tail_size -= len(self.tail.popleft())
+
+    def flush(self):
+        pass
+
+    def tee(self, stream):
+        # A sink for ExecutionManager/OutputPump writing to stream and to us
+        return _Tee(stream, self)
+
+    def lines(self):
+        return self.newlines + (0 if self.ends_with_newline else 1)
+
+    def parts(self):
+        # (head text, tail text, bytes dropped in between)
+        with self._lock:
+            head = b"".join(self.head)
+            tail = b"".join(self.tail)[-self.tail_bytes:] if self.tail else b""
+            gap = self.total - len(head) - len(tail)
+        return head.decode("utf-8", "replace"), tail.decode("utf-8", "replace"), gap
+
+
+class _Tee:
+    def __init__(self, stream, capture):
+        stream.flush()      # our own prints must land before the command's output
+        self.sink = getattr(stream, "buffer", stream)
+        self.capture = capture
+
+    def write(self, chunk):
+        self.sink.write(chunk)
+        self.capture.write(chunk)
+
+    def flush(self):
+        self.sink.flush()
+
+
+def _clean(text):
+    # Lines as the terminal showed them: no colour codes, progress bars overwritten by \r
+    return [line.rstrip("\r").rsplit("\r", 1)[-1].rstrip() for line in ANSI.sub("", text).split("\n")]
+
+
+def _fold(lines):
+    # [text, count] runs, so a line repeated 500 times costs one line
+    runs = []
+    for line in lines:
+        if runs and runs[-1][0] == line:
+            runs[-1][1] += 1
+        else:
+            runs.append([line, 1])
+    return runs
+
+
+def _fit(head, tail, budget):
+    # (first runs, last runs) within budget characters: up to a quarter for the start, the rest for the end
+    def cost(run):
+        return len(run[0]) + (len(f"  [x{run[1]}]") if run[1] > 1 else 0) + 1
+
+    if sum(cost(run) for run in head + tail) <= budget:
+        return head, tail
+    # A line too long to fit is cut rather than dropped, if nothing else made it in
+    first, used = [], 0
+    for run in head:
+        if used + cost(run) > budget // 4:
+            if not first and run[0]:
+                first.append([run[0][:budget // 4 - 3] + " …", 1])
+                used += cost(first[-1])
+            break
+        first.append(run)
+        used += cost(run)
+    last = []
+    for run in reversed(head[len(first):] + tail):
+        if used + cost(run) > budget:
+            room = budget - used - 3
+            if not last and run[0] and room > 0:
+                last.append(["… " + run[0][-room:], 1])
+            break
+        last.append(run)
+        used += cost(run)
+    return first, last[::-1]
+
+
+class ExecFeedManager:
+    def __init__(self):
+        self.enabled = False
+        self.max_bytes = 64 * 1024      # captured per command
+        self.max_tokens = 1000          # summary size per command, estimated
+        self.pending = []               # summaries waiting for the next chat message
+
+    def configure(self, enabled=None, max_bytes=None, max_tokens=None):
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if max_bytes is not None:
+            self.max_bytes = max(int(max_bytes), 1024)
+        if max_tokens is not None:
+            self.max_tokens = max(int(max_tokens), 50)
+
+    def capture(self):
+        return OutputCapture(self.max_bytes) if self.enabled else None
+
+    # ----------------------
+    # After a command
+    # ----------------------
+    def add(self, command, capture, exit_code):
+        if capture is None:
+            return
+        if capture.total == 0:
+            summary = f"Output of `{command}` (exit {exit_code}): nothing"
+        else:
+            summary = self._summarize(command, capture, exit_code)
+        self.pending.append(summary)
+        Logger.log(f"{ChatColors.system}(output captured, ~{len(summary) // 4} tokens; it goes with your "
+                   f"next message. /feed shows it, /feed clear drops it){Colors.reset}")
+
+    def _summarize(self, command, capture, exit_code):
+        head, tail, gap = capture.parts()
+        head_lines, tail_lines = (_clean(head), _clean(tail)) if gap > 0 else (_clean(head + tail), [])
+        ending = tail_lines or head_lines
+        if len(ending) > 1 and ending[-1] == "":
+            ending.pop()        # the final newline
+        if gap > 0:
+            # The head's last line and the tail's first are probably cut mid-way. Drop them,
+            # unless one is all there is (one long line, a progress bar redrawn with \r)
+            head_lines = head_lines[:-1] if len(head_lines) > 1 else [line + " …" for line in head_lines]
+            tail_lines = tail_lines[1:] if len(tail_lines) > 1 else ["… " + line for line in tail_lines]
+        head_runs, tail_runs = _fold(head_lines), _fold(tail_lines)
+
+        first, last = _fit(head_runs, tail_runs, self.max_tokens * 4)
+        hidden = capture.lines() - sum(n for _, n in first + last)
+
+        def render(selected):
+            return [text if n == 1 else f"{text}  [x{n}]" for text, n in selected]
+
+        body = render(first)
+        if hidden > 0:
+            body.append(f"[... about {hidden} lines not shown ({capture.total / 1024:.1f} KB in all) ...]")
+        elif gap > 0:
+            body.append(f"[... the middle is not shown ({capture.total / 1024:.1f} KB in all) ...]")
+        body += render(last)
+        count = capture.lines()
+        return (f"Output of `{command}` (exit {exit_code}, {count} line{'' if count == 1 else 's'}):\n```\n"
+                + "\n".join(body) + "\n```")
+
+    # ----------------------
+    # The next chat message
+    # ----------------------
+    def attach(self, message):
+        # message with the pending summaries in front of it; they are sent once
+        if not self.pending:
+            return message
+        summaries, self.pending = self.pending, []
+        return "\n\n".join(summaries) + "\n\n" + message
+
+    def show(self):
+        if not self.pending:
+            state = "on" if self.enabled else "off (exec_feed in the config)"
+            Logger.log(f"{ChatColors.system}No captured /exec output waiting; capture is {state}.{Colors.reset}")
+            return
+        Logger.log(f"\n{ChatColors.highlight}Goes with your next message:{Colors.reset}\n"
+                   f"{ChatColors.system}" + "\n\n".join(self.pending) + f"{Colors.reset}\n")
+
+    def clear(self):
+        self.pending = []
+        Logger.log(f"{ChatColors.system}Captured /exec output dropped.{Colors.reset}")
+
+ExecFeedManager = ExecFeedManager()
@@ -1,31 +1,195 @@
 # historymanager.py
 # 06/22/2025 - Voltur
 #
-# View and resend chat messages from history 
-# 
+# View and resend chat messages from history
+#
+
+import sqlite3
+import sys
+import threading
+from itertools import islice
 
+if sys.platform.startswith("linux") or sys.platform == "darwin":
+    import readline   # past prompts go into readline's history, so Ctrl-R finds them
+else:
+    readline = None
 
 from voltlogger import Logger
 from chatcolors import Colors
 from chatcolors import ChatColors
+from transcriptindex import TranscriptIndex
+from consolereader import ConsoleReader
+
+SHOW = 10
+
+
+def _score(query, text):
+    """
+    How well text matches query, or None. A plain substring beats all the words in
+    any order, which beats fuzzy words (each query word's letters, in order, inside
+    one word of the text that starts with the same letter); earlier matches and
+    tighter fuzzy matches rank higher.
+    """
+    q = query.lower()
+    t = text.lower()
+    at = t.find(q)
+    if at >= 0:
+        return 3.0 - at / (len(t) + 1)
+
+    words = q.split()
+    if len(words) > 1 and all(w in t for w in words):
+        return 2.0 - t.find(words[0]) / (len(t) + 1)
+
+    candidates = t.split()
+    extra = 0
+    for w in words:
+        best = None
+        for c in candidates:
+            if c[0] == w[0] and len(c) >= len(w) and (best is None or len(c) - len(w) < best):
+                letters = iter(c)
+                if all(ch in letters for ch in w):
+                    best = len(c) - len(w)
+        if best is None:
+            return None
+        extra += best
+    return 1.0 - extra / (extra + len(q) + 1)
+
+
+def _one_line(text, width=100):
+    line = " ".join(text.split())
+    return line if len(line) <= width else line[:width - 3] + "..."
+
 
 class HistoryManager:
-    def list_history(self, llm):
-        user_messages = [m["content"] for m in llm.messages if m.get("role") == "user"]
+    def __init__(self):
+        # Kept up to date as messages are sent instead of rescanning llm.messages.
+        # dict keeps insertion order, so re-sending a prompt moves it to the end.
+        self._session = {}
+        self._messages = None       # the llm.messages list _session was built from
+        self._past = []             # [(text, transcript name)] from saved transcripts, newest first
+        self._past_loaded = threading.Event()
+        # readline changes wait here for the console reader's thread (see _update_readline)
+        self._readline_lock = threading.Lock()
+        self._readline_seed = None      # past prompts to put in front of readline's history
+        self._readline_new = []         # prompts to append to it
+        ConsoleReader.before_prompt(self._update_readline)
+
+    # ----------------------
+    # Keeping the index current
+    # ----------------------
+    def add(self, llm, text):
+        # Called for every message sent to the LLM
+        self._sync(llm)
+        self._session.pop(text, None)
+        self._session[text] = None
+        if readline and "\n" not in text:
+            # Typed lines are already there; resends and /// input aren't
+            with self._readline_lock:
+                self._readline_new.append(text)
+
+    def _sync(self, llm):
+        # After /load (or on first use) start over from the conversation itself
+        if llm.messages is not self._messages:
+            self._messages = llm.messages
+            self._session = {}
+            for m in llm.messages:
+                if m.get("role") == "user" and isinstance(m.get("content"), str):
+                    self._session.pop(m["content"], None)
+                    self._session[m["content"]] = None
+
+    def load_past_in_background(self, base_dir):
+        # Prompts from saved transcripts, for /history <query> and Ctrl-R
+        self._past_loaded.clear()
+        threading.Thread(target=self._load_past, args=(base_dir,), daemon=True).start()
+
+    def _load_past(self, base_dir):
+        try:
+            seen = set()
+            past = []
+            for text, name in TranscriptIndex.user_messages(base_dir):
+                if text and text not in seen:
+                    seen.add(text)
+                    past.append((text, name))
+            self._past = past
+            if readline:
+                with self._readline_lock:
+                    self._readline_seed = [text for text, _ in past[:1000] if "\n" not in text]
+        except (OSError, sqlite3.Error) as e:
+            Logger.debug(f"Transcript history unavailable: {e}")
+        finally:
+            self._past_loaded.set()
 
-        if not user_messages:
-            Logger.log(f"\n{ChatColors.system}(No messages yet.){Colors.reset}\n")
+    def _update_readline(self):
+        # On the console reader's thread, between prompts: the only place readline's history changes
+        if not readline:
+            return
+        with self._readline_lock:
+            seed, self._readline_seed = self._readline_seed, None
+            new, self._readline_new = self._readline_new, []
+        if seed is not None:
+            # Past prompts go in front of whatever was typed since startup
+            current = [readline.get_history_item(i) for i in range(1, readline.get_current_history_length() + 1)]
+            readline.clear_history()
+            for text in reversed(seed):
+                readline.add_history(text)
+            for line in current:
+                readline.add_history(line)
+        for text in new:
+            length = readline.get_current_history_length()
+            if not length or readline.get_history_item(length) != text:
+                readline.add_history(text)
+
+    # ----------------------
+    # Listing and searching
+    # ----------------------
+    def list_history(self, llm, query=None):
+        self._sync(llm)
+        if query:
+            found = self.search(query)
+            title = f"Messages matching '{query}':"
+        else:
+            found = [(text, "") for text in islice(reversed(self._session), SHOW)]
+            found.reverse()
+            title = "Recent user messages:"
+
+        if not found:
+            empty = f"(Nothing matches '{query}'.)" if query else "(No messages yet.)"
+            Logger.log(f"\n{ChatColors.system}{empty}{Colors.reset}\n")
             return None
 
-        Logger.log(f"\n{ChatColors.highlight}Recent user messages:{Colors.reset}")
-        for i, line in enumerate(user_messages[-10:], start=1):
-            Logger.log(f"\t{i}: {line}")
-        
-        return user_messages
-    
-    def get(self, llm):
+        Logger.log(f"\n{ChatColors.highlight}{title}{Colors.reset}")
+        for i, (text, source) in enumerate(found, start=1):
+            where = f"  {ChatColors.system}({source}){Colors.reset}" if source else ""
+            Logger.log(f"\t{i}: {_one_line(text)}{where}")
+
+        return [text for text, _ in found]
+
+    def search(self, query, limit=SHOW):
+        """
+        Best matches for query across this session and saved transcripts, as
+        [(text, source)]. Ties go to the more recent prompt.
+        """
+        self._past_loaded.wait(1.0)
+        ranked = []
+        recency = 0
+        for text in reversed(self._session):
+            score = _score(query, text)
+            if score is not None:
+                ranked.append((-score, recency, text, "this session"))
+            recency += 1
+        for text, name in self._past:
+            if text in self._session:
+                continue
+            score = _score(query, text)
+            if score is not None:
+                ranked.append((-score, recency, text, name))
+            recency += 1
+        ranked.sort()
+        return [(text, source) for _, _, text, source in ranked[:limit]]
+
+    def get(self, llm, query=None):
 
-        user_messages = self.list_history(llm=llm)
+        user_messages = self.list_history(llm=llm, query=query)
 
         if user_messages:
             choice = input(f"\n{ChatColors.system}Enter number to resend, or press Enter to cancel:{Colors.reset} ").strip()
@@ -35,8 +199,8 @@ class HistoryManager:
 
             try:
                 index = int(choice) - 1
-                if 0 <= index < len(user_messages[-10:]):
-                    your_message = user_messages[-10:][index]
+                if 0 <= index < len(user_messages):
+                    your_message = user_messages[index]
                     Logger.log(f"{ChatColors.system}Resending message: {your_message}{Colors.reset}")
                     return your_message
                 else:
@@ -46,4 +210,4 @@ class HistoryManager:
                 Logger.log(f"{Colors.fg.red}Please enter a number.{Colors.reset}\n")
         return None
 
-HistoryManager = HistoryManager()
\ No newline at end of file
+HistoryManager = HistoryManager()
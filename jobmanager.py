@@ -0,0 +1,238 @@
+# jobmanager.py
+# 10/18/2026 - Voltur
+#
+# Job control for volt-shell background tasks: a bounded worker pool, a job table,
+# output spooled to disk per job, and completion notices for the next prompt.
+#
+
+import atexit
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from voltlogger import Logger
+from chatcolors import Colors
+from chatcolors import ChatColors
+
+
+class Job:
+    def __init__(self, job_id, display, log_path):
+        self.id = job_id
+        self.display = display
+        self.log_path = log_path
+        self.status = "queued"      # queued -> running -> done | killed
+        self.exit_code = None
+        self.procs = []             # Popen objects, so /kill can reach them
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def add_proc(self, proc):
+        self.procs.append(proc)
+        if self.status == "killed":
+            proc.terminate()  # /kill raced with the spawn
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def describe(self):
+        if self.status == "done":
+            state = f"done (exit {self.exit_code})"
+        elif self.status == "killed":
+            state = "killed"
+        else:
+            state = self.status
+        return f"[{self.id}] {state:<14} {self.elapsed():7.1f}s  {self.display}"
+
+
+class JobManager:
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.jobs = {}
+        self._next_id = 1
+        self._queue = queue.Queue()
+        self._workers = []
+        self._spool_dir = None
+        self._notices = []
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def configure(self, max_workers=None):
+        if max_workers is not None:
+            self.max_workers = max(1, int(max_workers))
+
+    # ----------------------
+    # Starting jobs
+    # ----------------------
+    def submit(self, display, run):
+        """
+        Queue run(job, output) on the worker pool. output is a binary file the job
+        should write its stdout/stderr to; run returns the exit code.
+        """
+        with self._lock:
+            if self._spool_dir is None:
+                self._spool_dir = tempfile.mkdtemp(prefix="volt-jobs-")
+            job = Job(self._next_id, display, os.path.join(self._spool_dir, f"job-{self._next_id}.log"))
+            self.jobs[job.id] = job
+            self._next_id += 1
+            # Grow the pool on demand up to max_workers. Daemon threads, so a running
+            # job never holds up exit; shutdown() kills its processes instead.
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"volt-job-{len(self._workers) + 1}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+        self._queue.put((job, run))
+        return job
+
+    def _work(self):
+        while True:
+            job, run = self._queue.get()
+            self._run(job, run)
+
+    def _run(self, job, run):
+        with self._lock:
+            if job.status == "killed":
+                return  # killed while still queued
+            job.status = "running"
+            job.started = time.monotonic()
+        try:
+            with open(job.log_path, "wb") as output:
+                code = run(job, output)
+        except Exception as e:
+            with open(job.log_path, "ab") as output:
+                output.write(f"{e}\n".encode())
+            code = 1
+        job.finished = time.monotonic()
+        job.exit_code = code
+        if job.status != "killed":
+            job.status = "done"
+        with self._lock:
+            self._notices.append(job)
+        job.done.set()
+
+    # ----------------------
+    # Inspecting and controlling jobs
+    # ----------------------
+    def _get(self, job_id):
+        try:
+            job = self.jobs.get(int(job_id))
+        except (TypeError, ValueError):
+            job = None
+        if job is None:
+            Logger.log(f"{Colors.fg.red}No such job: {job_id}{Colors.reset}")
+        return job
+
+    def show(self):
+        if not self.jobs:
+            Logger.log(f"\n{ChatColors.system}(No background jobs.){Colors.reset}\n")
+            return
+        Logger.log(f"\n{ChatColors.highlight}Background jobs:{Colors.reset}")
+        for job in self.jobs.values():
+            Logger.log(f"\t{job.describe()}")
+        Logger.log(f"{ChatColors.system}\tOutput is kept in {self._spool_dir}{Colors.reset}\n")
+
+    def wait(self, job_id=None, stop=None):
+        """
+        Wait for one job, or all of them. Returns the exit code of the last job waited
+        on. Setting the stop Event (Ctrl-C) gives up waiting.
+        """
+        if job_id is None:
+            jobs = list(self.jobs.values())
+        else:
+            job = self._get(job_id)
+            if job is None:
+                return 127
+            jobs = [job]
+
+        code = 0
+        for job in jobs:
+            while not job.done.wait(0.2):
+                if stop is not None and stop.is_set():
+                    return 130
+            code = job.exit_code if job.exit_code is not None else 0
+        for line in self.drain_notifications():
+            Logger.log(line)
+        return code
+
+    def kill(self, job_id):
+        job = self._get(job_id)
+        if job is None:
+            return 127
+        if job.done.is_set():
+            Logger.log(f"{ChatColors.system}Job {job.id} already finished.{Colors.reset}")
+            return 0
+        with self._lock:
+            queued = job.status == "queued"
+            job.status = "killed"
+        if queued:
+            # The worker will skip it; nothing to terminate
+            job.exit_code = -15
+            job.done.set()
+        for proc in job.procs:
+            if proc.poll() is None:
+                proc.terminate()
+        Logger.log(f"{ChatColors.system}Job {job.id} killed.{Colors.reset}")
+        return 0
+
+    def fg(self, job_id, stop=None):
+        """
+        Print the job's output so far and keep following it until the job ends.
+        Setting the stop Event (Ctrl-C) detaches and leaves the job running.
+        """
+        job = self._get(job_id)
+        if job is None:
+            return 127
+
+        Logger.log(f"{ChatColors.system}{job.describe()}{Colors.reset}")
+        while not os.path.exists(job.log_path) and not job.done.is_set():
+            if stop is not None and stop.is_set():
+                return 130
+            time.sleep(0.1)
+
+        sys.stdout.flush()
+        out = getattr(sys.stdout, "buffer", sys.stdout)
+        with open(job.log_path, "rb") as log:
+            while True:
+                chunk = log.read(64 * 1024)
+                if chunk:
+                    out.write(chunk)
+                    out.flush()
+                    continue
+                if job.done.is_set():
+                    break
+                if stop is not None and stop.is_set():
+                    Logger.log(f"\n{ChatColors.system}Detached from job {job.id}; it keeps running.{Colors.reset}")
+                    return 130
+                time.sleep(0.1)
+        with self._lock:
+            if job in self._notices:
+                self._notices.remove(job)
+        return job.exit_code if job.exit_code is not None else 0
+
+    def drain_notifications(self):
+        # Jobs finished since the last prompt, bash style
+        with self._lock:
+            finished, self._notices = self._notices, []
+        return [f"{ChatColors.system}{job.describe()}{Colors.reset}" for job in finished]
+
+    def shutdown(self):
+        # Runs on the way out of the chat and again from atexit; the second call is a no-op
+        running = [job for job in self.jobs.values() if not job.done.is_set() and job.status != "killed"]
+        if running:
+            Logger.log(f"{ChatColors.system}Stopping {len(running)} background job(s).{Colors.reset}")
+            for job in running:
+                job.status = "killed"
+                for proc in job.procs:
+                    if proc.poll() is None:
+                        proc.kill()
+        if self._spool_dir:
+            shutil.rmtree(self._spool_dir, ignore_errors=True)
+            self._spool_dir = None
+
+JobManager = JobManager()
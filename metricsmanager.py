@@ -0,0 +1,218 @@
+# metricsmanager.py
+# 10/18/2026 - Voltur
+#
+# Performance numbers for every chat turn (request size, prompt tokens, time to first
+# byte and token, latency, tokens/sec) and every /exec pipeline stage (spawn time, wall
+# time, exit code). /stats shows rolling percentiles; with metrics_export set, the numbers
+# are also written to a Prometheus textfile or appended to a JSONL metrics log.
+#
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from voltlogger import Logger
+from chatcolors import Colors
+from chatcolors import ChatColors
+
+WINDOW = 500        # samples kept for the rolling percentiles
+QUANTILES = (0.5, 0.95, 0.99)
+
+# field, /stats label, display scale, display format, Prometheus metric, help
+TURN_FIELDS = (
+    ("latency", "latency (s)", 1, "{:.2f}", "volt_chat_turn_latency_seconds",
+     "Seconds from sending a turn to the end of its reply"),
+    ("ttfb", "first byte (s)", 1, "{:.2f}", "volt_chat_time_to_first_byte_seconds",
+     "Seconds from sending a turn to the first response data"),
+    ("ttft", "first token (s)", 1, "{:.2f}", "volt_chat_time_to_first_token_seconds",
+     "Seconds from sending a turn to the first reply token"),
+    ("tokens_per_sec", "tokens/sec", 1, "{:.1f}", "volt_chat_tokens_per_second",
+     "Reply tokens generated per second"),
+    ("output_tokens", "output tokens", 1, "{:.0f}", "volt_chat_output_tokens",
+     "Reply tokens per turn"),
+    ("prompt_tokens", "prompt tokens", 1, "{:.0f}", "volt_chat_prompt_tokens",
+     "Estimated prompt tokens per turn"),
+    ("messages", "messages", 1, "{:.0f}", "volt_chat_prompt_messages",
+     "Messages sent per turn"),
+    ("payload_bytes", "payload (KB)", 1 / 1024, "{:.1f}", "volt_chat_request_bytes",
+     "Request body bytes per turn"),
+)
+STAGE_FIELDS = (
+    ("spawn", "spawn (ms)", 1000, "{:.1f}", "volt_chat_exec_spawn_seconds",
+     "Seconds to start one /exec pipeline stage"),
+    ("wall", "wall time (s)", 1, "{:.2f}", "volt_chat_exec_wall_seconds",
+     "Seconds from starting one /exec pipeline stage to its exit"),
+)
+COUNTERS = (
+    ("turns", "volt_chat_turns_total", "Chat turns sent"),
+    ("cached", "volt_chat_turns_cached_total", "Chat turns answered from the response cache"),
+    ("interrupted", "volt_chat_turns_interrupted_total", "Chat turns stopped by the user"),
+    ("errors", "volt_chat_turn_errors_total", "Chat turns that failed"),
+    ("stages", "volt_chat_exec_stages_total", "/exec pipeline stages run"),
+    ("stage_failures", "volt_chat_exec_stage_failures_total", "/exec pipeline stages that exited non-zero"),
+)
+
+
+def percentile(values, q):
+    # Nearest-rank percentile of a sorted list
+    if not values:
+        return None
+    return values[min(max(math.ceil(q * len(values)) - 1, 0), len(values) - 1)]
+
+
+class MetricsManager:
+    def __init__(self):
+        self.export = "none"        # none | prometheus | jsonl
+        self.path = None
+        self.turns = deque(maxlen=WINDOW)
+        self.stages = deque(maxlen=WINDOW)
+        self.counts = {name: 0 for name, _, _ in COUNTERS}
+        self.exit_codes = {}
+        self.started = time.time()
+        self._sums = {}             # Prometheus metric -> [sum, count] since startup
+        self._lock = threading.Lock()
+
+    def configure(self, export=None, path=None):
+        if export is not None:
+            export = str(export).lower()
+            if export not in ("none", "prometheus", "jsonl"):
+                raise ValueError(f"metrics_export must be 'none', 'prometheus' or 'jsonl', not {export!r}")
+            self.export = export
+        if path is not None:
+            self.path = path
+
+    # ----------------------
+    # Recording
+    # ----------------------
+    def record_turn(self, sample):
+        """
+        sample holds the TURN_FIELDS that were measured (None otherwise) plus model,
+        backend, cached, interrupted and error. Cached replies are counted but left
+        out of the percentiles, which are about the server.
+        """
+        sample = dict(sample, time=time.time())
+        with self._lock:
+            self.counts["turns"] += 1
+            for flag in ("cached", "interrupted"):
+                if sample.get(flag):
+                    self.counts[flag] += 1
+            if sample.get("error"):
+                self.counts["errors"] += 1
+            if not sample.get("cached"):
+                self.turns.append(sample)
+                self._add(TURN_FIELDS, sample)
+        self._export("turn", sample)
+
+    def record_exec(self, command, stages):
+        # stages: one {"cmd", "spawn", "wall", "exit"} per pipeline stage, in order
+        sample = {"time": time.time(), "command": command, "stages": stages}
+        with self._lock:
+            for stage in stages:
+                self.stages.append(stage)
+                self._add(STAGE_FIELDS, stage)
+                self.counts["stages"] += 1
+                if stage["exit"] != 0:
+                    self.counts["stage_failures"] += 1
+                self.exit_codes[stage["exit"]] = self.exit_codes.get(stage["exit"], 0) + 1
+        self._export("exec", sample)
+
+    def _add(self, fields, sample):
+        for field, _, _, _, metric, _ in fields:
+            if sample.get(field) is not None:
+                total = self._sums.setdefault(metric, [0.0, 0])
+                total[0] += sample[field]
+                total[1] += 1
+
+    # ----------------------
+    # Exporting
+    # ----------------------
+    def _export(self, kind, sample):
+        if self.export == "none" or not self.path:
+            return
+        try:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            if self.export == "jsonl":
+                line = json.dumps({"type": kind, **sample}, ensure_ascii=False) + "\n"
+                # One write per line, so several volt-chat sessions can share the log
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            else:
+                self._write_prometheus()
+        except OSError as e:
+            Logger.warn(f"Couldn't export metrics to {self.path}: {e}")
+            self.export = "none"    # say so once, not on every turn
+
+    def _write_prometheus(self):
+        # The textfile collector may read at any moment: write aside, then swap in
+        with self._lock:
+            text = self._prometheus_text()
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, self.path)
+
+    def _prometheus_text(self):
+        lines = [
+            "# HELP volt_chat_start_time_seconds When this volt-chat session started",
+            "# TYPE volt_chat_start_time_seconds gauge",
+            f"volt_chat_start_time_seconds {self.started:.3f}",
+        ]
+        for name, metric, help_text in COUNTERS:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter", f"{metric} {self.counts[name]}"]
+        for fields, window in ((TURN_FIELDS, self.turns), (STAGE_FIELDS, self.stages)):
+            for field, _, _, _, metric, help_text in fields:
+                values = sorted(s[field] for s in window if s.get(field) is not None)
+                total, count = self._sums.get(metric, (0.0, 0))
+                lines += [f"# HELP {metric} {help_text} (quantiles over the last {WINDOW})",
+                          f"# TYPE {metric} summary"]
+                for q in QUANTILES:
+                    value = percentile(values, q)
+                    lines.append(f'{metric}{{quantile="{q}"}} {value if value is not None else "NaN"}')
+                lines += [f"{metric}_sum {total}", f"{metric}_count {count}"]
+        return "\n".join(lines) + "\n"
+
+    # ----------------------
+    # /stats
+    # ----------------------
+    def _table(self, fields, window):
+        lines = f"\n\t{'':<16} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+        for field, label, scale, fmt, _, _ in fields:
+            values = sorted(s[field] * scale for s in window if s.get(field) is not None)
+            if not values:
+                continue
+            cells = [fmt.format(percentile(values, q)) for q in QUANTILES] + [fmt.format(values[-1])]
+            lines += f"\n\t{label:<16} " + " ".join(f"{cell:>9}" for cell in cells)
+        return lines
+
+    def show(self):
+        with self._lock:
+            turns, stages = list(self.turns), list(self.stages)
+            counts, exit_codes = dict(self.counts), dict(self.exit_codes)
+
+        lines = (f"\n{ChatColors.highlight}Turns (last {len(turns)} sent to the server):{Colors.reset}"
+                 f"{ChatColors.system}")
+        lines += (f"\n\t{counts['turns']} this session: {counts['cached']} cached, "
+                  f"{counts['interrupted']} interrupted, {counts['errors']} failed")
+        if turns:
+            lines += self._table(TURN_FIELDS, turns)
+
+        lines += f"{Colors.reset}\n\n{ChatColors.highlight}/exec stages (last {len(stages)}):{Colors.reset}{ChatColors.system}"
+        if stages:
+            codes = ", ".join(f"{code}: {n}" for code, n in sorted(exit_codes.items()))
+            lines += f"\n\t{counts['stages']} this session, exit codes {codes}"
+            lines += self._table(STAGE_FIELDS, stages)
+            slowest = max(stages, key=lambda s: s["wall"] or 0)
+            lines += f"\n\tslowest: {slowest['cmd']} ({slowest['wall']:.2f}s)"
+        else:
+            lines += "\n\tnone yet"
+
+        if self.export != "none" and self.path:
+            lines += f"\n\n\tExporting to {self.path} ({self.export})"
+        Logger.log(f"{lines}{Colors.reset}\n")
+
+MetricsManager = MetricsManager()
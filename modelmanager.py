@@ -1,23 +1,243 @@
 # modelmanager.py
 # 06/22/2025 - Voltur
 #
-# Get a list of models from the LLM 
-# 
+# Get a list of models from the LLM
+#
+# The catalog is cached with a TTL and refreshed in the background. Every configured
+# endpoint is probed at once, with a timeout, so one slow server can't stall /models.
+# Validation (/model) and tab completion only ever read the cache.
+#
+
+import difflib
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+if sys.platform.startswith("linux") or sys.platform == "darwin":
+    import readline   # tab completion of model names
+else:
+    readline = None
 
 from voltlogger import Logger
 from chatcolors import Colors
 from chatcolors import ChatColors
 
+
+def _human_size(size):
+    if not size:
+        return ""
+    units = ["B", "KB", "MB", "GB", "TB"]
+    i = 0
+    while size >= 1024 and i < len(units) - 1:
+        size /= 1024
+        i += 1
+    return f"{size:.1f} {units[i]}" if i else f"{size} B"
+
+
 class ModelManager:
+    def __init__(self):
+        self.endpoints = []         # extra servers; the connected one is always included
+        self.ttl = 300              # seconds
+        self.timeout = 3            # seconds per request
+        self._catalog = {}          # base url -> {"api_type", "models": [...], "error"}
+        self._fetched = 0.0
+        self._refreshing = None     # Thread while a refresh runs
+        self._lock = threading.Lock()
+
+    def configure(self, endpoints=None, ttl=None, timeout=None):
+        if endpoints is not None:
+            if isinstance(endpoints, str):
+                endpoints = [endpoints]
+            self.endpoints = [url.rstrip("/") for url in endpoints]
+        if ttl is not None:
+            self.ttl = int(ttl)
+        if timeout is not None:
+            self.timeout = float(timeout)
+
+    # ----------------------
+    # Probing the servers
+    # ----------------------
+    def _urls(self, llm):
+        urls = [llm.client.base_url.rstrip("/")]
+        urls += [url for url in self.endpoints if url not in urls]
+        return urls
+
+    def refresh_in_background(self, llm):
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return self._refreshing
+            self._refreshing = threading.Thread(target=self.refresh, args=(llm,), daemon=True)
+            self._refreshing.start()
+            return self._refreshing
+
+    def refresh(self, llm):
+        urls = self._urls(llm)
+        headers = {
+            'Authorization': f'Bearer {llm.client.bearer_token}',
+            'Content-Type': 'application/json'
+        }
+        with ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="volt-models") as pool:
+            results = list(pool.map(lambda url: self._probe(url, headers), urls))
+        with self._lock:
+            self._catalog = dict(zip(urls, results))
+            self._fetched = time.monotonic()
+
+    def _probe(self, url, headers):
+        # Ollama first (it has the richer metadata), then Open WebUI
+        try:
+            resp = requests.get(f"{url}/api/tags", headers=headers, timeout=self.timeout)
+            if resp.status_code == 200 and "models" in resp.json():
+                models = [self._from_ollama(m) for m in resp.json()["models"]]
+                self._mark_loaded(url, headers, models)
+                return {"api_type": "ollama", "models": models, "error": None}
+        except (requests.RequestException, ValueError):
+            pass
+        try:
+            resp = requests.get(f"{url}/api/models", headers=headers, timeout=self.timeout)
+            resp.raise_for_status()
+            data = resp.json().get("data", [])
+            return {"api_type": "openwebui", "models": [self._from_openwebui(m) for m in data], "error": None}
+        except requests.Timeout:
+            error = f"no answer in {self.timeout:g}s"
+        except requests.ConnectionError:
+            error = "connection failed"
+        except requests.HTTPError as e:
+            error = f"HTTP {e.response.status_code}"
+        except (requests.RequestException, ValueError, AttributeError) as e:
+            error = str(e) or type(e).__name__
+        return {"api_type": None, "models": [], "error": error}
+
+    def _mark_loaded(self, url, headers, models):
+        # /api/ps lists the models currently in memory
+        try:
+            resp = requests.get(f"{url}/api/ps", headers=headers, timeout=self.timeout)
+            loaded = {m.get("name") for m in resp.json().get("models", [])}
+        except (requests.RequestException, ValueError, AttributeError):
+            return
+        for model in models:
+            model["loaded"] = model["name"] in loaded
+
+    def _from_ollama(self, m):
+        details = m.get("details") or {}
+        return {
+            "name": m.get("name") or m.get("model", "??"),
+            "size": m.get("size"),
+            "quantization": details.get("quantization_level"),
+            "parameters": details.get("parameter_size"),
+            "loaded": None,
+        }
+
+    def _from_openwebui(self, m):
+        # Models Open WebUI proxies from Ollama carry the Ollama record along
+        ollama = m.get("ollama") or {}
+        details = ollama.get("details") or {}
+        return {
+            "name": m.get("id") or m.get("name", "??"),
+            "size": ollama.get("size"),
+            "quantization": details.get("quantization_level"),
+            "parameters": details.get("parameter_size"),
+            "loaded": None,
+        }
+
+    # ----------------------
+    # Reading the catalog
+    # ----------------------
+    def catalog(self, llm, wait=True):
+        """
+        {base url: entry} from the cache. A stale cache is returned as is and refreshed
+        in the background; an empty one is waited for (bounded by the timeout).
+        """
+        stale = time.monotonic() - self._fetched > self.ttl
+        if not self._catalog or stale:
+            worker = self.refresh_in_background(llm)
+            if not self._catalog and wait:
+                worker.join(self.timeout * 2 + 1)
+        return self._catalog
+
+    def names(self):
+        # Every model name in the cache, without touching the network
+        names = []
+        for entry in self._catalog.values():
+            for model in entry["models"]:
+                if model["name"] not in names:
+                    names.append(model["name"])
+        return names
+
+    def find(self, llm, name):
+        # (base url, entry) of the first server that has the model, or (None, None)
+        for url, entry in self.catalog(llm).items():
+            if any(model["name"] == name for model in entry["models"]):
+                return url, entry
+        return None, None
+
     def show(self, llm):
-        models = llm.client.get_models() or "feature not available"
-        model_list = ""
-        if "data" in models:
-            for model in models['data']: 
-                model_list += f"\n\t{model.get('name', '??')} - {model.get('id', '??')}"
-        elif "models" in models:
-            for model in models['models']: 
-                model_list += f"\n\t{model.get('name', '??')} - {model.get('model', '??')}"
-        Logger.log(f"\n{ChatColors.system}Models found:{model_list}{Colors.reset}\n")
-
-ModelManager = ModelManager()
\ No newline at end of file
+        catalog = self.catalog(llm)
+        age = time.monotonic() - self._fetched
+        current = llm.client.model
+        lines = ""
+        for url, entry in catalog.items():
+            lines += f"\n\t{ChatColors.highlight}{url}{Colors.reset}{ChatColors.system}"
+            if entry["error"]:
+                lines += f" (unreachable: {entry['error']})"
+                continue
+            if not entry["models"]:
+                lines += " (no models)"
+            for model in entry["models"]:
+                marker = "*" if model["name"] == current and url == llm.client.base_url.rstrip("/") else " "
+                info = [x for x in (model["parameters"], model["quantization"], _human_size(model["size"])) if x]
+                if model["loaded"]:
+                    info.append("loaded")
+                lines += f"\n\t {marker} {model['name']:<32} {', '.join(info)}"
+        if not catalog:
+            lines = "\n\t(feature not available)"
+        Logger.log(f"\n{ChatColors.system}Models found (updated {age:.0f}s ago):{lines}{Colors.reset}\n")
+
+    # ----------------------
+    # Switching models
+    # ----------------------
+    def switch(self, llm, name):
+        """
+        Point the client at model name, validated against the catalog. If another
+        configured server has it, the client moves there. Returns True on success.
+        """
+        url, entry = self.find(llm, name)
+        if url is None:
+            close = difflib.get_close_matches(name, self.names(), n=3, cutoff=0.5)
+            hint = f" Did you mean: {', '.join(close)}?" if close else " /models lists what's available."
+            Logger.log(f"{Colors.fg.red}Unknown model: {name}.{hint}{Colors.reset}")
+            return False
+
+        client = llm.client
+        if url != client.base_url.rstrip("/"):
+            client.base_url = url
+            client.api_type = entry["api_type"]
+            if entry["api_type"] == "ollama":
+                client.endpoints = {'models': f"{url}/api/tags", 'chat': f"{url}/api/chat"}
+            else:
+                client.endpoints = {'models': f"{url}/api/models", 'chat': f"{url}/api/chat/completions"}
+        client.model = name
+        Logger.log(f"{ChatColors.system}Now using model '{name}' on {url}{Colors.reset}")
+        return True
+
+    def install_completion(self):
+        # Tab completes model names after "/model "
+        if not readline:
+            return
+        readline.set_completer(self._complete)
+        readline.set_completer_delims(" \t\n")
+        if "libedit" in (readline.__doc__ or ""):
+            readline.parse_and_bind("bind ^I rl_complete")
+        else:
+            readline.parse_and_bind("tab: complete")
+
+    def _complete(self, text, state):
+        line = readline.get_line_buffer()
+        if not line.lower().startswith("/model "):
+            return None
+        matches = [name for name in self.names() if name.startswith(text)]
+        return matches[state] if state < len(matches) else None
+
+ModelManager = ModelManager()
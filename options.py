@@ -12,13 +12,12 @@ import os
 from pathlib import Path
 from typing import Dict
 
-# Helpers for loading JSON / YAML
-try:
-    import yaml  # pip install pyyaml   # optional, for .yaml files
-except ImportError:   # pragma: no cover
-    yaml = None
+# Parsed config files, keyed by path and stamped with mtime/size, so a YAML config
+# doesn't cost a yaml import and parse on every start
+CONFIG_CACHE = Path.home() / ".volt-config.cache.json"
 
 
+# Helpers for loading JSON / YAML
 def _read_json(path: Path) -> Dict:
     if not path.is_file():
         return {}
@@ -27,14 +26,64 @@ def _read_json(path: Path) -> Dict:
 
 
 def _read_yaml(path: Path) -> Dict:
-    if yaml is None:          # pragma: no cover
-        return {}
     if not path.is_file():
         return {}
+    try:
+        import yaml  # pip install pyyaml   # optional, for .yaml files; slow to import
+    except ImportError:   # pragma: no cover
+        return {}
     with path.open("r", encoding="utf-8") as f:
         return yaml.safe_load(f) or {}
 
 
+def _read_cache() -> Dict:
+    try:
+        with CONFIG_CACHE.open("r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(cache: Dict) -> None:
+    tmp = CONFIG_CACHE.with_name(f"{CONFIG_CACHE.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, CONFIG_CACHE)
+    except (OSError, TypeError, ValueError):
+        # Read-only home, or a config value JSON can't hold: just don't cache
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def _read_config(path: Path) -> Dict:
+    """
+    The parsed contents of a config file, from the cache when the file hasn't
+    changed since it was last parsed.
+    """
+    if path.suffix == ".json":
+        return _read_json(path)    # as quick to parse as the cache itself
+    try:
+        st = path.stat()
+    except OSError:
+        return {}
+    key = str(path.resolve())
+    stamp = [st.st_mtime_ns, st.st_size]
+    cache = _read_cache()
+    entry = cache.get(key)
+    if isinstance(entry, dict) and entry.get("stamp") == stamp:
+        return entry.get("data") or {}
+
+    data = _read_yaml(path)
+    if data:
+        cache[key] = {"stamp": stamp, "data": data}
+        _write_cache(cache)
+    return data
+
+
 def _load_local_config() -> Dict:
     candidates = [
         Path.cwd() / "volt-config.json",
@@ -44,7 +93,7 @@ def _load_local_config() -> Dict:
     ]
 
     for cfg_path in candidates:
-        data = _read_json(cfg_path) if cfg_path.suffix == ".json" else _read_yaml(cfg_path)
+        data = _read_config(cfg_path)
         if data:
             return data
     return {}
@@ -79,11 +128,51 @@ def _build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--shell-name", dest="shell_name", metavar="NAME",
                         help="Custom shell name to display in the prompt")
     # Enable shell functions
-    parser.add_argument("--set-exec-privs", dest="shell_exec_privs", metavar="0|1|2|3",
+    parser.add_argument("--set-exec-privs", dest="shell_exec_privs", metavar="0|1|2|3", type=int,
                         help="Set shell execution privileges (for /exec command). Use with caution! 0 = disabled")
     # Shell mode (built-in vs ExecutionManager)
-    parser.add_argument("--shell-mode", dest="shell_mode", metavar="0|1",
+    parser.add_argument("--shell-mode", dest="shell_mode", metavar="0|1", type=int,
                         help="Set shell execution mode: 0 = system shell, 1 = volt-shell")
+    # Token budget for the context sent with each message
+    parser.add_argument("--context-tokens", dest="context_tokens", metavar="N", type=int,
+                        help="Approximate token budget for the conversation context (0 = unlimited). Older turns "
+                             "are dropped; context_summarize: true in the config summarizes them instead, "
+                             "with extra background LLM requests")
+    # Skip the response cache for this run
+    parser.add_argument("--no-cache", dest="no_cache", action="store_true",
+                        help="Don't use the response cache, even if the config enables it")
+    # Append every message to a JSONL transcript as the chat goes
+    parser.add_argument("--autosave", dest="autosave", action="store_true",
+                        help="Autosave the conversation to <base_dir>/<date>_<persona>.jsonl")
+    # Wait for the whole reply instead of streaming it
+    parser.add_argument("--no-stream", dest="no_stream", action="store_true",
+                        help="Disable token streaming; print the reply once it is complete")
+    # Non-interactive batch mode
+    parser.add_argument("--batch", dest="batch", metavar="FILE",
+                        help="Run the prompts in FILE ('-' for stdin; text or JSONL) instead of chatting")
+    parser.add_argument("--batch-out", dest="batch_out", metavar="PATH",
+                        help="Write --batch results as JSONL to PATH (default: stdout); rerun to resume")
+    parser.add_argument("--batch-concurrency", dest="batch_concurrency", metavar="N", type=int,
+                        help="How many --batch prompts to send at once")
+    parser.add_argument("--batch-order", dest="batch_order", choices=("input", "completion"),
+                        help="Write --batch results in input order or as they complete")
+    # Skip the background connection/model warm-up
+    parser.add_argument("--no-warmup", dest="no_warmup", action="store_true",
+                        help="Don't connect and load the model in the background at startup")
+    # Per-turn and /exec performance metrics, for Prometheus or a JSONL log
+    parser.add_argument("--metrics-export", dest="metrics_export", choices=("none", "prometheus", "jsonl"),
+                        help="Export turn and /exec metrics as a Prometheus textfile or a JSONL log")
+    parser.add_argument("--metrics-path", dest="metrics_path", metavar="PATH",
+                        help="Where --metrics-export writes (default: <base_dir>/volt-metrics/volt-metrics.prom or .jsonl)")
+    # cProfile + tracemalloc around every turn, for /profile
+    parser.add_argument("--profile", dest="profile", action="store_true",
+                        help="Profile every turn; see /profile")
+    # Plain output; chatcolors checks sys.argv for this itself, at import time
+    parser.add_argument("--no-color", dest="no_color", action="store_true",
+                        help="Disable ANSI color output")
+    # Time imports and startup phases (volt-chat.py checks sys.argv for this itself)
+    parser.add_argument("--startup-profile", dest="startup_profile", action="store_true",
+                        help="Print how long each part of startup took")
 
     return parser
 
@@ -101,25 +190,53 @@ def resolve_options() -> argparse.Namespace:
         "shell_name": "volt-shell",
         "shell_exec_privs": 0,
         "shell_mode": 0,  # 0 = system shell, 1 = volt-shell
+        "shell_persist": True,  # shell_mode 0: one long-lived shell for the session (POSIX)
+        "shell_path": "/bin/sh",  # the shell shell_persist keeps running
+        "stream": True,
+        "context_tokens": 8192,
+        "context_summarize": False,
+        "cache": False,
+        "cache_ttl": 7 * 24 * 3600,
+        "cache_max_mb": 64,
+        "transcript_format": "json",  # json | voltz
+        "load_tail": "all",  # all | context | N
+        "autosave": False,
+        "autosave_fsync": "turn",  # always | turn | never
+        "autosave_max_mb": 16,
+        "model_endpoints": [],  # extra servers for /models and /model
+        "models_ttl": 300,
+        "models_timeout": 3,
+        "batch": None,  # set by --batch
+        "batch_out": None,
+        "max_jobs": 4,
+        "parallel_jobs": 0,  # 0 = one per CPU core
+        "backends": [],  # extra servers to route chat requests to: URLs or {url, weight}
+        "hedge_after": 0,  # seconds before a slow request is also sent to a second backend; 0 = off
+        "health_interval": 15,  # seconds between backend health probes
+        "batch_concurrency": 4,  # --batch: prompts in flight at once
+        "batch_order": "input",  # --batch: write results in input | completion order
+        "warmup": True,  # connect and load the model while the first prompt is typed
+        "keep_alive": None,  # how long Ollama keeps the model loaded, e.g. "30m"; None = server default
+        "metrics_export": "none",  # none | prometheus | jsonl
+        "metrics_path": None,  # None = <base_dir>/volt-metrics/volt-metrics.prom (or .jsonl)
+        "profile": False,  # cProfile + tracemalloc around every turn (--profile)
+        "exec_feed": False,  # attach a summary of /exec output to the next chat message
+        "exec_feed_max_bytes": 64 * 1024,  # output kept per command (first quarter + last three quarters)
+        "exec_feed_max_tokens": 1000,  # size of the summary per command
     }
 
     # Load the config file (auto or explicit)
     parser = _build_parser()
 
-    # First parse once to grab --config early
-    initial_args, _ = parser.parse_known_args()
-    if initial_args.config_path:
-        cfg_path = Path(initial_args.config_path).expanduser()
-        cfg = _read_json(cfg_path) if cfg_path.suffix == ".json" else _read_yaml(cfg_path)
+    final_args = parser.parse_args()
+    if final_args.config_path:
+        cfg = _read_config(Path(final_args.config_path).expanduser())
     else:
         cfg = _load_local_config()
 
     # Merge (config overrides defaults)
     merged: Dict = {**defaults, **cfg}
 
-    # Parse again so we get every CLI flag
-    final_args = parser.parse_args()
-
     # Command‑line wins – only override if the flag was actually given
     if final_args.base_url is not None:
         merged["base_url"] = final_args.base_url
@@ -137,6 +254,29 @@ def resolve_options() -> argparse.Namespace:
         merged["shell_exec_privs"] = final_args.shell_exec_privs
     if final_args.shell_mode is not None:
         merged["shell_mode"] = final_args.shell_mode
+    if final_args.context_tokens is not None:
+        merged["context_tokens"] = final_args.context_tokens
+    if final_args.no_cache:
+        merged["cache"] = False
+    if final_args.autosave:
+        merged["autosave"] = True
+    if final_args.no_stream:
+        merged["stream"] = False
+    if final_args.batch is not None:
+        merged["batch"] = final_args.batch
+        merged["batch_out"] = final_args.batch_out
+    if final_args.batch_concurrency is not None:
+        merged["batch_concurrency"] = final_args.batch_concurrency
+    if final_args.batch_order is not None:
+        merged["batch_order"] = final_args.batch_order
+    if final_args.no_warmup:
+        merged["warmup"] = False
+    if final_args.metrics_export is not None:
+        merged["metrics_export"] = final_args.metrics_export
+    if final_args.metrics_path is not None:
+        merged["metrics_path"] = final_args.metrics_path
+    if final_args.profile:
+        merged["profile"] = True
 
     return argparse.Namespace(**merged)
 
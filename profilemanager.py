@@ -0,0 +1,175 @@
+# profilemanager.py
+# 10/18/2026 - Voltur
+#
+# --profile: runs every REPL turn (a slash command through CommandRouter.handle, or a chat
+# message from sending to the rendered reply) under cProfile, with tracemalloc snapshots
+# before and after. /profile shows the hot spots and allocation sites of the last turns;
+# /profile dump writes them as .pstats files for snakeviz, gprof2dot or pstats.
+#
+
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from voltlogger import Logger
+from chatcolors import Colors
+from chatcolors import ChatColors
+
+KEEP = 50           # profiled turns kept for /profile
+TOP = 15            # rows in each /profile table
+
+
+class ProfileManager:
+    def __init__(self):
+        self.enabled = False
+        self.base_dir = os.path.expanduser("~")
+        self.turns = deque(maxlen=KEEP)     # {"label", "time", "elapsed", "stats", "allocs", "peak"}
+        self._lock = threading.Lock()
+        self._running = threading.Lock()    # held by the turn being profiled
+
+    def configure(self, enabled=None, base_dir=None):
+        if base_dir is not None:
+            self.base_dir = base_dir
+        if enabled and not self.enabled:
+            # Only a profiling session pays for these (and for tracemalloc's bookkeeping)
+            import tracemalloc
+            tracemalloc.start()
+            self.enabled = True
+
+    # ----------------------
+    # Profiling a turn
+    # ----------------------
+    def wrap(self, label, fn):
+        """
+        fn, or with profiling on, a function that runs fn under cProfile and keeps
+        the result as one turn. One turn is profiled at a time: from Python 3.12
+        cProfile sits on sys.monitoring, which takes one profiler per process and
+        sees every thread, so a turn starting while another is profiled (a slash
+        command during a reply) runs unprofiled. Before 3.12 cProfile sees the
+        calling thread only, and other threads' work shows up as waits in it.
+        """
+        if not self.enabled or label.lower().startswith("/profile"):
+            return fn       # looking at the profiles shouldn't push them out
+
+        def profiled(*args, **kwargs):
+            import cProfile
+            import pstats
+            import tracemalloc
+            if not self._running.acquire(blocking=False):
+                Logger.log(f"{ChatColors.system}(not profiled: another turn is being profiled){Colors.reset}")
+                return fn(*args, **kwargs)
+            profiler = cProfile.Profile()
+            # Snapshots cover every thread, so a turn overlapping another sees its allocations too
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            started = time.perf_counter()
+            try:
+                return profiler.runcall(fn, *args, **kwargs)
+            finally:
+                self._running.release()
+                elapsed = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1]
+                after = tracemalloc.take_snapshot()
+                ignore = (tracemalloc.Filter(False, tracemalloc.__file__),
+                          tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"))
+                allocs = [(str(diff.traceback[0]), diff.size_diff, diff.count_diff)
+                          for diff in after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+                          if diff.size_diff > 0][:TOP]
+                with self._lock:
+                    self.turns.append({"label": label, "time": time.time(), "elapsed": elapsed,
+                                       "stats": pstats.Stats(profiler), "allocs": allocs, "peak": peak})
+        return profiled
+
+    def _last(self, count):
+        with self._lock:
+            return list(self.turns)[-count:] if count > 0 else []
+
+    # ----------------------
+    # /profile
+    # ----------------------
+    def command(self, args):
+        # /profile [N] | /profile dump [N]
+        if not self.enabled:
+            Logger.log(f"{ChatColors.system}Profiling is off. Start volt-chat with --profile to record turns.{Colors.reset}")
+            return
+        parts = args.split()
+        dump = bool(parts) and parts[0].lower() == "dump"
+        if dump:
+            parts = parts[1:]
+        try:
+            count = int(parts[0]) if parts else (KEEP if dump else 1)
+        except ValueError:
+            Logger.log(f"{Colors.fg.red}Usage: /profile [N] | /profile dump [N]{Colors.reset}")
+            return
+        turns = self._last(count)
+        if not turns:
+            Logger.log(f"{ChatColors.system}No profiled turns yet.{Colors.reset}")
+        elif dump:
+            self.dump(turns)
+        else:
+            self.show(turns)
+
+    def show(self, turns):
+        import pstats
+        combined = pstats.Stats()
+        for turn in turns:
+            combined.add(turn["stats"])
+
+        title = turns[0]["label"] if len(turns) == 1 else f"last {len(turns)} turns"
+        elapsed = sum(turn["elapsed"] for turn in turns)
+        peak = max(turn["peak"] for turn in turns)
+        lines = (f"\n{ChatColors.highlight}Profile of {title} ({elapsed:.2f}s, "
+                 f"peak traced memory {peak / (1024 * 1024):.1f} MB):{Colors.reset}{ChatColors.system}")
+        if len(turns) > 1:
+            for turn in turns:
+                lines += f"\n\t{turn['elapsed']:7.2f}s  {turn['label']}"
+            lines += "\n"
+
+        # pstats keys are (file, line, function); values (primitive calls, calls, own time, cumulative, callers)
+        rows = sorted(combined.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP]
+        lines += f"\n\t{'calls':>9} {'own s':>8} {'cum s':>8}  function"
+        for (path, line, function), (_, calls, own, cumulative, _) in rows:
+            lines += f"\n\t{calls:>9} {own:>8.3f} {cumulative:>8.3f}  {self._where(path, line, function)}"
+
+        allocs = {}
+        for turn in turns:
+            for where, size, count in turn["allocs"]:
+                total = allocs.setdefault(where, [0, 0])
+                total[0] += size
+                total[1] += count
+        if allocs:
+            lines += f"\n\n\t{'KB':>9} {'blocks':>8}  allocated at (and still held after the turn)"
+            for where, (size, count) in sorted(allocs.items(), key=lambda item: item[1][0], reverse=True)[:TOP]:
+                lines += f"\n\t{size / 1024:>9.1f} {count:>8}  {self._short(where)}"
+        Logger.log(f"{lines}{Colors.reset}\n")
+
+    def dump(self, turns):
+        folder = os.path.join(self.base_dir, "volt-profiles")
+        try:
+            os.makedirs(folder, exist_ok=True)
+            for turn in turns:
+                stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(turn["time"]))
+                slug = re.sub(r"[^A-Za-z0-9]+", "-", turn["label"]).strip("-")[:40] or "turn"
+                path = os.path.join(folder, f"{stamp}.{int(turn['time'] * 1000) % 1000:03d}_{slug}.pstats")
+                turn["stats"].dump_stats(path)
+        except OSError as e:
+            Logger.log(f"{Colors.fg.red}Couldn't write profiles: {e}{Colors.reset}")
+            return
+        Logger.log(f"{ChatColors.system}Wrote {len(turns)} .pstats file(s) to {folder}\n"
+                   f"\tpython -m pstats <file>, or snakeviz <file>, to explore one.{Colors.reset}")
+
+    def _where(self, path, line, function):
+        if path == "~":
+            return function     # a builtin, e.g. <method 'read' of '_io.BufferedReader' objects>
+        return f"{function} ({self._short(path)}:{line})"
+
+    def _short(self, path):
+        # requests/models.py or turnmanager.py rather than the whole path
+        marker = "site-packages" + os.sep
+        if marker in path:
+            return path.split(marker, 1)[1]
+        return os.path.basename(path)
+
+ProfileManager = ProfileManager()
@@ -0,0 +1,102 @@
+# promptmanager.py
+# 10/18/2026 - Voltur
+#
+# Cached pieces of the shell prompt: hostname, working directory and git branch.
+# Nothing here forks a process; the prompt is rebuilt before every input().
+#
+
+import os
+import socket
+import time
+
+GIT_RECHECK = 2.0       # seconds before looking for .git above a directory again
+
+
+class PromptManager:
+    def __init__(self):
+        self._hostname = None
+        self._cwd = None
+        self._git_head = {}     # cwd -> (path of the HEAD file or None outside a repo, when looked up)
+        self._branch = {}       # HEAD path -> (mtime, branch)
+
+    def hostname(self):
+        if self._hostname is None:
+            self._hostname = socket.gethostname()
+        return self._hostname
+
+    def set_cwd(self, path):
+        # Called whenever /cd or a volt-shell `cd` moves us
+        self._cwd = path
+
+    def cwd(self):
+        if self._cwd is None:
+            self._cwd = os.getcwd()
+        return self._cwd
+
+    def bash_style_cwd(self):
+        cwd = self.cwd()
+        home = os.path.expanduser('~')
+        if cwd.startswith(home):
+            return '~' + cwd[len(home):]
+        return cwd
+
+    def git_branch(self) -> str | None:
+        cwd = self.cwd()
+        now = time.monotonic()
+        head, checked = self._git_head.get(cwd, (None, None))
+        if checked is None or now - checked > GIT_RECHECK:
+            # A few stat() calls; redone now and then so a git init (or a new
+            # worktree) shows up without leaving the directory
+            head = self._find_git_head(cwd)
+            self._git_head[cwd] = (head, now)
+        if head is None:
+            return None
+
+        # Re-read HEAD only when a checkout has touched it
+        try:
+            mtime = os.stat(head).st_mtime_ns
+        except OSError:
+            self._git_head.pop(cwd, None)
+            return None
+        cached = self._branch.get(head)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        branch = self._read_head(head)
+        self._branch[head] = (mtime, branch)
+        return branch
+
+    def _find_git_head(self, path):
+        while True:
+            dotgit = os.path.join(path, ".git")
+            if os.path.isdir(dotgit):
+                return os.path.join(dotgit, "HEAD")
+            if os.path.isfile(dotgit):
+                # Worktrees and submodules: ".git" is a file pointing at the real git dir
+                try:
+                    with open(dotgit, "r", encoding="utf-8") as f:
+                        line = f.readline().strip()
+                except OSError:
+                    return None
+                if line.startswith("gitdir:"):
+                    gitdir = line[len("gitdir:"):].strip()
+                    return os.path.join(os.path.join(path, gitdir), "HEAD")
+                return None
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+    def _read_head(self, head):
+        try:
+            with open(head, "r", encoding="utf-8") as f:
+                ref = f.readline().strip()
+        except OSError:
+            return None
+        if ref.startswith("ref:"):
+            ref = ref[len("ref:"):].strip()
+            return ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+        # Detached HEAD, same as `git rev-parse --abbrev-ref HEAD`
+        return "HEAD" if ref else None
+
+PromptManager = PromptManager()
@@ -1,155 +1,390 @@
-import shlex
+import json
+from functools import lru_cache
 
-def split_shell_top_level(cmd, delimiters):
+# Operators, longest first so "&&" wins over "&" and ">>" over ">"
+OPERATORS = ("&&", "||", ">>", ";", "&", "|", ">", "(", ")", "\n")
+WORD = "word"
+EOF = "eof"
+
+
+class Token:
+    __slots__ = ("kind", "value", "pos")
+
+    def __init__(self, kind, value, pos):
+        self.kind = kind    # WORD, EOF, or the operator itself
+        self.value = value
+        self.pos = pos
+
+    def __repr__(self):
+        return f"Token({self.kind!r}, {self.value!r})"
+
+
+def tokenize(cmd):
     """
-    Splits a command string by delimiters (like &&, ||, ;) at top level,
-    respecting quotes and parentheses.
-    Returns a list of (segment, operator) pairs.
+    Single pass over the command line. Quoting follows shlex's POSIX rules
+    (single quotes are literal, backslash escapes outside quotes, and inside
+    double quotes only before " and \\). Returns a list of Tokens ending in EOF.
     """
-    segments = []
-    current = ""
-    op = None
-    quote = None
-    escape = False
-    depth = 0
-
+    tokens = []
+    word = []
+    in_word = False     # '' is still a word
+    start = 0
     i = 0
-    while i < len(cmd):
+    n = len(cmd)
+
+    def end_word():
+        nonlocal word, in_word
+        if in_word:
+            tokens.append(Token(WORD, "".join(word), start))
+            word = []
+            in_word = False
+
+    while i < n:
         ch = cmd[i]
 
-        if escape:
-            current += ch
-            escape = False
-            i += 1
+        if ch == "\\":
+            if i + 1 >= n:
+                raise ValueError("No escaped character")
+            if not in_word:
+                in_word, start = True, i
+            word.append(cmd[i + 1])
+            i += 2
             continue
 
-        if ch == "\\":
-            current += ch
-            escape = True
+        if ch == "'":
+            close = cmd.find("'", i + 1)
+            if close < 0:
+                raise ValueError("No closing quotation")
+            if not in_word:
+                in_word, start = True, i
+            word.append(cmd[i + 1:close])
+            i = close + 1
+            continue
+
+        if ch == '"':
+            if not in_word:
+                in_word, start = True, i
             i += 1
+            while True:
+                if i >= n:
+                    raise ValueError("No closing quotation")
+                ch = cmd[i]
+                if ch == '"':
+                    i += 1
+                    break
+                if ch == "\\" and i + 1 < n and cmd[i + 1] in ('"', "\\"):
+                    word.append(cmd[i + 1])
+                    i += 2
+                    continue
+                word.append(ch)
+                i += 1
             continue
 
-        if ch in ("'", '"'):
-            if quote == ch:
-                quote = None
-            elif quote is None:
-                quote = ch
-            current += ch
+        if ch in " \t\r":
+            end_word()
             i += 1
             continue
 
-        if ch == "(" and not quote:
-            depth += 1
-        elif ch == ")" and not quote and depth > 0:
-            depth -= 1
-
-        # Detect top-level operator
-        if not quote and depth == 0:
-            for delim in delimiters:
-                if cmd.startswith(delim, i):
-                    if current.strip():
-                        segments.append((current.strip(), op))
-                    op = delim.strip()
-                    current = ""
-                    i += len(delim)
+        if ch in "&|;<>()\n":
+            if ch == ">" and in_word and "".join(word).isdigit() and cmd[i - 1].isdigit():
+                raise ValueError("Only stdout redirection (> and >>) is supported")
+            end_word()
+            for op in OPERATORS:
+                if cmd.startswith(op, i):
+                    if op == ">" and cmd.startswith(">&", i):
+                        raise ValueError("Only stdout redirection (> and >>) is supported")
+                    tokens.append(Token(op, op, i))
+                    i += len(op)
                     break
             else:
-                current += ch
+                # '<' isn't an operator here; keep it literal like shlex did
+                if not in_word:
+                    in_word, start = True, i
+                word.append(ch)
                 i += 1
-        else:
-            current += ch
-            i += 1
+            continue
 
-    if current.strip():
-        segments.append((current.strip(), op))
-    return segments
+        if not in_word:
+            in_word, start = True, i
+        word.append(ch)
+        i += 1
 
+    end_word()
+    tokens.append(Token(EOF, None, n))
+    return tokens
 
-def parse_redirection(cmd):
-    """
-    Detects > and >> outside quotes and parentheses.
-    Returns (base_cmd, target_file, append)
-    """
-    quote = None
-    escape = False
-    depth = 0
 
-    for i, ch in enumerate(cmd):
-        if escape:
-            escape = False
-            continue
-        if ch == "\\":
-            escape = True
-            continue
-        if ch in ("'", '"'):
-            if quote == ch:
-                quote = None
-            elif not quote:
-                quote = ch
-            continue
-        if ch == "(":
-            depth += 1
-        elif ch == ")" and depth > 0:
-            depth -= 1
-        if not quote and depth == 0:
-            if cmd[i:i+2] == ">>":
-                return cmd[:i].strip(), cmd[i+2:].strip(), True
-            elif ch == ">":
-                return cmd[:i].strip(), cmd[i+1:].strip(), False
-    return cmd.strip(), None, False
-
-
-def parse_pipeline(cmd):
-    """
-    Splits a pipeline (|) respecting quotes and parentheses.
-    Returns list of commands (each as list of tokens).
-    """
-    parts = split_shell_top_level(cmd, ["|"])
-    pipeline = [shlex.split(seg.strip()) for seg, _ in parts]
-    return pipeline
+# ----------------------
+# AST
+# ----------------------
+class Command:
+    def __init__(self, argv, stdout=None, append=False):
+        self.argv = argv
+        self.stdout = stdout
+        self.append = append
 
 
-def parse_raw_command(raw_cmd):
+class Subshell:
+    def __init__(self, body, stdout=None, append=False):
+        self.body = body        # Sequence
+        self.stdout = stdout
+        self.append = append
+
+
+class Parallel:
+    def __init__(self, body, max_workers=None, combine="all", stdout=None, append=False):
+        self.body = body        # Sequence; every item is one branch
+        self.max_workers = max_workers
+        self.combine = combine
+        self.stdout = stdout
+        self.append = append
+
+
+class Pipeline:
+    def __init__(self, commands):
+        self.commands = commands    # [Command | Subshell | Parallel]
+
+
+class AndOr:
+    def __init__(self, first, rest):
+        self.first = first      # Pipeline
+        self.rest = rest        # [("&&" | "||", Pipeline)]
+
+
+class Sequence:
+    def __init__(self, items):
+        self.items = items      # [(AndOr, background)]
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i].kind
+
+    def take(self):
+        token = self.tokens[self.i]
+        self.i += 1
+        return token
+
+    def error(self, message):
+        token = self.tokens[self.i]
+        where = "end of input" if token.kind == EOF else f"'{token.value}'"
+        raise ValueError(f"{message} near {where} (column {token.pos + 1})")
+
+    def parse(self):
+        seq = self.sequence()
+        if self.peek() != EOF:
+            self.error("Unexpected token")
+        return seq
+
+    def sequence(self):
+        items = []
+        while True:
+            # Empty statements (";;", trailing ";") are skipped, like the old parser did
+            while self.peek() in (";", "\n"):
+                self.take()
+            if self.peek() in (EOF, ")"):
+                return Sequence(items)
+            and_or = self.and_or()
+            background = False
+            if self.peek() == "&":
+                self.take()
+                background = True
+            elif self.peek() not in (";", "\n", EOF, ")"):
+                self.error("Unexpected token")
+            items.append((and_or, background))
+
+    def and_or(self):
+        first = self.pipeline()
+        rest = []
+        while self.peek() in ("&&", "||"):
+            op = self.take().kind
+            while self.peek() == "\n":
+                self.take()
+            rest.append((op, self.pipeline()))
+        return AndOr(first, rest)
+
+    def pipeline(self):
+        commands = [self.command()]
+        while self.peek() == "|":
+            self.take()
+            while self.peek() == "\n":
+                self.take()
+            commands.append(self.command())
+        return Pipeline(commands)
+
+    def command(self):
+        if self.peek() == WORD and self.tokens[self.i].value == "parallel" and self._parallel_ahead():
+            return self.parallel()
+
+        if self.peek() == "(":
+            self.take()
+            body = self.sequence()
+            if self.peek() != ")":
+                self.error("Missing ')'")
+            self.take()
+            node = Subshell(body)
+            self.redirects(node)
+            if self.peek() == WORD:
+                self.error("Unexpected word after subshell")
+            return node
+
+        node = Command([])
+        while True:
+            kind = self.peek()
+            if kind == WORD:
+                node.argv.append(self.take().value)
+            elif kind in (">", ">>"):
+                self.redirects(node)
+            else:
+                break
+        if not node.argv:
+            self.error("Missing command")
+        return node
+
+    def _parallel_ahead(self):
+        # "parallel [options] ( ... )" is a group; anything else is a command named parallel
+        j = self.i + 1
+        while self.tokens[j].kind == WORD:
+            j += 1
+        return self.tokens[j].kind == "("
+
+    def parallel(self):
+        self.take()
+        node = Parallel(None)
+        options = []
+        while self.peek() == WORD:
+            options.append(self.take())
+        k = 0
+        while k < len(options):
+            opt = options[k].value
+            if opt in ("-j", "--jobs") and k + 1 < len(options):
+                k += 1
+                value = options[k].value
+            elif opt.startswith("--jobs="):
+                value = opt[len("--jobs="):]
+            elif opt.startswith("-j") and len(opt) > 2:
+                value = opt[2:]
+            elif opt.startswith("--combine="):
+                node.combine = opt[len("--combine="):].replace("-", "_")
+                if node.combine not in ("all", "any", "first_failure"):
+                    raise ValueError(f"parallel: unknown combine policy: {node.combine}")
+                k += 1
+                continue
+            else:
+                raise ValueError(f"parallel: unknown option: {opt}")
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError(f"parallel: bad job count: {value}")
+            node.max_workers = int(value)
+            k += 1
+
+        self.take()  # "(" (checked by _parallel_ahead)
+        node.body = self.sequence()
+        if self.peek() != ")":
+            self.error("Missing ')'")
+        self.take()
+        self.redirects(node)
+        return node
+
+    def redirects(self, node):
+        while self.peek() in (">", ">>"):
+            node.append = self.take().kind == ">>"
+            if self.peek() != WORD:
+                self.error("Missing redirection target")
+            node.stdout = self.take().value
+
+
+@lru_cache(maxsize=256)
+def parse_ast(raw_cmd):
     """
-    Parse raw shell string into structured JSON task format.
+    Parse a raw shell string into an AST (Sequence at the top). Results are cached,
+    so treat the returned nodes as read-only.
     """
-    tasks = []
-    segments = split_shell_top_level(raw_cmd, ["&&", "||", ";"])
-
-    for seg, prev_op in segments:
-        task = {}
-
-        # Background
-        if seg.endswith("&"):
-            task["background"] = True
-            seg = seg[:-1].strip()
-
-        # Subshell
-        if seg.startswith("(") and seg.endswith(")"):
-            inner = seg[1:-1].strip()
-            task["type"] = "subshell"
-            task["tasks"] = parse_raw_command(inner)
-        else:
-            # Redirection
-            base, out, append = parse_redirection(seg)
-            if out:
-                task["stdout"] = out
-                task["append"] = append
-
-            # Pipeline or single command
-            if "|" in base:
-                task["cmd"] = parse_pipeline(base)  
-            else:
-                task["cmd"] = shlex.split(base)
+    return _Parser(tokenize(raw_cmd)).parse()
+
+
+# ----------------------
+# AST -> JSON task format
+# ----------------------
+def _pipeline_task(pipeline):
+    commands = pipeline.commands
+    if len(commands) == 1 and isinstance(commands[0], Parallel):
+        group = commands[0]
+        # One branch per statement; "a && b" stays together as a subshell
+        branches = []
+        for and_or, _ in group.body.items:
+            inner = _and_or_tasks(and_or)
+            branches.append(inner[0] if len(inner) == 1 else {"type": "subshell", "tasks": inner, "run_if": "always"})
+        task = {"type": "parallel", "tasks": branches, "combine": group.combine}
+        if group.max_workers:
+            task["max_workers"] = group.max_workers
+        if group.stdout:
+            task["stdout"] = group.stdout
+            task["append"] = group.append
+        return task
+
+    if len(commands) == 1 and isinstance(commands[0], Subshell):
+        sub = commands[0]
+        task = {"type": "subshell", "tasks": sequence_to_tasks(sub.body)}
+        if sub.stdout:
+            task["stdout"] = sub.stdout
+            task["append"] = sub.append
+        return task
 
-        # Conditional
-        if prev_op == "&&":
-            task["run_if"] = "last_success"
-        elif prev_op == "||":
-            task["run_if"] = "last_failed"
-        else:
-            task["run_if"] = "always"
+    for node in commands:
+        if not isinstance(node, Command):
+            raise ValueError("Subshells and parallel groups can't be part of a pipeline")
+    for node in commands[:-1]:
+        if node.stdout:
+            raise ValueError("Redirection is only supported on the last command of a pipeline")
 
+    task = {}
+    last = commands[-1]
+    if last.stdout:
+        task["stdout"] = last.stdout
+        task["append"] = last.append
+    if len(commands) > 1:
+        task["cmd"] = [node.argv for node in commands]
+    else:
+        task["cmd"] = last.argv
+    return task
+
+
+def _and_or_tasks(and_or):
+    tasks = [_pipeline_task(and_or.first)]
+    tasks[0]["run_if"] = "always"
+    for op, pipeline in and_or.rest:
+        task = _pipeline_task(pipeline)
+        task["run_if"] = "last_success" if op == "&&" else "last_failed"
         tasks.append(task)
+    return tasks
+
 
+def sequence_to_tasks(seq):
+    tasks = []
+    for and_or, background in seq.items:
+        inner = _and_or_tasks(and_or)
+        if background and len(inner) > 1:
+            # "a && b &" backgrounds the whole list, as in sh
+            inner = [{"type": "subshell", "tasks": inner, "run_if": "always"}]
+        if background:
+            inner[0]["background"] = True
+        tasks.extend(inner)
     return tasks
+
+
+@lru_cache(maxsize=256)
+def _compile(raw_cmd):
+    # Cached as JSON text: loading it back is a cheap way to hand out a fresh copy
+    return json.dumps(sequence_to_tasks(parse_ast(raw_cmd)))
+
+
+def parse_raw_command(raw_cmd):
+    """
+    Parse raw shell string into structured JSON task format.
+    Raises ValueError on a syntax error.
+    """
+    return json.loads(_compile(raw_cmd))
@@ -0,0 +1,155 @@
+# responsecache.py
+# 10/18/2026 - Voltur
+#
+# Optional on-disk cache of LLM replies, keyed by everything that goes into a request.
+# Replays repeated prompts (scripted sessions, /history resends) without a round trip.
+#
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from voltlogger import Logger
+from chatcolors import Colors
+from chatcolors import ChatColors
+
+
+class ResponseCache:
+    def __init__(self):
+        self.enabled = False
+        self.path = os.path.join(os.path.expanduser('~'), ".volt-cache.sqlite")
+        self.ttl = 7 * 24 * 3600       # seconds, 0 = never expire
+        self.max_bytes = 64 * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        self._lock = threading.Lock()   # turns run on worker threads
+
+    def configure(self, enabled=None, path=None, ttl=None, max_mb=None):
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if path is not None and path != self.path:
+            self.close()
+            self.path = path
+        if ttl is not None:
+            self.ttl = int(ttl)
+        if max_mb is not None:
+            self.max_bytes = int(float(max_mb) * 1024 * 1024)
+
+    def _conn(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, reply TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._db.commit()
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def key(self, client, messages):
+        # Model, the full message list (system prompt included) and sampling settings
+        request = {
+            "model": client.model,
+            "messages": messages,
+            "temperature": client.temperature,
+        }
+        blob = json.dumps(request, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._conn()
+                row = db.execute("SELECT reply, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and self.ttl and row[1] + self.ttl < now:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+                elif row:
+                    db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                db.commit()
+        except sqlite3.Error as e:
+            Logger.debug(f"Response cache unavailable: {e}")
+            return None
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key, reply):
+        now = time.time()
+        size = len(reply.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        try:
+            with self._lock:
+                db = self._conn()
+                db.execute("INSERT OR REPLACE INTO responses (key, reply, size, created, accessed) "
+                           "VALUES (?, ?, ?, ?, ?)", (key, reply, size, now, now))
+                self._evict(db, now)
+                db.commit()
+        except sqlite3.Error as e:
+            Logger.debug(f"Response cache unavailable: {e}")
+
+    def _evict(self, db, now):
+        if self.ttl:
+            db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        # Least recently used first, until we are back under the size cap
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        db.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def clear(self):
+        try:
+            with self._lock:
+                db = self._conn()
+                db.execute("DELETE FROM responses")
+                db.commit()
+        except sqlite3.Error as e:
+            # Unlike get/put (quietly skipped, at debug), someone asked for this: say it failed
+            Logger.warn(f"Couldn't clear the response cache: {e}")
+            return
+        Logger.log(f"\n{ChatColors.system}Response cache cleared.{Colors.reset}\n")
+
+    def show(self):
+        state = "on" if self.enabled else "off"
+        entries, size = 0, 0
+        if os.path.exists(self.path):
+            try:
+                with self._lock:
+                    entries, size = self._conn().execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            except sqlite3.Error:
+                pass
+        lookups = self.hits + self.misses
+        rate = f" ({100 * self.hits / lookups:.0f}% hit rate)" if lookups else ""
+        Logger.log(
+            f"\n{ChatColors.highlight}Response cache ({state}):{Colors.reset}\n"
+            f"{ChatColors.system}"
+            f"\tThis session:  {self.hits} hits, {self.misses} misses{rate}\n"
+            f"\tStored:        {entries} replies, {size / 1024:.1f} KB of {self.max_bytes / (1024 * 1024):.0f} MB\n"
+            f"\tFile:          {self.path}"
+            f"{Colors.reset}\n"
+        )
+
+ResponseCache = ResponseCache()
@@ -0,0 +1,281 @@
+# shellcoprocess.py
+# 10/18/2026 - Voltur
+#
+# One long-lived /bin/sh per session for shell_mode 0. Commands are written to the shell's
+# stdin and run in its own process, so exported variables, aliases, functions and cd
+# survive from one /exec to the next and no shell starts up per command. After every
+# command the shell reports "<sentinel> <exit status> <PWD>" on a status pipe. A shell
+# that dies (exit, a crash) is started again for the next command.
+#
+# POSIX only; elsewhere CommandRouter keeps starting a shell per command.
+#
+
+import fcntl
+import os
+import select
+import signal
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from voltlogger import Logger
+from chatcolors import Colors
+from chatcolors import ChatColors
+
+CHUNK_SIZE = 64 * 1024
+KILL_AFTER = 1.0        # seconds after Ctrl-C before a shell that's still busy is killed
+TERMINAL_FD = 8         # the shell's copy of our stdin, for the commands (sh only takes fds 0-9)
+STATUS_FD = 9           # the shell's end of the status pipe
+
+
+def _quote(text):
+    return "'" + text.replace("'", "'\\''") + "'"
+
+
+class ShellCoprocess:
+    supported = hasattr(os, "posix_spawnp")
+
+    def __init__(self, program="/bin/sh"):
+        self.program = program
+        self.cwd = None             # the shell's PWD after the last command
+        self.last_start = None      # seconds the last (re)start took, None if the shell was running
+        self._pid = None
+        self._commands = None       # write end of the shell's stdin
+        self._status = None         # read end of the status pipe
+        self.returncode = None      # of the last shell, once it has exited
+        self._pending = b""
+        self._sentinel = None
+        self._fifos = None          # (stdout, stderr) paths for captured runs
+        self._lock = threading.Lock()
+
+    # ----------------------
+    # Starting the shell
+    # ----------------------
+    def _script(self, cwd):
+        # The helpers every command runs through. The syntax check runs in a subshell
+        # first: a syntax error in eval would make a non-interactive sh exit.
+        go_to = f"cd -- {_quote(cwd)}" if cwd else ":"
+        return f"""
+trap ':' INT
+__volt_body() {{
+    if [ -n "$1" ]; then cd -- "$1" || return 1; fi
+    __volt_cmd=$2
+    shift $#
+    if ( eval "if false; then
+$__volt_cmd
+fi" ) 2>/dev/null; then
+        eval "$__volt_cmd"
+    else
+        ( eval "$__volt_cmd" )
+    fi
+}}
+__volt_done() {{
+    printf '%s %s %s\\n' {self._sentinel} "$1" "$PWD" >&{STATUS_FD}
+}}
+__volt_run() {{
+    __volt_body "$1" "$2" <&{TERMINAL_FD} {TERMINAL_FD}<&- {STATUS_FD}>&-
+    __volt_done $?
+}}
+__volt_capture() {{
+    __volt_body "$1" "$2" <&{TERMINAL_FD} >"$3" 2>"$4" {TERMINAL_FD}<&- {STATUS_FD}>&-
+    __volt_done $?
+}}
+{go_to}
+__volt_done $?
+"""
+
+    def _start(self, cwd):
+        started = time.perf_counter()
+        self._sentinel = "__volt_" + uuid.uuid4().hex
+        commands_r, commands_w = os.pipe()
+        status_r, status_w = os.pipe()
+        opened = sys.stdin is None or sys.stdin.closed
+        terminal = os.open(os.devnull, os.O_RDONLY) if opened else sys.stdin.fileno()
+        # Out of the way of the fixed numbers first, so no dup2 below overwrites another's source
+        high = [fcntl.fcntl(fd, fcntl.F_DUPFD_CLOEXEC, 10) for fd in (terminal, status_w, commands_r)]
+        try:
+            self._pid = os.posix_spawnp(self.program, [self.program], os.environ, file_actions=[
+                (os.POSIX_SPAWN_DUP2, high[0], TERMINAL_FD),
+                (os.POSIX_SPAWN_DUP2, high[1], STATUS_FD),
+                (os.POSIX_SPAWN_DUP2, high[2], 0),
+            ])
+        finally:
+            for fd in high + [commands_r, status_w] + ([terminal] if opened else []):
+                os.close(fd)
+        self.returncode = None
+        self._commands = os.fdopen(commands_w, "wb")
+        self._status = status_r
+        self._pending = b""
+        self._send(self._script(cwd))
+        code, self.cwd = self._wait_status(None)
+        if code is None:
+            raise OSError(f"{self.program} exited during startup")
+        self.last_start = time.perf_counter() - started
+
+    def _send(self, text):
+        self._commands.write(text.encode("utf-8"))
+        self._commands.flush()
+
+    def _alive(self):
+        if self._pid is None or self.returncode is not None:
+            return False
+        pid, status = os.waitpid(self._pid, os.WNOHANG)
+        if pid == 0:
+            return True
+        self.returncode = os.waitstatus_to_exitcode(status)
+        return False
+
+    def _wait(self):
+        if self.returncode is None:
+            _, status = os.waitpid(self._pid, 0)
+            self.returncode = os.waitstatus_to_exitcode(status)
+        return self.returncode
+
+    def _kill(self):
+        try:
+            os.kill(self._pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self):
+        # The shell died: collect it and forget its pipes
+        try:
+            self._commands.close()
+        except OSError:
+            pass
+        self._wait()
+        os.close(self._status)
+        self._pid = self._commands = self._status = None
+
+    # ----------------------
+    # Running a command
+    # ----------------------
+    def run(self, command, cwd=None, stdout=None, stderr=None, stop=None):
+        """
+        Run command in the shell (cd'ing to cwd first if the shell is elsewhere) and
+        return its exit status. Output goes to the terminal, or to the binary sinks
+        stdout and stderr when given. Setting stop (Ctrl-C) lets the command end; a
+        shell still busy KILL_AFTER seconds later is killed and replaced.
+        """
+        with self._lock:
+            self.last_start = None
+            if not self._alive():
+                if self._pid is not None:
+                    self._reap()
+                self._start(cwd)
+
+            where = cwd if cwd and cwd != self.cwd else ""
+            drains = []
+            if stdout is not None or stderr is not None:
+                out_path, err_path = self._fifo_paths()
+                drains = [self._drain(out_path, stdout), self._drain(err_path, stderr)]
+                line = f"__volt_capture {_quote(where)} {_quote(command)} {_quote(out_path)} {_quote(err_path)}\n"
+            else:
+                sys.stdout.flush()  # our own prints must land before the command's output
+                line = f"__volt_run {_quote(where)} {_quote(command)}\n"
+
+            try:
+                self._send(line)
+                code, pwd = self._wait_status(stop)
+            except (BrokenPipeError, OSError):
+                code, pwd = None, None
+            if code is None:
+                # The shell exited with the command (exit, exec, a signal): report that instead
+                code = self._wait()
+                code = code if code >= 0 else 128 - code
+                self._reap()
+                self.cwd = None
+                Logger.log(f"{ChatColors.system}(the shell exited; the next /exec starts a new one){Colors.reset}")
+            else:
+                self.cwd = pwd
+            for thread, path in drains:
+                self._finish_drain(thread, path)
+            return code
+
+    def _wait_status(self, stop):
+        # (exit status, PWD) from the next status line; (None, None) if the shell went away
+        deadline = None
+        marker = self._sentinel.encode() + b" "
+        while True:
+            if b"\n" in self._pending:
+                line, self._pending = self._pending.split(b"\n", 1)
+                if line.startswith(marker):
+                    code, _, pwd = line[len(marker):].decode("utf-8", "replace").partition(" ")
+                    return int(code), pwd
+                continue
+            if stop is not None and stop.is_set() and deadline is None:
+                deadline = time.monotonic() + KILL_AFTER
+            if deadline is not None and time.monotonic() > deadline:
+                # e.g. a loop of builtins, which the shell's INT trap keeps going
+                self._kill()
+            ready, _, _ = select.select([self._status], [], [], 0.1)
+            if ready:
+                data = os.read(self._status, 4096)
+                if not data:
+                    return None, None
+                self._pending += data
+
+    # ----------------------
+    # Captured output
+    # ----------------------
+    def _fifo_paths(self):
+        # Named pipes the shell redirects a captured command to; one pair, reused
+        if self._fifos is None:
+            folder = tempfile.mkdtemp(prefix="volt-shell-")
+            self._fifos = (os.path.join(folder, "stdout"), os.path.join(folder, "stderr"))
+            for path in self._fifos:
+                os.mkfifo(path, 0o600)
+        return self._fifos
+
+    def _drain(self, path, sink):
+        def copy():
+            # Opening blocks until the shell opens its end; EOF comes when the command's done with it
+            try:
+                with open(path, "rb") as pipe:
+                    while True:
+                        chunk = pipe.read1(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        if sink is not None:
+                            sink.write(chunk)
+                            sink.flush()
+            except (OSError, ValueError):
+                pass
+        thread = threading.Thread(target=copy, daemon=True)
+        thread.start()
+        return thread, path
+
+    def _finish_drain(self, thread, path):
+        thread.join(0.5)
+        if thread.is_alive():
+            # The shell never opened its end (it died first): open it for the reader, so it sees EOF
+            try:
+                os.close(os.open(path, os.O_WRONLY | os.O_NONBLOCK))
+            except OSError:
+                pass    # a background job still holds it; its output keeps flowing to the sink
+            thread.join(0.5)
+
+    def close(self):
+        with self._lock:
+            if self._alive():
+                self._commands.close()      # EOF: the shell exits
+                deadline = time.monotonic() + 1
+                while self._alive() and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                if self._alive():
+                    self._kill()
+            if self._pid is not None:
+                self._reap()
+            if self._fifos:
+                for path in self._fifos:
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                try:
+                    os.rmdir(os.path.dirname(self._fifos[0]))
+                except OSError:
+                    pass
+                self._fifos = None
@@ -0,0 +1,119 @@
+# startupprofiler.py
+# 10/18/2026 - Voltur
+#
+# --startup-profile: time every module import and each initialization phase up to the
+# first prompt, then print where the time went.
+#
+
+import sys
+import time
+from contextlib import contextmanager
+
+
+class _TimedLoader:
+    # Wraps a module loader so exec_module (the import's real work) gets timed
+    def __init__(self, loader, name, profiler):
+        self._loader = loader
+        self._name = name
+        self._profiler = profiler
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter()
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._leave(self._name, time.perf_counter() - started)
+
+
+class _TimingFinder:
+    # First on sys.meta_path; asks the real finders and wraps whatever they find
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, name, self._profiler)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.imports = {}       # module -> (total seconds, self seconds)
+        self.phases = []        # (name, seconds)
+        self._stack = []        # time spent in nested imports, per level
+        self._started = None
+        self._finder = None
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._started = time.perf_counter()
+        self._finder = _TimingFinder(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def elapsed(self):
+        # Seconds since enable()
+        return time.perf_counter() - self._started if self.enabled else 0.0
+
+    def _enter(self):
+        self._stack.append(0.0)
+
+    def _leave(self, name, elapsed):
+        nested = self._stack.pop()
+        if self._stack:
+            self._stack[-1] += elapsed
+        self.imports[name] = (elapsed, elapsed - nested)
+
+    @contextmanager
+    def phase(self, name):
+        # with StartupProfiler.phase("..."): times one step of initialization
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def report(self, top=15):
+        """
+        Print the slowest imports and every phase, then stop timing. Safe to call when
+        profiling is off.
+        """
+        if not self.enabled:
+            return
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        total = time.perf_counter() - self._started
+        from voltlogger import Logger
+        from chatcolors import Colors
+        from chatcolors import ChatColors
+
+        lines = f"\n{ChatColors.highlight}Startup profile ({total * 1000:.0f} ms to the first prompt):{Colors.reset}{ChatColors.system}"
+        lines += "\n\tPhase                              ms"
+        for name, seconds in self.phases:
+            lines += f"\n\t{name:<30} {seconds * 1000:6.1f}"
+        lines += f"\n\n\tSlowest imports ({len(self.imports)} modules)   total ms   self ms"
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        for name, (cumulative, own) in slowest:
+            lines += f"\n\t{name:<34} {cumulative * 1000:8.1f}  {own * 1000:8.1f}"
+        Logger.log(f"{lines}{Colors.reset}\n")
+        self.enabled = False
+
+StartupProfiler = StartupProfiler()
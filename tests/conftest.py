@@ -0,0 +1,10 @@
+# conftest.py
+# 10/18/2026 - Voltur
+#
+# The modules live at the top of the repo, next to volt-chat.py; make them importable.
+#
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,109 @@
+# test_compacttranscript.py
+# 10/18/2026 - Voltur
+#
+# .voltz transcripts: round trip, tail loads, conversion and damaged files.
+#
+
+import json
+
+import pytest
+
+import compacttranscript
+from contextmanager import estimate_tokens
+
+
+def conversation(turns):
+    messages = [{"role": "system", "content": "You are Volt."}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} ✓"})
+        messages.append({"role": "assistant", "content": f"answer {i} " + "x" * (i % 50)})
+    return messages
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "chat.voltz")
+    messages = conversation(100)
+    compacttranscript.write(path, messages)
+
+    assert compacttranscript.read(path) == messages
+    count, frames = compacttranscript.info(path)
+    assert count == len(messages)
+    # System prompt on its own, then 200 messages in frames of 64
+    assert frames == 1 + 4
+    assert not (tmp_path / "chat.voltz.tmp").exists()
+
+
+def test_round_trip_without_system_prompt(tmp_path):
+    path = str(tmp_path / "chat.voltz")
+    messages = conversation(3)[1:]
+    compacttranscript.write(path, messages)
+    assert compacttranscript.read(path) == messages
+    assert compacttranscript.read(path, last=2) == messages[-2:]
+
+
+def test_empty_transcript(tmp_path):
+    path = str(tmp_path / "empty.voltz")
+    compacttranscript.write(path, [])
+    assert compacttranscript.read(path) == []
+    assert compacttranscript.info(path) == (0, 0)
+
+
+def test_tail_keeps_the_system_prompt(tmp_path):
+    path = str(tmp_path / "chat.voltz")
+    messages = conversation(100)
+    compacttranscript.write(path, messages)
+
+    assert compacttranscript.read(path, last=5) == messages[:1] + messages[-5:]
+    assert compacttranscript.read(path, last=0) == messages[:1]
+    assert compacttranscript.read(path, last=1000) == messages
+
+
+def test_tail_fits_the_budget(tmp_path):
+    path = str(tmp_path / "chat.voltz")
+    messages = conversation(100)
+    compacttranscript.write(path, messages)
+
+    budget = 300
+    loaded = compacttranscript.read(path, budget=budget)
+    assert loaded[0] == messages[0]
+    assert loaded[1:] == messages[len(messages) - len(loaded) + 1:]
+    assert sum(estimate_tokens(m) for m in loaded) <= budget
+    # One more message would not have fit
+    extra = messages[len(messages) - len(loaded)]
+    assert sum(estimate_tokens(m) for m in loaded) + estimate_tokens(extra) > budget
+
+
+def test_failed_write_leaves_nothing_behind(tmp_path):
+    path = str(tmp_path / "chat.voltz")
+    with pytest.raises(TypeError):
+        compacttranscript.write(path, [{"role": "user", "content": object()}])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_convert(tmp_path):
+    messages = conversation(10)
+    source = tmp_path / "chat.json"
+    source.write_text(json.dumps(messages), encoding="utf-8")
+    target = compacttranscript.convert(str(source))
+    assert target == str(tmp_path / "chat.voltz")
+    assert compacttranscript.read(target) == messages
+    assert source.exists()
+
+    log = tmp_path / "log.jsonl"
+    log.write_text("".join(json.dumps(m) + "\n" for m in messages), encoding="utf-8")
+    target = compacttranscript.convert(str(log), remove=True)
+    assert compacttranscript.read(target) == messages
+    assert not log.exists()
+
+
+@pytest.mark.parametrize("damage, message", [
+    (lambda data: b"NOTVOLT" + data[7:], "Not a .voltz transcript"),
+    (lambda data: data[:-4], "Truncated .voltz transcript"),
+    (lambda data: data[:20] + b"\0" * 16 + data[36:], "Damaged .voltz frame"),
+])
+def test_damaged_files(tmp_path, damage, message):
+    path = tmp_path / "chat.voltz"
+    compacttranscript.write(str(path), conversation(5))
+    path.write_bytes(damage(path.read_bytes()))
+    with pytest.raises(ValueError, match=message):
+        compacttranscript.read(str(path))
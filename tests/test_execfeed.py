@@ -0,0 +1,62 @@
+# test_execfeed.py
+# 10/18/2026 - Voltur
+#
+# exec_feed: head + tail trimming in OutputCapture and the summary built from it.
+#
+
+from execfeedmanager import ExecFeedManager, OutputCapture
+
+
+def capture_of(*chunks, max_bytes=1024):
+    capture = OutputCapture(max_bytes)
+    for chunk in chunks:
+        capture.write(chunk)
+    return capture
+
+
+def test_small_output_is_kept_whole():
+    head, tail, gap = capture_of(b"one\n", b"two\n").parts()
+    assert (head + tail, gap) == ("one\ntwo\n", 0)
+
+
+def test_overflow_keeps_the_first_quarter_and_the_last_three():
+    data = bytes(range(256)) * 40
+    capture = capture_of(*(data[i:i + 100] for i in range(0, len(data), 100)))
+    gap = capture.parts()[2]
+    assert capture.total == len(data)
+    assert len(b"".join(capture.head)) == 256
+    assert b"".join(capture.tail)[-768:] == data[-768:]
+    assert gap == len(data) - 256 - 768
+
+
+def test_line_count():
+    assert capture_of(b"a\nb\n").lines() == 2
+    assert capture_of(b"a\nb").lines() == 2
+
+
+def summary(*chunks):
+    ExecFeedManager.configure(enabled=True, max_bytes=1024, max_tokens=100)
+    return ExecFeedManager._summarize("cmd", capture_of(*chunks, max_bytes=1024), 0)
+
+
+def test_repeated_lines_are_folded():
+    text = summary(b"same\n" * 50 + b"done\n")
+    assert "same  [x50]" in text
+    assert text.endswith("done\n```")
+
+
+def test_long_output_shows_both_ends():
+    text = summary(b"".join(b"line %d\n" % i for i in range(500)))
+    assert "line 0\n" in text and "line 499\n" in text
+    assert "lines not shown" in text
+
+
+def test_one_long_line_still_shows_its_ends():
+    text = summary(b'{"start":' + b"1," * 5000 + b'"end":0}\n')
+    assert '{"start":1' in text
+    assert '"end":0}' in text
+
+
+def test_progress_bar_keeps_its_last_state():
+    text = summary(b"".join(b"\r%3d%%" % i for i in range(1000)) + b"\n")
+    assert "999%" in text
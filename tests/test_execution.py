@@ -0,0 +1,84 @@
+# test_execution.py
+# 10/18/2026 - Voltur
+#
+# volt-shell task lists: exit codes, exit, subshells and builtins.
+#
+
+import io
+
+import pytest
+
+from ExecutionManager import ExecutionManager
+from raw_parser import parse_raw_command
+
+
+def run(command, manager=None):
+    # (exit code, stdout) of a volt-shell command line
+    out = io.BytesIO()
+    manager = manager or ExecutionManager()
+    manager.stdout = manager.stderr = out
+    code = manager.exec_tasks(parse_raw_command(command))
+    return code, out.getvalue().decode()
+
+
+def test_exit_ends_the_task_list():
+    manager = ExecutionManager(stdout=io.BytesIO())
+    with pytest.raises(SystemExit) as raised:
+        manager.exec_tasks(parse_raw_command("exit 3; echo x"))
+    assert raised.value.code == 3
+    assert manager.stdout.getvalue() == b""
+
+
+def test_exit_in_a_subshell_ends_only_the_subshell():
+    assert run("( exit 3; echo x )") == (3, "")
+    assert run("( exit 4 ); echo after") == (0, "after\n")
+    assert run("( exit 5 ) || echo failed") == (0, "failed\n")
+
+
+def test_exit_in_a_pipeline_stage_stays_in_the_stage():
+    assert run("exit 4 | true")[0] == 0
+
+
+def test_conditionals_follow_exit_codes():
+    assert run("true && echo yes") == (0, "yes\n")
+    assert run("false && echo yes") == (1, "")
+    assert run("false || echo no") == (0, "no\n")
+
+
+def test_subshell_keeps_cd_and_export_to_itself(tmp_path):
+    manager = ExecutionManager()
+    manager.cwd = str(tmp_path)
+    code, out = run(f"( cd /; export X=1; pwd ); pwd; env | grep ^X=", manager)
+    assert out.splitlines() == ["/", str(tmp_path)]
+    assert code == 1
+
+
+def test_export_reaches_commands_and_expands_variables():
+    manager = ExecutionManager()
+    run("export A=one B=$A-two", manager)
+    assert manager.env["B"] == "one-two"
+    assert run("sh -c 'echo $B'", manager) == (0, "one-two\n")
+
+
+def test_builtins_in_pipelines_and_redirection(tmp_path):
+    manager = ExecutionManager()
+    manager.cwd = str(tmp_path)
+    assert run("echo hello | tr a-z A-Z", manager) == (0, "HELLO\n")
+    assert run("echo one > out.txt; echo two >> out.txt", manager)[0] == 0
+    assert (tmp_path / "out.txt").read_text() == "one\ntwo\n"
+
+
+def test_missing_command_after_a_builtin_stage():
+    manager = ExecutionManager()
+    manager.env["BIG"] = "x" * 100000    # more than a pipe holds
+    assert run("env | no-such-command-here", manager)[0] == 127
+
+
+@pytest.mark.parametrize("command, code", [
+    ("test -d /", 0),
+    ("[ a = b ]", 1),
+    ("[ 2 -lt 3 -a ! -z x ]", 0),
+    ("[ 1 -eq x ]", 2),
+])
+def test_test_builtin(command, code):
+    assert run(command)[0] == code
@@ -0,0 +1,107 @@
+# test_raw_parser.py
+# 10/18/2026 - Voltur
+#
+# Raw command line -> task list: quoting, operators, redirection, groups and errors.
+#
+
+import re
+
+import pytest
+
+from raw_parser import parse_raw_command, tokenize, WORD
+
+
+def words(cmd):
+    return [t.value for t in tokenize(cmd) if t.kind == WORD]
+
+
+def test_quoting_follows_posix_shlex():
+    assert words("echo 'a b' \"c \\\" d\" e\\ f ''") == ["echo", "a b", 'c " d', "e f", ""]
+    assert words("echo 'it''s'") == ["echo", "its"]
+    assert words('echo "a\\nb"') == ["echo", "a\\nb"]
+
+
+def test_operators_split_words_without_spaces():
+    assert [t.kind for t in tokenize("a&&b||c;d|e>f>>g&")] == [
+        WORD, "&&", WORD, "||", WORD, ";", WORD, "|", WORD, ">", WORD, ">>", WORD, "&", "eof"]
+
+
+def test_single_command():
+    assert parse_raw_command("ls -la") == [{"cmd": ["ls", "-la"], "run_if": "always"}]
+
+
+def test_and_or_and_sequence():
+    assert parse_raw_command("a && b || c; d") == [
+        {"cmd": ["a"], "run_if": "always"},
+        {"cmd": ["b"], "run_if": "last_success"},
+        {"cmd": ["c"], "run_if": "last_failed"},
+        {"cmd": ["d"], "run_if": "always"},
+    ]
+
+
+def test_empty_statements_are_skipped():
+    assert parse_raw_command(";; a ;\n\n b ;") == [
+        {"cmd": ["a"], "run_if": "always"},
+        {"cmd": ["b"], "run_if": "always"},
+    ]
+    assert parse_raw_command("") == []
+
+
+def test_pipeline_with_redirection():
+    assert parse_raw_command("cat f | grep x >> out") == [
+        {"cmd": [["cat", "f"], ["grep", "x"]], "stdout": "out", "append": True, "run_if": "always"}]
+
+
+def test_background_list_becomes_one_subshell():
+    assert parse_raw_command("a && b &") == [{
+        "type": "subshell", "run_if": "always", "background": True,
+        "tasks": [{"cmd": ["a"], "run_if": "always"}, {"cmd": ["b"], "run_if": "last_success"}],
+    }]
+
+
+def test_subshell_with_redirection():
+    assert parse_raw_command("(a; b) > out") == [{
+        "type": "subshell", "stdout": "out", "append": False, "run_if": "always",
+        "tasks": [{"cmd": ["a"], "run_if": "always"}, {"cmd": ["b"], "run_if": "always"}],
+    }]
+
+
+def test_parallel_group():
+    assert parse_raw_command("parallel -j 2 --combine=any (a; b && c)") == [{
+        "type": "parallel", "combine": "any", "max_workers": 2, "run_if": "always",
+        "tasks": [
+            {"cmd": ["a"], "run_if": "always"},
+            {"type": "subshell", "run_if": "always", "tasks": [
+                {"cmd": ["b"], "run_if": "always"}, {"cmd": ["c"], "run_if": "last_success"}]},
+        ],
+    }]
+    # Without a group it is just a command called parallel
+    assert parse_raw_command("parallel -j 2") == [{"cmd": ["parallel", "-j", "2"], "run_if": "always"}]
+
+
+def test_results_are_fresh_copies():
+    first = parse_raw_command("echo hi")
+    first[0]["cmd"].append("changed")
+    assert parse_raw_command("echo hi") == [{"cmd": ["echo", "hi"], "run_if": "always"}]
+
+
+@pytest.mark.parametrize("command, message", [
+    ("echo 'open", "No closing quotation"),
+    ('echo "open', "No closing quotation"),
+    ("echo \\", "No escaped character"),
+    ("echo 2> err", "Only stdout redirection"),
+    ("echo >&2", "Only stdout redirection"),
+    ("(a; b", "Missing ')'"),
+    ("a &&", "Missing command"),
+    ("| a", "Missing command"),
+    ("echo >", "Missing redirection target"),
+    ("(a) b", "Unexpected word after subshell"),
+    ("a )", "Unexpected token"),
+    ("a > x | b", "Redirection is only supported on the last command"),
+    ("a | (b)", "can't be part of a pipeline"),
+    ("parallel -x (a)", "unknown option"),
+    ("parallel -j 0 (a)", "bad job count"),
+])
+def test_syntax_errors(command, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        parse_raw_command(command)
@@ -0,0 +1,293 @@
+# transcriptindex.py
+# 10/18/2026 - Voltur
+#
+# SQLite catalog of saved transcripts (<base_dir>/.volt-transcripts.sqlite) with full-text
+# search over every message. Kept up to date on save/autosave and reconciled by mtime.
+#
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from voltlogger import Logger
+
+TRANSCRIPT_EXTENSIONS = ('.json', '.jsonl', '.voltz')
+INDEX_NAME = ".volt-transcripts.sqlite"
+INDEX_VERSION = 1   # bumped when what counts as a transcript changes; older indexes are rebuilt
+
+# YYYY-MM-DD_HHMM_<persona>[_partN].json|jsonl|voltz, as written by TranscriptManager
+NAME_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})_(\d{2})(\d{2})_(.+?)(?:_part\d+)?\.(?:jsonl?|voltz)$")
+
+
+def _describe_name(name, mtime):
+    # (model, created) from the file name, falling back to the file's mtime
+    match = NAME_PATTERN.match(name)
+    if match:
+        day, hour, minute, model = match.groups()
+        return model, f"{day} {hour}:{minute}"
+    return None, time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime))
+
+
+def _is_message(record):
+    # A chat message, as opposed to any other JSON record (a metrics log, say)
+    return isinstance(record, dict) and "role" in record and "content" in record
+
+
+def _first_user_line(messages):
+    for m in messages:
+        if m.get("role") == "user" and isinstance(m.get("content"), str):
+            line = m["content"].strip().splitlines()
+            return line[0][:120] if line else ""
+    return None
+
+
+def _fts_query(terms):
+    # Every word must match; quoted so punctuation can't break the FTS syntax
+    words = terms.split()
+    return " ".join('"' + w.replace('"', '""') + '"' for w in words)
+
+
+class TranscriptIndex:
+    def __init__(self):
+        self.base_dir = None
+        self.fts = True
+        self._db = None
+        self._lock = threading.Lock()   # reconcile runs on a background thread
+        self._ready = threading.Event()
+        self._ready.set()
+
+    def _conn(self, base_dir):
+        if self._db is not None and base_dir != self.base_dir:
+            self.close()
+        if self._db is None:
+            self.base_dir = base_dir
+            db = sqlite3.connect(os.path.join(base_dir, INDEX_NAME), check_same_thread=False)
+            # A derived cache: it can always be rebuilt, so favor speed over durability
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                " name TEXT PRIMARY KEY, mtime REAL NOT NULL, size INTEGER NOT NULL,"
+                " model TEXT, created TEXT, message_count INTEGER NOT NULL DEFAULT 0,"
+                " first_user TEXT, is_transcript INTEGER NOT NULL DEFAULT 1)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " id INTEGER PRIMARY KEY, name TEXT NOT NULL, role TEXT, content TEXT)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS messages_name ON messages (name)")
+            if db.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+                db.execute("DELETE FROM messages")
+                db.execute("DELETE FROM transcripts")
+                db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+            try:
+                # External-content FTS table; the triggers keep it in step with messages
+                db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+                           "content, content='messages', content_rowid='id')")
+                db.execute("CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN"
+                           " INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content); END")
+                db.execute("CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN"
+                           " INSERT INTO messages_fts (messages_fts, rowid, content)"
+                           " VALUES ('delete', old.id, old.content); END")
+                self.fts = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: search falls back to LIKE
+                self.fts = False
+            db.commit()
+            self._db = db
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ----------------------
+    # Keeping the index current
+    # ----------------------
+    def reconcile_in_background(self, base_dir, read):
+        """
+        Bring the index in line with the files in base_dir: index new and changed
+        (by mtime/size) transcripts and forget deleted ones. Queries wait for it.
+        """
+        self._ready.clear()
+        threading.Thread(target=self._reconcile, args=(base_dir, read), daemon=True).start()
+
+    def _reconcile(self, base_dir, read):
+        try:
+            self.reconcile(base_dir, read)
+        except (OSError, sqlite3.Error) as e:
+            Logger.debug(f"Transcript index unavailable: {e}")
+        finally:
+            self._ready.set()
+
+    def reconcile(self, base_dir, read):
+        on_disk = {}
+        for entry in os.scandir(base_dir):
+            if entry.name.endswith(TRANSCRIPT_EXTENSIONS) and entry.is_file():
+                st = entry.stat()
+                on_disk[entry.name] = (st.st_mtime, st.st_size)
+
+        with self._lock:
+            known = {name: (mtime, size) for name, mtime, size in
+                     self._conn(base_dir).execute("SELECT name, mtime, size FROM transcripts")}
+
+        for name in known.keys() - on_disk.keys():
+            with self._lock:
+                self._forget(self._db, name)
+                self._db.commit()
+        for name, stat in on_disk.items():
+            if known.get(name) != stat:
+                self.update(base_dir, name, read)
+
+    def update(self, base_dir, name, read, model=None):
+        # (Re)index one whole file, e.g. after /save
+        path = os.path.join(base_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None   # deleted since we listed it
+        try:
+            messages = read(path) if st else None
+            if not isinstance(messages, list) or not all(_is_message(m) for m in messages):
+                messages = None
+        except (OSError, ValueError):
+            messages = None
+
+        try:
+            with self._lock:
+                db = self._conn(base_dir)
+                self._forget(db, name)
+                if st is None:
+                    pass
+                elif messages is None:
+                    # Some other .json file; remember it so we don't parse it again
+                    db.execute("INSERT INTO transcripts (name, mtime, size, is_transcript) VALUES (?, ?, ?, 0)",
+                               (name, st.st_mtime, st.st_size))
+                else:
+                    self._insert(db, name, messages, model, st)
+                db.commit()
+        except sqlite3.Error as e:
+            Logger.debug(f"Transcript index unavailable: {e}")
+
+    def add_messages(self, base_dir, name, messages, model=None):
+        """
+        Append messages to a transcript's entry (autosave). Only the new messages are
+        indexed, so the cost doesn't grow with the length of the session.
+        """
+        path = os.path.join(base_dir, name)
+        try:
+            st = os.stat(path)
+            with self._lock:
+                db = self._conn(base_dir)
+                row = db.execute("SELECT message_count, first_user FROM transcripts WHERE name = ?",
+                                 (name,)).fetchone()
+                if row is None:
+                    self._insert(db, name, messages, model, st)
+                else:
+                    db.execute("UPDATE transcripts SET mtime = ?, size = ?, message_count = ?, first_user = ?"
+                               " WHERE name = ?",
+                               (st.st_mtime, st.st_size, row[0] + len(messages),
+                                row[1] if row[1] is not None else _first_user_line(messages), name))
+                    self._insert_messages(db, name, messages)
+                db.commit()
+        except (OSError, sqlite3.Error) as e:
+            Logger.debug(f"Transcript index unavailable: {e}")
+
+    def _insert(self, db, name, messages, model, st):
+        parsed_model, created = _describe_name(name, st.st_mtime)
+        db.execute("INSERT INTO transcripts (name, mtime, size, model, created, message_count, first_user)"
+                   " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                   (name, st.st_mtime, st.st_size, model or parsed_model, created,
+                    len(messages), _first_user_line(messages)))
+        self._insert_messages(db, name, messages)
+
+    def _insert_messages(self, db, name, messages):
+        db.executemany("INSERT INTO messages (name, role, content) VALUES (?, ?, ?)",
+                       [(name, m.get("role"), m.get("content")) for m in messages
+                        if isinstance(m.get("content"), str)])
+
+    def _forget(self, db, name):
+        db.execute("DELETE FROM messages WHERE name = ?", (name,))
+        db.execute("DELETE FROM transcripts WHERE name = ?", (name,))
+
+    # ----------------------
+    # Queries
+    # ----------------------
+    def listing(self, base_dir, query=None, offset=0, limit=20):
+        """
+        One page of transcripts, newest first, optionally filtered by a substring of
+        the file name, model or first user line. Returns (rows, total).
+        """
+        self._ready.wait()
+        where = "WHERE is_transcript = 1"
+        args = []
+        if query:
+            where += " AND (name LIKE ? OR model LIKE ? OR first_user LIKE ?)"
+            args = [f"%{query}%"] * 3
+        with self._lock:
+            db = self._conn(base_dir)
+            total = db.execute(f"SELECT COUNT(*) FROM transcripts {where}", args).fetchone()[0]
+            rows = db.execute(
+                f"SELECT name, model, created, message_count, first_user FROM transcripts {where}"
+                " ORDER BY created DESC, name DESC LIMIT ? OFFSET ?", args + [limit, offset]).fetchall()
+        return rows, total
+
+    def search(self, base_dir, terms, limit=20, mark=("[", "]")):
+        """
+        Ranked hits across all transcripts: [(name, model, created, message_count,
+        hits, snippet)], best first. FTS5 ranks with bm25; the fallback ranks by the
+        number of matching messages.
+        """
+        self._ready.wait()
+        with self._lock:
+            db = self._conn(base_dir)
+            if self.fts:
+                rows = db.execute(
+                    "SELECT m.name, snippet(messages_fts, 0, ?, ?, '...', 12), bm25(messages_fts) AS rank"
+                    " FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid"
+                    " WHERE messages_fts MATCH ? ORDER BY rank LIMIT 500",
+                    (mark[0], mark[1], _fts_query(terms))).fetchall()
+            else:
+                words = terms.split()
+                where = " AND ".join("content LIKE ?" for _ in words)
+                rows = [(name, content, 0) for name, content in db.execute(
+                    f"SELECT name, content FROM messages WHERE {where} LIMIT 500",
+                    [f"%{w}%" for w in words])]
+
+            # Best message per transcript; more matching messages break ties
+            best = {}
+            for name, snippet, rank in rows:
+                if name in best:
+                    best[name][2] += 1
+                else:
+                    if not self.fts:
+                        snippet = self._like_snippet(snippet, terms.split()[0], mark)
+                    best[name] = [rank, snippet, 1]
+            ordered = sorted(best.items(), key=lambda item: (item[1][0], -item[1][2]))[:limit]
+
+            hits = []
+            for name, (rank, snippet, count) in ordered:
+                meta = db.execute("SELECT model, created, message_count FROM transcripts WHERE name = ?",
+                                  (name,)).fetchone() or (None, None, 0)
+                hits.append((name, *meta, count, " ".join(snippet.split())))
+        return hits
+
+    def user_messages(self, base_dir, limit=5000):
+        # [(content, name)] of past user prompts, newest transcript first
+        self._ready.wait()
+        with self._lock:
+            return self._conn(base_dir).execute(
+                "SELECT m.content, m.name FROM messages m JOIN transcripts t ON t.name = m.name"
+                " WHERE m.role = 'user' ORDER BY t.created DESC, m.id DESC LIMIT ?", (limit,)).fetchall()
+
+    def _like_snippet(self, content, word, mark):
+        at = content.lower().find(word.lower())
+        start = max(0, at - 40)
+        end = at + len(word)
+        return (("..." if start else "") + content[start:at] + mark[0] + content[at:end] + mark[1]
+                + content[end:end + 40] + ("..." if end + 40 < len(content) else ""))
+
+TranscriptIndex = TranscriptIndex()
@@ -1,59 +1,291 @@
 # transcriptmanager.py
 # 06/22/2025 - Voltur
 #
-# Helper to handle loading and saving via the LLM 
-# 
+# Helper to handle loading and saving via the LLM
+#
 
+import json
 import os
+import sqlite3
+import time
 from datetime import datetime
 from voltlogger import Logger
 from chatcolors import Colors
 from chatcolors import ChatColors
+from transcriptindex import TranscriptIndex
+from contextmanager import ContextManager
+import compacttranscript
+
+
+PAGE_SIZE = 20
 
 class TranscriptManager:
     def __init__(self, base_dir=os.path.expanduser('~')):
         self.base_dir = base_dir
+        self.format = "json"                # json | voltz, for /save
+        self.load_tail = "all"              # all | context | N (newest messages to load)
 
-    def list_transcripts(self):
-        files = sorted([f for f in os.listdir(self.base_dir) if f.endswith('.json')], reverse=True)
-        if not files:
-            Logger.log(f"\n{ChatColors.system}(No .json transcript files found in current directory.){Colors.reset}\n")
-            return None
+        # Autosave: every new message is appended to a per-session JSONL file
+        self.autosave_enabled = False
+        self.autosave_fsync = "turn"        # always | turn | never
+        self.autosave_max_bytes = 16 * 1024 * 1024
+        self._autosave_file = None
+        self._autosave_path = None
+        self._autosave_part = 1
+        self._autosave_messages = None      # the llm.messages list being followed
+        self._autosave_written = 0
+        self._autosave_ids = set()
+        self._autosave_new = []             # (file, message) since the last index update
 
-        Logger.log(f"\n{ChatColors.highlight}Available transcript files:{Colors.reset}")
-        for i, file in enumerate(files, start=1):
-            Logger.log(f"\t{i}. {file}")
+    def list_transcripts(self, query=None, page=0):
+        # One page of the transcript index, newest first
+        try:
+            rows, total = TranscriptIndex.listing(self.base_dir, query, page * PAGE_SIZE, PAGE_SIZE)
+        except sqlite3.Error as e:
+            Logger.log(f"{Colors.fg.red}Transcript index unavailable: {e}{Colors.reset}")
+            return None, 0
+        if not rows:
+            match = f" matching '{query}'" if query else ""
+            Logger.log(f"\n{ChatColors.system}(No transcripts{match} found in {self.base_dir}.){Colors.reset}\n")
+            return None, 0
 
-        return files
+        first = page * PAGE_SIZE + 1
+        match = f" matching '{query}'" if query else ""
+        Logger.log(f"\n{ChatColors.highlight}Transcripts{match} ({first}-{first + len(rows) - 1} of {total}):{Colors.reset}")
+        for i, (name, model, created, count, first_user) in enumerate(rows, start=first):
+            Logger.log(f"\t{i:>3}. {created}  {model or '?':<16} {count:>4} msgs  {(first_user or '')[:60]}")
 
-    def save(self, llm, persona):
+        return [row[0] for row in rows], total
+
+    def _filename(self, persona, extension):
         date_str = datetime.now().strftime("%Y-%m-%d_%H%M")
         # Windows can't handle certain characters in filenames
         safe_persona = persona
         for ch in [':', '/', '\\', '*', '?', '"', '<', '>', '|']:
             safe_persona = safe_persona.replace(ch, '_')
-        filename = f"{self.base_dir}/{date_str}_{safe_persona}.json"
-        llm.save_transcript(filename)
+        return f"{self.base_dir}/{date_str}_{safe_persona}{extension}"
+
+    def configure(self, format=None, load_tail=None):
+        if format is not None:
+            if format not in ("json", "voltz"):
+                Logger.warn(f"Unknown transcript_format '{format}', using 'json'")
+                format = "json"
+            self.format = format
+        if load_tail is not None:
+            self.load_tail = str(load_tail).lower()
+
+    def save(self, llm, persona):
+        if self.format == "voltz":
+            filename = self._filename(persona, compacttranscript.EXTENSION)
+            compacttranscript.write(filename, llm.messages)
+        else:
+            filename = self._filename(persona, ".json")
+            llm.save_transcript(filename)
+        TranscriptIndex.update(self.base_dir, os.path.basename(filename), self.read_transcript, model=persona)
         Logger.log(f"\n{ChatColors.system}Chat saved to {filename}{Colors.reset}\n")
 
-    def load(self, llm):
-        files = self.list_transcripts()
-        if files:
-            choice = input(f"\n{ChatColors.system}Enter number to load or press Enter to cancel:{Colors.reset} ").strip()
-            if not choice:
-                Logger.log(f"{ChatColors.system}Load canceled.{Colors.reset}\n")
+    def read_transcript(self, path, quiet=False):
+        # JSON is one array; JSONL is one message per line (autosave); .voltz is compressed
+        if path.endswith(compacttranscript.EXTENSION):
+            return compacttranscript.read(path)
+        if path.endswith('.jsonl'):
+            messages = []
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        messages.append(json.loads(line))
+                    except ValueError:
+                        # A crash can leave half a line at the end
+                        if not quiet:
+                            Logger.warn(f"Skipping damaged line in {os.path.basename(path)}")
+            return messages
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def read_tail(self, path):
+        """
+        Read a transcript for /load, honoring load_tail: everything, the newest N
+        messages, or what fits the context budget. Only .voltz files skip the rest.
+        """
+        last = budget = None
+        if self.load_tail == "context":
+            budget = ContextManager.budget or None
+        elif self.load_tail.isdigit():
+            last = int(self.load_tail)
+        if path.endswith(compacttranscript.EXTENSION):
+            return compacttranscript.read(path, last=last, budget=budget)
+        messages = self.read_transcript(path)
+        if last is None and budget is None:
+            return messages
+        pinned = messages[:1] if messages and messages[0].get("role") == "system" else []
+        return compacttranscript.trim_tail(pinned, messages[len(pinned):], last, budget)
+
+    def reconcile_index(self):
+        # Catch up with files added, changed or deleted while we weren't running
+        TranscriptIndex.reconcile_in_background(self.base_dir, lambda path: self.read_transcript(path, quiet=True))
+
+    def load(self, llm, query=None):
+        page = 0
+        while True:
+            files, total = self.list_transcripts(query, page)
+            if not files:
+                return
+            more = (page + 1) * PAGE_SIZE < total
+            paging = ", n/p for next/previous page" if more or page else ""
+            choice = input(f"\n{ChatColors.system}Enter number to load{paging}, or press Enter to cancel:{Colors.reset} ").strip().lower()
+            if choice == "n" and more:
+                page += 1
+            elif choice == "p" and page:
+                page -= 1
+            else:
+                self._load_choice(llm, choice, files, page * PAGE_SIZE)
                 return
 
+    def search(self, llm, terms):
+        if not terms.strip():
+            Logger.log(f"{Colors.fg.red}Usage: /search <terms>{Colors.reset}")
+            return
+        started = time.perf_counter()
+        try:
+            hits = TranscriptIndex.search(self.base_dir, terms, mark=(ChatColors.highlight, ChatColors.system))
+        except sqlite3.Error as e:
+            Logger.log(f"{Colors.fg.red}Transcript index unavailable: {e}{Colors.reset}")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        if not hits:
+            Logger.log(f"\n{ChatColors.system}(No transcripts mention '{terms}'. {elapsed:.0f}ms){Colors.reset}\n")
+            return
+
+        Logger.log(f"\n{ChatColors.highlight}Transcripts mentioning '{terms}' ({len(hits)} shown, {elapsed:.0f}ms):{Colors.reset}")
+        for i, (name, model, created, count, matches, snippet) in enumerate(hits, start=1):
+            Logger.log(f"\t{i:>3}. {created}  {model or '?':<16} {count:>4} msgs  ({matches} matching)")
+            Logger.log(f"\t     {ChatColors.system}{snippet}{Colors.reset}")
+
+        choice = input(f"\n{ChatColors.system}Enter number to load or press Enter to cancel:{Colors.reset} ").strip()
+        self._load_choice(llm, choice, [hit[0] for hit in hits], 0)
+
+    def _load_choice(self, llm, choice, files, first):
+        if not choice:
+            Logger.log(f"{ChatColors.system}Load canceled.{Colors.reset}\n")
+            return
+
+        try:
+            index = int(choice) - 1 - first
+        except ValueError:
+            Logger.log(f"{Colors.fg.red}Please enter a number.{Colors.reset}")
+            return
+        if not 0 <= index < len(files):
+            Logger.log(f"{Colors.fg.red}Invalid selection.{Colors.reset}")
+            return
+
+        filename = files[index]
+        try:
+            llm.messages = self.read_tail(f"{self.base_dir}/{filename}")
+            Logger.log(f"\n{ChatColors.system}Loaded transcript from {filename} ({len(llm.messages)} messages){Colors.reset}\n")
+        except (OSError, ValueError) as e:
+            Logger.log(f"{Colors.fg.red}Could not load {filename}: {e}{Colors.reset}")
+
+    # ----------------------
+    # Autosave
+    # ----------------------
+    def configure_autosave(self, enabled=None, fsync=None, max_mb=None):
+        if enabled is not None:
+            self.autosave_enabled = bool(enabled)
+        if fsync is not None:
+            if fsync not in ("always", "turn", "never"):
+                Logger.warn(f"Unknown autosave_fsync '{fsync}', using 'turn'")
+                fsync = "turn"
+            self.autosave_fsync = fsync
+        if max_mb is not None:
+            self.autosave_max_bytes = int(float(max_mb) * 1024 * 1024)
+
+    def autosave(self, llm, persona):
+        """
+        Append the messages added since the last call to the session's JSONL file.
+        Cost is proportional to the new messages, not to the length of the session.
+        """
+        if not self.autosave_enabled:
+            return
+        messages = llm.messages
+        try:
+            if messages is not self._autosave_messages:
+                # New session, or /load replaced the conversation: start a new file
+                self._start_autosave(messages, persona)
+
+            # A cancelled turn may land just before newer ones, so look back a little
+            start = max(0, self._autosave_written - 8)
+            for message in messages[start:]:
+                if id(message) not in self._autosave_ids:
+                    self._append(message, persona)
+            self._autosave_written = len(messages)
+
+            if self.autosave_fsync == "turn":
+                self._sync()
+        except OSError as e:
+            Logger.error(f"Autosave failed: {e}")
+
+        # Index just the new messages, grouped by file (a rotation may split them)
+        new, self._autosave_new = self._autosave_new, []
+        for path in dict.fromkeys(path for path, _ in new):
+            TranscriptIndex.add_messages(self.base_dir, os.path.basename(path),
+                                         [m for p, m in new if p == path], model=persona)
+
+    def _start_autosave(self, messages, persona):
+        self.close_autosave()
+        self._autosave_messages = messages
+        self._autosave_written = 0
+        self._autosave_ids = set()
+        self._autosave_part = 1
+        self._autosave_path = self._filename(persona, ".jsonl")
+        n = 2
+        while os.path.exists(self._autosave_path):
+            # Another session started in the same minute; never mix two in one file
+            self._autosave_path = self._filename(f"{persona}-{n}", ".jsonl")
+            n += 1
+        self._autosave_file = open(self._autosave_path, "a", encoding="utf-8")
+
+    def _append(self, message, persona):
+        if self._autosave_file.tell() >= self.autosave_max_bytes:
+            self._rotate(persona)
+        self._autosave_file.write(json.dumps(message, ensure_ascii=False) + "\n")
+        self._autosave_ids.add(id(message))
+        self._autosave_new.append((self._autosave_path, message))
+        if self.autosave_fsync == "always":
+            self._sync()
+        else:
+            self._autosave_file.flush()
+
+    def _rotate(self, persona):
+        # Each part starts with the system prompt so it can be loaded on its own
+        self._sync()
+        self._autosave_file.close()
+        self._autosave_part += 1
+        base = self._autosave_path[:-len(".jsonl")]
+        if base.endswith(f"_part{self._autosave_part - 1}"):
+            base = base[:-len(f"_part{self._autosave_part - 1}")]
+        self._autosave_path = f"{base}_part{self._autosave_part}.jsonl"
+        self._autosave_file = open(self._autosave_path, "a", encoding="utf-8")
+        if self._autosave_messages and self._autosave_messages[0].get("role") == "system":
+            self._autosave_file.write(json.dumps(self._autosave_messages[0], ensure_ascii=False) + "\n")
+            self._autosave_new.append((self._autosave_path, self._autosave_messages[0]))
+
+    def _sync(self):
+        if self._autosave_file:
+            self._autosave_file.flush()
+            if self.autosave_fsync != "never":
+                os.fsync(self._autosave_file.fileno())
+
+    def close_autosave(self):
+        if self._autosave_file:
             try:
-                index = int(choice) - 1
-                if 0 <= index < len(files):
-                    filename = files[index]
-                    llm.load_transcript(f"{self.base_dir}/{filename}")
-                    Logger.log(f"\n{ChatColors.system}Loaded transcript from {filename}{Colors.reset}\n")
-                else:
-                    Logger.log(f"{Colors.fg.red}Invalid selection.{Colors.reset}")
-            except ValueError:
-                Logger.log(f"{Colors.fg.red}Please enter a number.{Colors.reset}")
-
-
-TranscriptManager = TranscriptManager()
\ No newline at end of file
+                self._sync()
+                self._autosave_file.close()
+            except OSError:
+                pass
+            self._autosave_file = None
+
+
+TranscriptManager = TranscriptManager()
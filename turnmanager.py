@@ -0,0 +1,203 @@
+# turnmanager.py
+# 10/18/2026 - Voltur
+#
+# Sends one chat turn to the LLM, optionally streaming the reply token by token.
+#
+
+import json
+import time
+
+from voltlogger import Logger
+from contextmanager import ContextManager
+from responsecache import ResponseCache
+from warmupmanager import WarmupManager
+from backendmanager import BackendManager
+from metricsmanager import MetricsManager
+
+
+class TurnManager:
+    def __init__(self):
+        self.last_stats = None
+
+    def send(self, llm, user_content, stream=True, on_chunk=None, cancel=None):
+        """
+        Send user_content with the conversation context and return the reply. The
+        context is trimmed to the token budget by ContextManager.
+
+        When streaming, on_chunk(text) is called for every piece of the reply as the
+        server emits it. Ctrl-C (or setting the cancel Event from another thread) stops
+        generation; whatever arrived so far is kept as the reply. A blocking request
+        that is cancelled is dropped from the history. Timing for the turn ends up in
+        self.last_stats, and in MetricsManager.
+        """
+        # Local reference: a cancelled turn may still be winding down when the next one starts
+        stats = self.last_stats = {"ttft": None, "ttfb": None, "elapsed": None, "tokens": 0,
+                                   "tokens_per_sec": None, "messages": None, "prompt_tokens": None,
+                                   "payload_bytes": None, "backend": None, "interrupted": False,
+                                   "cached": False}
+        error = None
+        try:
+            return self._send(llm, user_content, stream, on_chunk, cancel, stats)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            MetricsManager.record_turn({
+                "model": llm.client.model,
+                "backend": stats["backend"],
+                "cached": stats["cached"],
+                "interrupted": stats["interrupted"],
+                "error": (str(error) or type(error).__name__) if error else None,
+                "messages": stats["messages"],
+                "prompt_tokens": stats["prompt_tokens"],
+                "payload_bytes": stats["payload_bytes"],
+                "ttfb": stats["ttfb"],
+                "ttft": stats["ttft"],
+                "latency": stats["elapsed"],
+                "output_tokens": None if error else stats["tokens"],
+                "tokens_per_sec": stats["tokens_per_sec"],
+            })
+
+    def _send(self, llm, user_content, stream, on_chunk, cancel, stats):
+        started = time.perf_counter()
+        prompt = ContextManager.build_prompt(llm, user_content)
+        stats["messages"], stats["prompt_tokens"] = len(prompt), ContextManager.last_prompt_tokens
+        history, position = llm.messages, len(llm.messages)
+
+        # Tool results depend on the outside world, so those turns are never cached
+        cache_key = None
+        if ResponseCache.enabled and not llm.use_tools:
+            cache_key = ResponseCache.key(llm.client, prompt)
+            reply = ResponseCache.get(cache_key)
+            if reply is not None:
+                stats["cached"] = True
+                if stream and on_chunk:
+                    on_chunk(reply)
+                self._record(llm, history, position, [
+                    {"role": "user", "content": user_content},
+                    {"role": "assistant", "content": reply},
+                ])
+                stats["elapsed"] = time.perf_counter() - started
+                return reply
+
+        # Tool calls need the full request/response loop, which doesn't stream.
+        if not stream or llm.use_tools:
+            reply = self._send_blocking(llm, prompt, user_content, cancel, history, position, stats)
+            stats["interrupted"] = cancel is not None and cancel.is_set()
+            self._finish_stats(stats, started)
+            if cache_key and reply and not stats["interrupted"]:
+                ResponseCache.put(cache_key, reply)
+            return reply
+
+        chunks = []
+        try:
+            for text in self._stream(llm.client, prompt, started, stats, cancel):
+                if cancel is not None and cancel.is_set():
+                    stats["interrupted"] = True
+                    break
+                chunks.append(text)
+                if on_chunk:
+                    on_chunk(text)
+        except KeyboardInterrupt:
+            stats["interrupted"] = True
+        finally:
+            self._finish_stats(stats, started)
+
+        reply = "".join(chunks)
+        self._record(llm, history, position, [
+            {"role": "user", "content": user_content},
+            {"role": "assistant", "content": reply},
+        ])
+        if cache_key and reply and not stats["interrupted"]:
+            ResponseCache.put(cache_key, reply)
+        return reply
+
+    def _record(self, llm, history, position, messages):
+        # A cancelled turn can finish after the next one started; keep it in the order it was sent
+        if history is not llm.messages:
+            return  # the conversation was replaced (/load) in the meantime
+        history[position:position] = messages
+
+    def _send_blocking(self, llm, prompt, user_content, cancel, history, position, stats):
+        # Same bookkeeping as LLMConversation.send, but with our trimmed prompt
+        tool_transcript = []
+        if llm.use_tools:
+            reply = llm.client.send_with_tools(prompt, transcript=tool_transcript)
+        else:
+            body = b"".join(BackendManager.stream(llm.client, prompt, stream=False,
+                                                  extras=WarmupManager.payload_extras(), cancel=cancel,
+                                                  info=stats))
+            data = json.loads(body) if body else {}
+            reply = llm.client.extract_content(data) if body else None
+            stats["tokens"] = data.get("eval_count") or (data.get("usage") or {}).get("completion_tokens") or 0
+            if data.get("eval_count") and data.get("eval_duration"):
+                stats["tokens_per_sec"] = data["eval_count"] / (data["eval_duration"] / 1e9)
+        if cancel is not None and cancel.is_set():
+            return None
+
+        self._record(llm, history, position,
+                     [{"role": "user", "content": user_content}]
+                     + [llm._trim_tool_result(m) for m in tool_transcript]
+                     + [{"role": "assistant", "content": reply}])
+        return reply
+
+    def _stream(self, client, messages, started, stats, cancel=None):
+        # BackendManager picks the server (and fails over / hedges) and hands back raw lines
+        lines = BackendManager.stream(client, messages, stream=True,
+                                      extras=WarmupManager.payload_extras(), cancel=cancel, info=stats)
+        try:
+            for line in lines:
+                event = self._parse_line(line)
+                if event is None:
+                    continue
+                if event == "done":
+                    break
+
+                text = self._extract_delta(event)
+                if text:
+                    if stats["ttft"] is None:
+                        stats["ttft"] = time.perf_counter() - started
+                    stats["tokens"] += 1
+                    yield text
+
+                # Ollama reports exact token counts on the final message
+                if event.get("done"):
+                    if event.get("eval_count") and event.get("eval_duration"):
+                        stats["tokens"] = event["eval_count"]
+                        stats["tokens_per_sec"] = event["eval_count"] / (event["eval_duration"] / 1e9)
+                    break
+        finally:
+            lines.close()
+
+    def _parse_line(self, line):
+        # Ollama streams NDJSON; Open WebUI streams server-sent events ("data: {...}")
+        line = line.strip()
+        if not line or line.startswith(b":"):
+            return None
+        if line.startswith(b"data:"):
+            line = line[len(b"data:"):].strip()
+            if line == b"[DONE]":
+                return "done"
+        try:
+            return json.loads(line)
+        except ValueError:
+            Logger.warn(f"Skipping unexpected stream data: {line[:80]!r}")
+            return None
+
+    def _extract_delta(self, event):
+        if "choices" in event:
+            choices = event["choices"] or [{}]
+            return (choices[0].get("delta") or {}).get("content") or ""
+        return (event.get("message") or {}).get("content") or ""
+
+    def _finish_stats(self, stats, started):
+        stats["elapsed"] = time.perf_counter() - started
+        if stats.get("first_byte") is not None:
+            stats["ttfb"] = stats["first_byte"] - started
+        # Estimate from chunk count when the server didn't report a rate (one chunk ~ one token)
+        if stats["tokens_per_sec"] is None and stats["ttft"] is not None and stats["tokens"] > 1:
+            generating = stats["elapsed"] - stats["ttft"]
+            if generating > 0:
+                stats["tokens_per_sec"] = stats["tokens"] / generating
+
+TurnManager = TurnManager()
@@ -5,27 +5,38 @@
 # 
 
 
-import os
-import subprocess
 import sys
-import socket
-from options import resolve_options
+from startupprofiler import StartupProfiler
+if "--startup-profile" in sys.argv:
+    StartupProfiler.enable()    # before the other imports, so they get timed too
 
-if sys.platform.startswith("linux") or sys.platform == "darwin":
-    import readline   # readline support for Unix-like systems, not needed on Windows >= 10
+import asyncio
+import os
+import signal
+import threading
+from options import resolve_options
 
 # ANSI Chat colors
 from chatcolors import Colors
 from chatcolors import ChatColors
 from voltlogger import Logger
-from voltllmclient import LLMConversation
 from commandrouter import CommandRouter
+from commandrouter import HistoryManager, JobManager, TranscriptManager
+from turnmanager import TurnManager
+from promptmanager import PromptManager
+from contextmanager import ContextManager
+from warmupmanager import WarmupManager
+from backendmanager import BackendManager
+from profilemanager import ProfileManager
+from execfeedmanager import ExecFeedManager
 
 
 def usage():
         script_name = os.path.basename(sys.argv[0])
         message = f"""
-Usage: {script_name} [--persona=MODEL] [--handle=USERNAME] [--base-url=URL] [--system-prompt=TEXT] [--config=PATH] [--no-color]
+Usage: {script_name} [--persona=MODEL] [--handle=USERNAME] [--base-url=URL] [--system-prompt=TEXT] [--config=PATH] [--no-color] [--no-stream] [--no-cache] [--autosave] [--no-warmup] [--startup-profile]
+       [--context-tokens=N] [--metrics-export=none|prometheus|jsonl] [--metrics-path=PATH] [--profile]
+       {script_name} --batch=FILE|- [--batch-out=PATH] [--batch-concurrency=N] [--batch-order=input|completion] [options]
 
 Description:
     Starts a text-based chat session with an LLM.
@@ -37,25 +48,40 @@ Options:
     --system-prompt=TEXT    Override the system prompt
     --config=PATH           Explicitly load a config file (JSON or YAML)
     --no-color              Disable ANSI color output
+    --no-stream             Wait for the whole reply instead of streaming tokens as they arrive
+    --no-cache              Ignore the response cache even if the config enables it
+    --autosave              Append every message to a .jsonl transcript as you chat
+    --context-tokens=N      Approximate token budget for the context sent with each message (default: 8192,
+                            0 = unlimited). Older turns are dropped; set context_summarize: true in the
+                            config to summarize them instead (extra background requests to the LLM)
+    --batch=FILE            Run the prompts in FILE ('-' = stdin) without the REPL. One prompt per line,
+                            or JSONL: {"id", "prompt", "system_prompt", "persona"}
+    --batch-out=PATH        Append JSONL results to PATH (default: stdout). Rerun to resume: ids that
+                            already succeeded are skipped
+    --batch-concurrency=N   Prompts in flight at once (default: 4)
+    --batch-order=ORDER     Write results in 'input' order (default) or in 'completion' order
+    --no-warmup             Don't connect and load the model in the background at startup
+    --startup-profile       Print the time spent in each import and startup phase
+    --metrics-export=FORMAT Also write turn and /exec metrics (see /stats) as a Prometheus textfile
+                            ('prometheus') or append them to a JSONL log ('jsonl'). Default: none
+    --metrics-path=PATH     Where the metrics go (default: <base_dir>/volt-metrics/volt-metrics.prom or .jsonl)
+    --profile               Run every turn under cProfile and tracemalloc; /profile shows the hot spots
+                            and allocation sites, /profile dump writes .pstats files to <base_dir>/volt-profiles
 
 Examples:
     {script_name} --persona=Gemma3:12b --handle=Alice --base-url=http://my-local-server:8000
     {script_name} --persona=Llama2 --handle=Bob
+    {script_name} --batch=prompts.jsonl --batch-out=results.jsonl --batch-concurrency=16
 
 Notes:
     - Type your message and press Enter to chat.
     - Commands must begin with a '/' character.
     - Use --no-color if your terminal doesn't support ANSI escape codes.
+    - Press Ctrl-C while a reply is streaming to stop generation early.
+    - You can type your next message while a reply is still arriving; it is queued.
 """
         Logger.help(message)
 
-def get_bash_style_cwd():
-    cwd = os.getcwd()
-    home = os.path.expanduser('~')
-    if cwd.startswith(home):
-        return '~' + cwd[len(home):]
-    return cwd
-
 def is_root():
     return os.geteuid() == 0
 
@@ -65,21 +91,12 @@ def get_prompt_suffix():
     suffix = "# " if is_root() else "$ "
     return suffix
 
-def git_branch() -> str | None:
-    try:
-        return subprocess.check_output(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            stderr=subprocess.DEVNULL,
-        ).decode().strip()
-    except Exception:
-        return None
-    
 def build_prompt(handle: str, isShell = False) -> str:
-    user = f"{ChatColors.sender}{handle}@{socket.gethostname()}:{Colors.reset}"
-    cwd = f"{ChatColors.system}(cwd:{get_bash_style_cwd()}){Colors.reset}"
+    user = f"{ChatColors.sender}{handle}@{PromptManager.hostname()}:{Colors.reset}"
+    cwd = f"{ChatColors.system}(cwd:{PromptManager.bash_style_cwd()}){Colors.reset}"
     delimiter = ">"
 
-    branch = git_branch()
+    branch = PromptManager.git_branch() if isShell else None
     if branch:
         branch_str = f" - {branch}"
         cwd = cwd.replace(")", f"{branch_str})")
@@ -88,46 +105,217 @@ def build_prompt(handle: str, isShell = False) -> str:
     return path
 
 def build_sender(sender: str, model: str) -> str:
-    user = f"{Colors.fg.cyan}{sender}@{socket.gethostname()}:{Colors.reset}"
+    user = f"{Colors.fg.cyan}{sender}@{PromptManager.hostname()}:{Colors.reset}"
     model = f"{ChatColors.system}(model:{model}){Colors.reset}"
     delimiter = ">"
 
     return f"{user} {delimiter} {model} "
 
-def run_chat(llm, opts):
-    router = CommandRouter(llm=llm, opts=opts)
-
-    # REPL loop
-    while True:
-
-        # READ
-        # Prompt the user 
-        prompt_prefix = build_prompt(opts.handle, opts.shell_exec_privs > 0)
-        if router.last_command_error != 0:
-            prompt_prefix = f"{Colors.fg.red}[{router.last_command_error}] {Colors.reset}" + prompt_prefix
-            router.last_command_error = 0
-        your_message = input(prompt_prefix).strip()
-
-        # Handle any / commands from the user
-        handled = router.handle(your_message)
-        if handled is True:
-            continue # handled!
-        elif isinstance(handled, str):
-            your_message = handled # Pass the message on!
-
-        # EVAL
-        # Hand the chat message to the LLM
+def build_full_prompt(router, opts) -> str:
+    # Background jobs that finished since the last prompt
+    if JobManager.is_loaded():
+        for notice in JobManager.drain_notifications():
+            Logger.log(notice)
+
+    prompt_prefix = build_prompt(opts.handle, opts.shell_exec_privs > 0)
+    if router.last_command_error != 0:
+        prompt_prefix = f"{Colors.fg.red}[{router.last_command_error}] {Colors.reset}" + prompt_prefix
+        router.last_command_error = 0
+    return prompt_prefix
+
+def in_thread(loop, fn, *args):
+    """
+    Run fn on a daemon thread and return an asyncio future for its result.
+    Unlike the default executor, an abandoned call never holds up exit.
+    """
+    future = loop.create_future()
+
+    def settle(setter, value):
+        if not future.done():
+            setter(value)
+
+    def target():
         try:
-            print(f"\n{ChatColors.system}Thinking...{Colors.reset}", end="\r", flush=True)
-            response = llm.send_with_full_context(your_message)
-            print(" " * 80, end="\r")
-        except Exception as e:
-            Logger.log(f"\n{Colors.fg.red}Error from LLM: {e}{Colors.reset}\n")
-            continue
+            result = fn(*args)
+        except BaseException as e:
+            loop.call_soon_threadsafe(settle, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(settle, future.set_result, result)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+
+class ChatLoop:
+    """
+    The REPL as asyncio tasks: the console reader, a worker sending queued chat
+    messages one at a time, and slash commands. Ctrl-C cancels the reply in flight.
+    """
+    def __init__(self, llm, opts):
+        self.llm = llm
+        self.opts = opts
+        self.router = CommandRouter(llm=llm, opts=opts)
+        self.chats = asyncio.Queue()
+        self.loop = None
+        self.reader = None
+        self.turn = None            # future of the reply being generated
+        self.cancel = None          # threading.Event telling that reply to stop
+        self.busy = False           # a slash command is running
+        # Piped input keeps strict ordering: each line waits for the replies before it
+        self.sequential = not sys.stdin.isatty()
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        from consolereader import ConsoleReader
+        self.reader = ConsoleReader(self.loop, lambda: build_full_prompt(self.router, self.opts))
+        signal.signal(signal.SIGINT, lambda *_: self.loop.call_soon_threadsafe(self.interrupt))
+
+        worker = asyncio.create_task(self.chat_worker())
+        if self.opts.warmup:
+            WarmupManager.on_done(lambda: self.loop.call_soon_threadsafe(self.show_warmup))
+        StartupProfiler.report()
+        self.router.load_in_background()
+        self.reader.start()
+        try:
+            while True:
+                # READ
+                your_message = await self.reader.get()
+                if your_message is None:
+                    await self.chats.join()
+                    Logger.log(f"{Colors.reset}{ChatColors.system}\nExiting...{Colors.reset}\n")
+                    return
+                await self.dispatch(your_message.strip())
+        finally:
+            if self.cancel:
+                self.cancel.set()
+            worker.cancel()
+            if JobManager.is_loaded():
+                JobManager.shutdown()
+            self.router.close()
+            if self.opts.autosave:
+                TranscriptManager.close_autosave()
+
+    async def dispatch(self, your_message):
+        # Handle any / commands from the user. They run off the loop (an /exec can take a
+        # while) and the prompt waits for them, since they may read from stdin themselves.
+        if your_message.startswith("/"):
+            self.busy = True
+            try:
+                handled = await in_thread(self.loop, ProfileManager.wrap(your_message[:60], self.router.handle),
+                                          your_message)
+            finally:
+                self.busy = False
+            if handled is True:
+                self.reader.release()
+                return # handled!
+            elif isinstance(handled, str):
+                your_message = handled # Pass the message on!
+
+        # Queue it for the LLM and take the next line right away
+        if self.turn is not None or not self.chats.empty():
+            Logger.log(f"{ChatColors.system}(queued){Colors.reset}")
+        self.chats.put_nowait(your_message)
+        if self.sequential:
+            await self.chats.join()
+        self.reader.release()
+
+    async def chat_worker(self):
+        while True:
+            your_message = await self.chats.get()
+
+            # EVAL && PRINT
+            # Hand the chat message to the LLM and show what it had to say about it
+            HistoryManager.add(self.llm, your_message)
+            self.cancel = threading.Event()
+            self.turn = in_thread(self.loop, ProfileManager.wrap(f"chat: {your_message[:50]}", send_turn),
+                                  self.llm, self.opts, ExecFeedManager.attach(your_message), self.cancel)
+            try:
+                await asyncio.wait({self.turn})
+                if not self.turn.cancelled() and self.turn.exception():
+                    Logger.log(f"\n{Colors.fg.red}Error from LLM: {self.turn.exception()}{Colors.reset}\n")
+            finally:
+                self.turn = None
+                self.chats.task_done()
+
+            # Append this turn to the session's JSONL file
+            if self.opts.autosave:
+                TranscriptManager.autosave(self.llm, self.opts.persona)
+            # Fold old turns into the summary while the user types the next message
+            ContextManager.summarize_in_background(self.llm)
+            self.reader.redraw()
+
+    def show_warmup(self):
+        # The background warm-up finished, possibly while the user is typing
+        line = WarmupManager.describe()
+        if line:
+            Logger.log(f"\n{line}" if self.reader.waiting else line)
+            self.reader.redraw()
+
+    def interrupt(self):
+        # Ctrl-C: stop the reply in flight (and drop anything queued behind it)
+        if self.turn is not None:
+            while not self.chats.empty():
+                self.chats.get_nowait()
+                self.chats.task_done()
+            self.cancel.set()
+            self.turn.cancel()
+            Logger.log(f"\n{ChatColors.system}(generation stopped){Colors.reset}")
+        elif self.busy:
+            # The terminal already delivered SIGINT to the command's processes;
+            # tell commands that wait in-process (/wait, /fg) to stop
+            self.router.interrupt()
+        else:
+            # Nothing to stop, so Ctrl-C at the prompt quits as it always has
+            self.reader.lines.put_nowait(None)
 
-        # PRINT && LOOP
-        # Tell us what the LLM had to say about it
-        Logger.log(f"{build_sender(opts.shell_name, opts.persona)} {ChatColors.text}{response}{Colors.reset}\n")
+def run_chat(llm, opts):
+    if sys.platform.startswith("linux") or sys.platform == "darwin":
+        import readline   # readline support for Unix-like systems, not needed on Windows >= 10
+    with StartupProfiler.phase("command router"):
+        chat = ChatLoop(llm, opts)
+    asyncio.run(chat.run())
+
+
+def send_turn(llm, opts, your_message, cancel=None):
+    loading = " (model still loading)" if WarmupManager.status == "warming" else ""
+    print(f"\n{ChatColors.system}Thinking...{loading}{Colors.reset}", end="\r", flush=True)
+    sender = build_sender(opts.shell_name, opts.persona)
+    started = False
+
+    def on_chunk(text):
+        nonlocal started
+        if cancel is not None and cancel.is_set():
+            return
+        if not started:
+            print(" " * 80, end="\r")
+            print(f"{sender} ", end="")
+            started = True
+        print(f"{ChatColors.text}{text}{Colors.reset}", end="", flush=True)
+
+    response = TurnManager.send(llm, your_message, stream=opts.stream, on_chunk=on_chunk, cancel=cancel)
+    stats = TurnManager.last_stats
+    if cancel is not None and cancel.is_set():
+        # Ctrl-C already returned us to the prompt; the partial reply is in the history
+        if started:
+            print(f"{Colors.reset}\n")
+        return
+
+    if not started:
+        # Nothing was streamed (streaming off, tools in use, or interrupted before the first token)
+        print(" " * 80, end="\r")
+        if response:
+            Logger.log(f"{sender} {ChatColors.text}{response}{Colors.reset}\n")
+    else:
+        print("\n")
+        Logger.write_to_file(f"{sender} {response}")
+
+    if stats["interrupted"]:
+        Logger.log(f"{ChatColors.system}(generation stopped){Colors.reset}")
+    if stats["cached"]:
+        Logger.log(f"{ChatColors.system}(cached reply, {stats['elapsed'] * 1000:.0f}ms){Colors.reset}\n")
+    elif stats["ttft"] is not None:
+        rate = f", {stats['tokens_per_sec']:.1f} tok/s" if stats["tokens_per_sec"] else ""
+        Logger.log(f"{ChatColors.system}(first token {stats['ttft']:.2f}s{rate}){Colors.reset}\n")
 
 
 def main() -> None:
@@ -136,13 +324,32 @@ def main() -> None:
         usage()
         sys.exit(0)
 
-    opts = resolve_options()
-
-    llm = LLMConversation(
-        model=opts.persona,
-        system_prompt=opts.system_prompt,
-        base_url=opts.base_url,
-    )
+    StartupProfiler.phases.append(("imports", StartupProfiler.elapsed()))
+    with StartupProfiler.phase("options"):
+        opts = resolve_options()
+
+    with StartupProfiler.phase("connect (detect server)"):
+        from voltllmclient import LLMConversation   # pulls in requests; not needed for --help
+        llm = LLMConversation(
+            model=opts.persona,
+            system_prompt=opts.system_prompt,
+            base_url=opts.base_url,
+        )
+    # Chat requests are spread over every configured backend
+    BackendManager.configure(llm.client, backends=opts.backends,
+                             hedge_after=opts.hedge_after, health_interval=opts.health_interval)
+    WarmupManager.configure(keep_alive=opts.keep_alive)
+    if opts.batch:
+        # No REPL: run the prompts and exit
+        from batchmanager import BatchManager
+        BatchManager.configure(concurrency=opts.batch_concurrency, order=opts.batch_order)
+        sys.exit(BatchManager.run(llm, opts.batch, out_path=opts.batch_out, default_system=opts.system_prompt))
+
+    # Connect and load the model while the user types the first prompt
+    warmup_notice = ""
+    if opts.warmup:
+        WarmupManager.start(llm)
+        warmup_notice = f"Warming up '{opts.persona}' in the background...\n"
     shell_exec_enabled_warning = ""
     if getattr(opts, "shell_exec_privs", 0) > 0:
         shell_exec_enabled_warning = f"{Colors.fg.yellow}CAUTION: Shell exec enabled!{Colors.reset}\n"
@@ -150,6 +357,7 @@ def main() -> None:
     Logger.log(
         f"\n{ChatColors.system}"
         f"Connected to {llm.client.base_url} ({llm.client.api_type}) using model '{opts.persona}'\n"
+        f"{warmup_notice}"
         f"{shell_exec_enabled_warning}"
         f"{Colors.reset}"
     )
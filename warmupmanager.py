@@ -0,0 +1,131 @@
+# warmupmanager.py
+# 10/18/2026 - Voltur
+#
+# Gets the server ready while the user types their first prompt: opens a pooled HTTP
+# connection and, on Ollama, loads the model into memory. Replies are streamed over the
+# same pooled session, so the first turn doesn't pay for connection setup either.
+#
+
+import threading
+import time
+
+from chatcolors import Colors
+from chatcolors import ChatColors
+
+
+class WarmupManager:
+    def __init__(self):
+        self.keep_alive = None      # Ollama keep_alive ("30m", seconds, -1); None = server default
+        self.status = "off"         # off | warming | ready | failed
+        self.detail = ""
+        self.elapsed = None
+        self._on_done = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._session = None
+
+    @property
+    def session(self):
+        # Shared with TurnManager, so the connection opened here is the one replies use.
+        # Made on first use: requests takes ~100ms to import, which --help shouldn't pay
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            return self._session
+
+    def configure(self, keep_alive=None):
+        self.keep_alive = keep_alive
+
+    def _headers(self, client):
+        return {
+            'Authorization': f'Bearer {client.bearer_token}',
+            'Content-Type': 'application/json'
+        }
+
+    # ----------------------
+    # Warming up
+    # ----------------------
+    def start(self, llm):
+        """
+        Warm up the connection and model llm is pointed at, on a daemon thread.
+        A warm-up already running for an earlier model is left to finish.
+        """
+        with self._lock:
+            self.status = "warming"
+            self.detail = ""
+            self.elapsed = None
+            self._thread = threading.Thread(target=self._warm,
+                                            args=(llm.client, llm.client.model), daemon=True)
+            self._thread.start()
+
+    def _warm(self, client, model):
+        import requests
+        started = time.perf_counter()
+        base_url = client.base_url.rstrip("/")
+        try:
+            # Connect (and TLS handshake) once; the pool keeps the socket for the first turn
+            self.session.get(client.endpoints['models'], headers=self._headers(client), timeout=10).close()
+            if client.api_type == "ollama":
+                # An empty generate loads the model and returns once it is in memory
+                payload = {"model": model}
+                if self.keep_alive is not None:
+                    payload["keep_alive"] = self.keep_alive
+                resp = self.session.post(f"{base_url}/api/generate", headers=self._headers(client),
+                                         json=payload, timeout=client.timeout)
+                resp.raise_for_status()
+                detail = f"model '{model}' loaded"
+            else:
+                detail = "connected"
+            status = "ready"
+        except requests.Timeout:
+            status, detail = "failed", f"no answer in {client.timeout}s"
+        except requests.ConnectionError:
+            status, detail = "failed", "connection failed"
+        except requests.HTTPError as e:
+            status, detail = "failed", f"HTTP {e.response.status_code}"
+        except requests.RequestException as e:
+            status, detail = "failed", str(e) or type(e).__name__
+
+        with self._lock:
+            if client.model != model:
+                return      # /model moved on while we were loading; its own warm-up reports
+            self.status, self.detail = status, detail
+            self.elapsed = time.perf_counter() - started
+            callback = self._on_done
+        if callback:
+            callback()
+
+    def on_done(self, callback):
+        """
+        callback() runs (on the warm-up thread) when the current warm-up finishes;
+        right away if it already has.
+        """
+        with self._lock:
+            self._on_done = callback
+            done = self.status in ("ready", "failed")
+        if done:
+            callback()
+
+    # ----------------------
+    # Status
+    # ----------------------
+    def describe(self):
+        # One line for the console, or None while there is nothing to say
+        if self.status == "ready":
+            return f"{ChatColors.system}Warm-up done: {self.detail} ({self.elapsed:.1f}s){Colors.reset}"
+        if self.status == "failed":
+            return f"{Colors.fg.yellow}Warm-up failed: {self.detail}{Colors.reset}"
+        return None
+
+    def payload_extras(self):
+        # Ollama settings for every chat request: keep_alive, so the model stays loaded
+        if self.keep_alive is not None:
+            return {"keep_alive": self.keep_alive}
+        return {}
+
+WarmupManager = WarmupManager()